@@ -2,12 +2,79 @@
 
 Start:
     python main.py
+    python main.py --hydraulika
+    python main.py --regulacja     (bank regulatorow PID: poziom przez pompy, temperatura przez grzalki)
+    python main.py --profile       (profilowanie etapow od startu, panel "Diagnostyka")
+    python main.py --no-pygame --no-tk --startup-report
+    python main.py --plots-thread  (wykresy renderowane w watku roboczym)
+    python main.py --archive historia/   (archiwum historii procesu)
+    python main.py --headless [--port 5020] [--unix /tmp/scada.sock] [--modbus 5502]
+                   (--unix bez --port: tylko gniazdo Unix)
+    python main.py --fleet 64 [--workers 4]   (flota instalacji w procesach + przeglad)
 
 Wymagane biblioteki: PyQt5, pygame, tkinter (w standardzie), matplotlib.
+Tryb --headless (serwer stanu bez GUI) wymaga tylko biblioteki standardowej.
 """
 
-from scada_project.ui.main_window import run_app
+import argparse
+import time
+
+T0 = time.perf_counter()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="SCADA - symulacja instalacji zbiornikow")
+    ap.add_argument("--headless", action="store_true", help="serwer stanu bez GUI (asyncio)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=None, help="port TCP (domyslnie 5020; z --unix tylko gdy podany)")
+    ap.add_argument("--unix", default=None, help="sciezka gniazda Unix (zamiast TCP; obok - z --port)")
+    ap.add_argument("--hydraulika", action="store_true", help="solwer hydrauliczny (przeplyw w obu kierunkach)")
+    ap.add_argument("--regulacja", action="store_true", help="bank regulatorow PID (model.control)")
+    ap.add_argument("--modbus", type=int, default=None, metavar="PORT", help="fasada Modbus/TCP (z --headless)")
+    ap.add_argument("--profile", action="store_true", help="wlacz profilowanie etapow od startu")
+    ap.add_argument("--no-plots", action="store_true", help="bez wykresow matplotlib")
+    ap.add_argument("--plots-thread", action="store_true", help="render wykresow matplotlib poza watkiem GUI")
+    ap.add_argument("--no-pygame", action="store_true", help="bez okna pygame")
+    ap.add_argument("--no-tk", action="store_true", help="bez okna logow Tkinter")
+    ap.add_argument("--startup-report", action="store_true", help="wypisz czasy importu/inicjalizacji podsystemow")
+    ap.add_argument("--archive", default=None, metavar="KATALOG", help="archiwum historii (kompresja, zapis w tle)")
+    ap.add_argument("--fleet", type=int, default=None, metavar="N", help="flota N instalacji (okno przegladu)")
+    ap.add_argument("--workers", type=int, default=None, help="liczba procesow floty (domyslnie liczba rdzeni)")
+    args = ap.parse_args()
+
+    if args.headless:
+        from scada_project.net.state_server import run_server
+
+        port = args.port if args.port is not None or args.unix else 5020
+        run_server(args.host, port, args.unix, modbus_port=args.modbus, hydraulika=args.hydraulika,
+                   regulacja=args.regulacja)
+        return
+
+    if args.fleet:
+        from scada_project.ui.fleet_window import run_fleet_app
+
+        run_fleet_app(args.fleet, workers=args.workers, hydraulika=args.hydraulika, regulacja=args.regulacja)
+        return
+
+    from scada_project.utils.startup import StartupReport
+
+    startup = StartupReport(T0)
+    with startup.phase("import PyQt5 + okno glowne"):
+        from scada_project.ui.main_window import run_app
+
+    run_app(
+        hydraulika=args.hydraulika,
+        profile=args.profile,
+        plots=not args.no_plots,
+        pygame=not args.no_pygame,
+        tk=not args.no_tk,
+        startup=startup,
+        startup_report=args.startup_report,
+        plots_thread=args.plots_thread,
+        archive=args.archive,
+        regulacja=args.regulacja,
+    )
 
 
 if __name__ == "__main__":
-    run_app()
+    main()
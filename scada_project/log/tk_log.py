@@ -1,47 +1,188 @@
-"""Tkinter: okno logow/diagnostyki
+"""Tkinter: okno logow/diagnostyki w osobnym procesie.
 
-Uruchamiane w osobnym watku, odbiera komunikaty przez Queue.
+Petla Tk nie dziala w procesie Qt (nie konkuruje o GIL z Qt i pygame).
+log() tylko dopisuje do ograniczonego bufora w pamieci - nigdy nie czeka
+na okno; przy przepelnieniu (okno nie nadaza) odrzucane sa najstarsze
+wiersze (licznik `dropped`). Watek nadawcy co `batch_s` wysyla zebrane
+wiersze jedna ramka przez potok (send_bytes, wiersze rozdzielone "\\n"),
+a proces okna (start "spawn", jak model.forecast) wstawia je jednym
+insertem. Okno trzyma ostatnie `max_lines` wierszy.
+
+Proces, ktory padnie po starcie (kod != 0), jest uruchamiany ponownie
+z opoznieniem rosnacym do 30 s i dostaje ostatnie wiersze. Zamkniecie okna
+przez uzytkownika (kod 0) albo blad startu (np. brak ekranu) koncza
+nadawanie.
 """
 
+from __future__ import annotations
+
+import multiprocessing
 import threading
-import tkinter as tk
-from tkinter.scrolledtext import ScrolledText
-from queue import Queue, Empty
+import time
+from collections import deque
+from multiprocessing.connection import Connection
+from typing import Callable, Deque, List, Optional, Tuple
+
+READY = b"ready"
+_MAX_DELAY_S = 30.0
+
+
+def build_window(title: str, max_lines: int) -> Tuple[object, Callable[[List[str]], None]]:
+    """Okno Tk z polem tekstowym -> (root, dopisz_wiersze)."""
+    import tkinter as tk
+    from tkinter.scrolledtext import ScrolledText
+
+    root = tk.Tk()
+    root.title(title)
+    root.geometry("520x380")
+
+    txt = ScrolledText(root, state='disabled', wrap='word')
+    txt.pack(fill='both', expand=True)
+
+    def append(lines: List[str]) -> None:
+        txt.configure(state='normal')
+        txt.insert('end', "\n".join(lines[-max_lines:]) + "\n")
+        # 'end-1c' to poczatek pustej linii za ostatnim "\n"
+        extra = int(txt.index('end-1c').split('.')[0]) - 1 - max_lines
+        if extra > 0:
+            txt.delete('1.0', f'{extra + 1}.0')
+        txt.see('end')
+        txt.configure(state='disabled')
+
+    return root, append
+
+
+def _window_main(conn: Connection, title: str, max_lines: int, poll_ms: int) -> None:
+    """Proces okna: odbiera ramki z potoku w petli Tk."""
+    root, append = build_window(title, max_lines)
+    conn.send_bytes(READY)
+
+    def poll():
+        lines: List[str] = []
+        try:
+            while conn.poll():
+                lines.extend(conn.recv_bytes().decode("utf-8").split("\n"))
+        except (EOFError, OSError):
+            # rodzic zamknal potok (koniec aplikacji)
+            root.destroy()
+            return
+        if lines:
+            append(lines)
+        root.after(poll_ms, poll)
+
+    poll()
+    root.mainloop()
 
 
 class TkLogWindow:
-    def __init__(self, title: str = "Log / Diagnostyka"):
+    def __init__(
+        self,
+        title: str = "Log / Diagnostyka",
+        max_lines: int = 2000,
+        batch_s: float = 0.05,
+        buffer: int = 10000,
+    ):
         self.title = title
-        self.queue: Queue[str] = Queue()
-        self._thread = threading.Thread(target=self._run, daemon=True)
-        self._root = None
+        self.max_lines = max_lines
+        self.batch_s = batch_s
+        # wiersze czekajace na wyslanie (deque.append nie blokuje)
+        self._buf: Deque[str] = deque(maxlen=buffer)
+        # ostatnie wyslane - dla okna uruchomionego ponownie
+        self._recent: Deque[str] = deque(maxlen=max_lines)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="tk-log-sender")
+        self._proc: Optional[multiprocessing.process.BaseProcess] = None
+        self.dropped = 0
+        self.restarts = 0
+        # czas startu procesu + importu tkinter + utworzenia okna [s] (raport startu)
+        self.init_s: Optional[float] = None
+        self.init_t0 = 0.0
 
     def start(self) -> None:
         if not self._thread.is_alive():
             self._thread.start()
 
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+
     def log(self, msg: str) -> None:
-        self.queue.put(msg)
+        buf = self._buf
+        if len(buf) == buf.maxlen:
+            self.dropped += 1
+        buf.append(msg.replace("\n", " "))
 
+    def pending(self) -> int:
+        """Wiersze czekajace na wyslanie do okna."""
+        return len(self._buf)
+
+    # ---- Watek nadawcy ----
     def _run(self) -> None:
-        root = tk.Tk()
-        root.title(self.title)
-        root.geometry("520x380")
-
-        txt = ScrolledText(root, state='disabled', wrap='word')
-        txt.pack(fill='both', expand=True)
-
-        def poll():
-            try:
-                while True:
-                    m = self.queue.get_nowait()
-                    txt.configure(state='normal')
-                    txt.insert('end', m + "\n")
-                    txt.see('end')
-                    txt.configure(state='disabled')
-            except Empty:
-                pass
-            root.after(100, poll)
-
-        poll()
-        root.mainloop()
+        ctx = multiprocessing.get_context("spawn")
+        delay = 1.0
+        while not self._stop.is_set():
+            conn, child = ctx.Pipe()
+            t0 = time.perf_counter()
+            proc = ctx.Process(
+                target=_window_main, args=(child, self.title, self.max_lines, int(self.batch_s * 1000)),
+                daemon=True, name="tk-log",
+            )
+            proc.start()
+            child.close()
+            self._proc = proc
+            if self._recent:
+                self._send(conn, list(self._recent))
+            ready = self._serve(conn, proc, t0)
+            conn.close()  # EOF: okno konczy sie samo
+            proc.join(timeout=2.0)
+            if proc.is_alive():
+                proc.terminate()
+                proc.join(timeout=1.0)
+            if self._stop.is_set() or proc.exitcode == 0 or not ready:
+                return
+            # awaria okna w trakcie pracy: ponowny start z rosnacym opoznieniem
+            # (po dluzszej poprawnej pracy - znow od 1 s)
+            self.restarts += 1
+            if time.perf_counter() - t0 > _MAX_DELAY_S:
+                delay = 1.0
+            if self._stop.wait(delay):
+                return
+            delay = min(_MAX_DELAY_S, delay * 2.0)
+
+    def _serve(self, conn: Connection, proc, t0: float) -> bool:
+        """Wysyla paczki do konca procesu okna; zwraca, czy okno wystartowalo."""
+        ready = False
+        buf = self._buf
+        while not self._stop.is_set() and proc.is_alive():
+            if not ready:
+                ready = self._check_ready(conn, t0)
+            lines = []
+            while buf:
+                lines.append(buf.popleft())
+            if lines:
+                self._recent.extend(lines)
+                if not self._send(conn, lines):
+                    break
+            self._stop.wait(self.batch_s)
+        # okno moglo zglosic gotowosc tuz przed awaria
+        return ready or self._check_ready(conn, t0)
+
+    def _check_ready(self, conn: Connection, t0: float) -> bool:
+        try:
+            if not (conn.poll() and conn.recv_bytes() == READY):
+                return False
+        except (EOFError, OSError):
+            return False
+        if self.init_s is None:
+            self.init_t0 = t0
+            self.init_s = time.perf_counter() - t0
+        return True
+
+    @staticmethod
+    def _send(conn: Connection, lines: List[str]) -> bool:
+        try:
+            conn.send_bytes("\n".join(lines).encode("utf-8"))
+        except (BrokenPipeError, OSError):
+            return False
+        return True
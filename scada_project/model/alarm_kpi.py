@@ -0,0 +1,255 @@
+"""Wskazniki jakosci systemu alarmowego liczone przyrostowo (ISA-18.2 / EEMUA 191).
+
+AlarmKPI.zdarzenie() dostaje kazde przejscie alarmu z Instalacja._update_alarms
+(Instalacja.alarm_cb: zbiornik, rodzaj hi/lo/temp, aktywny, czas) i aktualizuje
+liczniki w czasie O(1) (zamortyzowanym - kazda aktywacja raz wchodzi i raz
+wychodzi z okna):
+- alarmy na operatora w przesuwnym oknie 10 min i szczyt tej wartosci,
+- powodz alarmowa (> 10 alarmow w oknie): liczba epizodow i laczny czas -
+  koniec powodzi liczony dokladnie w chwili wypadniecia aktywacji z okna,
+- alarmy terkoczace: >= 3 aktywacje tego samego alarmu w 60 s,
+- alarmy stojace (aktywne teraz) i przestarzale (aktywne dluzej niz 24 h),
+- czas w alarmie kazdego zbiornika (co najmniej jeden aktywny alarm).
+
+Liczniki naleza do zmiany (domyslnie 8 h od 6:00 czasu lokalnego; dlugosc
+zmiany powinna dzielic dobe). Zmiana zamykana jest leniwie - przy pierwszym
+zdarzeniu albo zapytaniu po jej koncu - a czasy trwajacych alarmow i powodzi
+sa dzielone na granicy. stan(now) - podglad na zywo, zapisz_csv() - wiersz
+na zmiane (zamkniete + biezaca); zapisz_zmiany_csv() zapisuje kopie z zmiany(now).
+"""
+
+from __future__ import annotations
+
+import csv
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+OKNO_S = 600.0
+PROG_POWODZI = 10
+TERKOT_OKNO_S = 60.0
+TERKOT_PROG = 3
+PRZESTARZALY_S = 24 * 3600.0
+ZMIANA_S = 8 * 3600.0
+POCZATEK_ZMIANY_H = 6
+
+Klucz = Tuple[str, str]  # (zbiornik, rodzaj)
+
+
+@dataclass
+class Zmiana:
+    """Liczniki jednej zmiany."""
+
+    poczatek: float
+    koniec: float
+    aktywacje: int = 0
+    szczyt_10min: int = 0
+    powodzie: int = 0
+    czas_powodzi_s: float = 0.0
+    terkot: int = 0  # epizody terkotania
+    max_stojacych: int = 0
+    aktywacje_zbiornika: Dict[str, int] = field(default_factory=dict)
+    czas_w_alarmie_s: Dict[str, float] = field(default_factory=dict)
+    terkoczace: Set[str] = field(default_factory=set)
+
+
+def _nazwa(k: Klucz) -> str:
+    return f"{k[0]}.{k[1]}"
+
+
+class AlarmKPI:
+    def __init__(
+        self,
+        okno_s: float = OKNO_S,
+        prog_powodzi: int = PROG_POWODZI,
+        zmiana_s: float = ZMIANA_S,
+        poczatek_zmiany_h: float = POCZATEK_ZMIANY_H,
+        historia: int = 90,
+    ):
+        self.okno_s = float(okno_s)
+        self.prog_powodzi = int(prog_powodzi)
+        self.zmiana_s = float(zmiana_s)
+        self.poczatek_zmiany_h = float(poczatek_zmiany_h)
+        # czasy aktywacji w oknie (rosnaco)
+        self._okno: Deque[float] = deque()
+        self._powodz_od: Optional[float] = None
+        # aktywne alarmy -> czas aktywacji
+        self._aktywne: Dict[Klucz, float] = {}
+        # zbiornik -> liczba aktywnych alarmow / poczatek biezacego okresu w alarmie
+        self._aktywne_zb: Dict[str, int] = {}
+        self._w_alarmie_od: Dict[str, float] = {}
+        # ostatnie TERKOT_PROG aktywacji kazdego alarmu
+        self._aktywacje: Dict[Klucz, Deque[float]] = {}
+        self._terkocze: Set[Klucz] = set()
+        self.szczyt_10min = 0  # od startu
+        self.zmiana: Optional[Zmiana] = None
+        self.historia: Deque[Zmiana] = deque(maxlen=historia)
+
+    # ---- Zmiany ----
+    def _poczatek_zmiany(self, t: float) -> float:
+        d = datetime.fromtimestamp(t)
+        p = d.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(hours=self.poczatek_zmiany_h)
+        if p > d:
+            p -= timedelta(days=1)
+        return p.timestamp() + ((d - p).total_seconds() // self.zmiana_s) * self.zmiana_s
+
+    def _nowa_zmiana(self, t0: float) -> None:
+        self.zmiana = Zmiana(t0, t0 + self.zmiana_s, szczyt_10min=len(self._okno), max_stojacych=len(self._aktywne))
+
+    def _zamknij_zmiane(self) -> None:
+        z = self.zmiana
+        b = z.koniec
+        # trwajace alarmy i powodz: czesc do granicy nalezy do konczacej sie zmiany
+        for zb, od in self._w_alarmie_od.items():
+            z.czas_w_alarmie_s[zb] = z.czas_w_alarmie_s.get(zb, 0.0) + b - od
+            self._w_alarmie_od[zb] = b
+        if self._powodz_od is not None:
+            z.czas_powodzi_s += b - self._powodz_od
+            self._powodz_od = b
+        self.historia.append(z)
+        self._nowa_zmiana(b)
+
+    def _do(self, t: float) -> None:
+        """Przesuwa stan do chwili t: wygasanie okna i granice zmian."""
+        if self.zmiana is None:
+            self._nowa_zmiana(self._poczatek_zmiany(t))
+        while t >= self.zmiana.koniec:
+            self._wygas(self.zmiana.koniec)
+            self._zamknij_zmiane()
+        self._wygas(t)
+
+    def _wygas(self, t: float) -> None:
+        w = self._okno
+        while w and w[0] + self.okno_s <= t:
+            te = w.popleft() + self.okno_s
+            if self._powodz_od is not None and len(w) <= self.prog_powodzi:
+                self.zmiana.czas_powodzi_s += te - self._powodz_od
+                self._powodz_od = None
+
+    # ---- Zdarzenia (Instalacja.alarm_cb) ----
+    def zdarzenie(self, zbiornik: str, rodzaj: str, aktywny: bool, t: float) -> None:
+        self._do(t)
+        if aktywny:
+            self._aktywacja((zbiornik, rodzaj), t)
+        else:
+            self._skasowanie((zbiornik, rodzaj), t)
+
+    def _aktywacja(self, k: Klucz, t: float) -> None:
+        if k in self._aktywne:
+            return
+        z = self.zmiana
+        zb = k[0]
+        self._aktywne[k] = t
+        z.aktywacje += 1
+        z.aktywacje_zbiornika[zb] = z.aktywacje_zbiornika.get(zb, 0) + 1
+        if len(self._aktywne) > z.max_stojacych:
+            z.max_stojacych = len(self._aktywne)
+        n = self._aktywne_zb.get(zb, 0)
+        self._aktywne_zb[zb] = n + 1
+        if n == 0:
+            self._w_alarmie_od[zb] = t
+
+        w = self._okno
+        w.append(t)
+        if len(w) > z.szczyt_10min:
+            z.szczyt_10min = len(w)
+        if len(w) > self.szczyt_10min:
+            self.szczyt_10min = len(w)
+        if len(w) > self.prog_powodzi and self._powodz_od is None:
+            self._powodz_od = t
+            z.powodzie += 1
+
+        a = self._aktywacje.get(k)
+        if a is None:
+            a = self._aktywacje[k] = deque(maxlen=TERKOT_PROG)
+        a.append(t)
+        terkot = len(a) == TERKOT_PROG and t - a[0] <= TERKOT_OKNO_S
+        if terkot and k not in self._terkocze:
+            self._terkocze.add(k)
+            z.terkot += 1
+            z.terkoczace.add(_nazwa(k))
+        elif not terkot:
+            self._terkocze.discard(k)
+
+    def _skasowanie(self, k: Klucz, t: float) -> None:
+        if self._aktywne.pop(k, None) is None:
+            return
+        zb = k[0]
+        n = self._aktywne_zb[zb] - 1
+        self._aktywne_zb[zb] = n
+        if n == 0:
+            z = self.zmiana
+            z.czas_w_alarmie_s[zb] = z.czas_w_alarmie_s.get(zb, 0.0) + t - self._w_alarmie_od.pop(zb)
+
+    # ---- Zapytania ----
+    def stan(self, now: float) -> Dict:
+        """Podglad na zywo (biezaca zmiana + stan chwilowy)."""
+        self._do(now)
+        z = self.zmiana
+        czas = dict(z.czas_w_alarmie_s)
+        for zb, od in self._w_alarmie_od.items():
+            czas[zb] = czas.get(zb, 0.0) + now - od
+        trwa = max(1e-9, now - z.poczatek)
+        powodz_s = z.czas_powodzi_s + (now - self._powodz_od if self._powodz_od is not None else 0.0)
+        return {
+            "teraz": now,
+            "zmiana_od": z.poczatek,
+            "zmiana_do": z.koniec,
+            "alarmy_10min": len(self._okno),
+            "srednio_10min": z.aktywacje * self.okno_s / trwa,
+            "szczyt_10min": z.szczyt_10min,
+            "szczyt_10min_od_startu": self.szczyt_10min,
+            "powodz": self._powodz_od is not None,
+            "powodzie": z.powodzie,
+            "czas_powodzi_s": powodz_s,
+            "aktywacje": z.aktywacje,
+            "terkot": z.terkot,
+            # terkoczace teraz: ostatnia aktywacja nie starsza niz okno terkotu
+            "terkoczace": sorted(
+                _nazwa(k) for k in self._terkocze if now - self._aktywacje[k][-1] <= TERKOT_OKNO_S
+            ),
+            "stojace": sorted((_nazwa(k), now - t) for k, t in self._aktywne.items()),
+            "przestarzale": sum(1 for t in self._aktywne.values() if now - t > PRZESTARZALY_S),
+            "czas_w_alarmie_s": czas,
+            "aktywacje_zbiornika": dict(z.aktywacje_zbiornika),
+        }
+
+    def zmiany(self, now: float) -> List[Zmiana]:
+        """Zamkniete zmiany z historii + biezaca (z czasami liczonymi do now)."""
+        s = self.stan(now)
+        z = self.zmiana
+        biezaca = Zmiana(
+            z.poczatek, now, z.aktywacje, z.szczyt_10min, z.powodzie, s["czas_powodzi_s"], z.terkot,
+            z.max_stojacych, dict(z.aktywacje_zbiornika), s["czas_w_alarmie_s"], set(z.terkoczace),
+        )
+        return list(self.historia) + [biezaca]
+
+    def zapisz_csv(self, path: str, now: float, zbiorniki: Optional[List[str]] = None) -> int:
+        """Wiersz na zmiane; kolumny czasu w alarmie i aktywacji dla kazdego zbiornika."""
+        return zapisz_zmiany_csv(path, self.zmiany(now), self.okno_s, zbiorniki)
+
+
+def zapisz_zmiany_csv(path: str, rows: List[Zmiana], okno_s: float = OKNO_S, zbiorniki: Optional[List[str]] = None) -> int:
+    """Zapis CSV zmian z AlarmKPI.zmiany() - bez dostepu do AlarmKPI (np. poza blokada)."""
+    if zbiorniki is None:
+        zbiorniki = sorted({n for r in rows for n in (*r.czas_w_alarmie_s, *r.aktywacje_zbiornika)})
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(
+            ["poczatek", "koniec", "aktywacje", "srednio_10min", "szczyt_10min", "powodzie",
+             "czas_powodzi_s", "terkot", "terkoczace", "max_stojacych"]
+            + [f"{n}.aktywacje" for n in zbiorniki]
+            + [f"{n}.czas_w_alarmie_s" for n in zbiorniki]
+        )
+        for r in rows:
+            trwa = max(1e-9, r.koniec - r.poczatek)
+            w.writerow(
+                [datetime.fromtimestamp(r.poczatek).isoformat(timespec="seconds"),
+                 datetime.fromtimestamp(r.koniec).isoformat(timespec="seconds"),
+                 r.aktywacje, f"{r.aktywacje * okno_s / trwa:.2f}", r.szczyt_10min, r.powodzie,
+                 f"{r.czas_powodzi_s:.1f}", r.terkot, " ".join(sorted(r.terkoczace)), r.max_stojacych]
+                + [r.aktywacje_zbiornika.get(n, 0) for n in zbiorniki]
+                + [f"{r.czas_w_alarmie_s.get(n, 0.0):.1f}" for n in zbiorniki]
+            )
+    return len(rows)
@@ -0,0 +1,609 @@
+"""Archiwum dlugoterminowe historii procesu (kompresja w stylu Gorilla).
+
+Probki (czas + wartosci wszystkich serii) trafiaja do biezacego porcji
+(chunk) w pamieci. Porcja zamykana co chunk_s sekund jest kodowana
+i dopisywana do pliku dnia w watku tla - tick nie czeka na dysk.
+
+Kodowanie kolumnowe porcji:
+- czas [ms]: pierwsza wartosc, pierwsza delta, potem delta-of-delta
+  w przedzialach bitowych (regularny tick 20 Hz = 1 bit na probke),
+- serie float (poziom, temperatura, predkosc pompy): XOR z poprzednia
+  wartoscia; stala wartosc = 1 bit, zmiana - tylko bity znaczace,
+- bity (pompa wlaczona, zawory): RLE - wartosc poczatkowa i dlugosci serii.
+
+Format pliku (jeden na dzien UTC, RRRR-MM-DD.arch) - ciag porcji:
+    naglowek  !4sIqqI   (magic, liczba probek, t pierwszej/ostatniej [ms], dlugosc)
+    tresc     !H liczba serii, dla kazdej !BB rodzaj + dlugosc nazwy, nazwa, !I
+              dlugosc kolumny; potem kolumna czasu (!I dlugosc + dane) i kolumny
+Porcja jest samoopisujaca (zestaw serii moze sie zmieniac). Zapytanie
+o przedzial czasu dekoduje tylko porcje, ktore go przecinaja, i tylko
+kolumny zadanych serii.
+"""
+
+from __future__ import annotations
+
+import datetime
+import os
+import queue
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .simulation import Instalacja
+
+MAGIC = b"SCCH"
+SUFFIX = ".arch"
+
+KIND_FLOAT = 1
+KIND_BIT = 2
+
+_CHUNK = struct.Struct("!4sIqqI")
+_COL = struct.Struct("!BB")
+_U16 = struct.Struct("!H")
+_U32 = struct.Struct("!I")
+_M64 = (1 << 64) - 1
+
+
+# ---- Strumien bitow ----
+class BitWriter:
+    def __init__(self):
+        self._buf = bytearray()
+        self._acc = 0
+        self._n = 0
+
+    def write(self, v: int, n: int) -> None:
+        self._acc = (self._acc << n) | (v & ((1 << n) - 1))
+        self._n += n
+        if self._n >= 64:
+            rem = self._n & 7
+            self._buf += (self._acc >> rem).to_bytes(self._n >> 3, "big")
+            self._acc &= (1 << rem) - 1
+            self._n = rem
+
+    def getvalue(self) -> bytes:
+        out = bytes(self._buf)
+        if self._n:
+            pad = -self._n & 7
+            out += (self._acc << pad).to_bytes((self._n + pad) >> 3, "big")
+        return out
+
+
+class BitReader:
+    def __init__(self, data: bytes):
+        self._data = data
+        self._pos = 0
+
+    def read(self, n: int) -> int:
+        pos = self._pos
+        b0 = pos >> 3
+        b1 = (pos + n + 7) >> 3
+        v = int.from_bytes(self._data[b0:b1], "big") >> ((b1 << 3) - pos - n)
+        self._pos = pos + n
+        return v & ((1 << n) - 1)
+
+    def bit(self) -> int:
+        pos = self._pos
+        self._pos = pos + 1
+        return (self._data[pos >> 3] >> (7 - (pos & 7))) & 1
+
+
+def _zz(v: int) -> int:
+    return v << 1 if v >= 0 else ((-v) << 1) - 1
+
+
+def _unzz(v: int) -> int:
+    return (v >> 1) ^ -(v & 1)
+
+
+# ---- Kodeki kolumn ----
+def encode_times(ts: Sequence[int]) -> bytes:
+    """Czasy [ms]: delta-of-delta w przedzialach 1/9/12/16/37/69 bitow."""
+    w = BitWriter()
+    if not ts:
+        return b""
+    w.write(ts[0] & _M64, 64)
+    if len(ts) > 1:
+        delta = ts[1] - ts[0]
+        w.write(_zz(delta), 64)
+        for i in range(2, len(ts)):
+            d = ts[i] - ts[i - 1]
+            dod = d - delta
+            delta = d
+            if dod == 0:
+                w.write(0, 1)
+                continue
+            z = _zz(dod)
+            if z < 1 << 7:
+                w.write(0b10, 2)
+                w.write(z, 7)
+            elif z < 1 << 9:
+                w.write(0b110, 3)
+                w.write(z, 9)
+            elif z < 1 << 12:
+                w.write(0b1110, 4)
+                w.write(z, 12)
+            elif z < 1 << 32:
+                w.write(0b11110, 5)
+                w.write(z, 32)
+            else:
+                w.write(0b11111, 5)
+                w.write(z, 64)
+    return w.getvalue()
+
+
+def decode_times(data: bytes, n: int) -> List[int]:
+    if n == 0:
+        return []
+    r = BitReader(data)
+    t = r.read(64)
+    if t >= 1 << 63:
+        t -= 1 << 64
+    out = [t]
+    if n == 1:
+        return out
+    delta = _unzz(r.read(64))
+    t += delta
+    out.append(t)
+    for _ in range(n - 2):
+        if r.bit():
+            if not r.bit():
+                dod = _unzz(r.read(7))
+            elif not r.bit():
+                dod = _unzz(r.read(9))
+            elif not r.bit():
+                dod = _unzz(r.read(12))
+            elif not r.bit():
+                dod = _unzz(r.read(32))
+            else:
+                dod = _unzz(r.read(64))
+            delta += dod
+        t += delta
+        out.append(t)
+    return out
+
+
+def encode_floats(values: Sequence[float]) -> bytes:
+    """XOR z poprzednia wartoscia (okno bitow znaczacych jak w Gorilla)."""
+    if not values:
+        return b""
+    bits = array("Q", array("d", values).tobytes())
+    w = BitWriter()
+    prev = bits[0]
+    w.write(prev, 64)
+    pl, pt = 65, 65  # brak okna
+    for x in bits[1:]:
+        xr = x ^ prev
+        prev = x
+        if xr == 0:
+            w.write(0, 1)
+            continue
+        lead = min(31, 64 - xr.bit_length())
+        trail = (xr & -xr).bit_length() - 1
+        if pl <= lead and pt <= trail:
+            # miesci sie w poprzednim oknie
+            w.write(0b10, 2)
+            w.write(xr >> pt, 64 - pl - pt)
+        else:
+            sig = 64 - lead - trail
+            w.write(0b11, 2)
+            w.write(lead, 5)
+            w.write(sig - 1, 6)
+            w.write(xr >> trail, sig)
+            pl, pt = lead, trail
+    return w.getvalue()
+
+
+def decode_floats(data: bytes, n: int) -> array:
+    out = array("Q")
+    if n == 0:
+        return array("d")
+    r = BitReader(data)
+    prev = r.read(64)
+    out.append(prev)
+    pl = pt = 0
+    for _ in range(n - 1):
+        if r.bit():
+            if r.bit():
+                pl = r.read(5)
+                sig = r.read(6) + 1
+                pt = 64 - pl - sig
+            prev ^= r.read(64 - pl - pt) << pt
+        out.append(prev)
+    return array("d", out.tobytes())
+
+
+def _varint(v: int, out: bytearray) -> None:
+    while v >= 0x80:
+        out.append((v & 0x7F) | 0x80)
+        v >>= 7
+    out.append(v)
+
+
+def encode_bits(values: Sequence[int]) -> bytes:
+    """RLE: wartosc poczatkowa + dlugosci kolejnych serii (varint)."""
+    out = bytearray()
+    if not values:
+        return bytes(out)
+    cur = 1 if values[0] else 0
+    out.append(cur)
+    run = 0
+    for v in values:
+        v = 1 if v else 0
+        if v == cur:
+            run += 1
+        else:
+            _varint(run, out)
+            cur, run = v, 1
+    _varint(run, out)
+    return bytes(out)
+
+
+def decode_bits(data: bytes, n: int) -> array:
+    out = array("B")
+    if n == 0:
+        return out
+    cur = data[0]
+    pos = 1
+    while len(out) < n:
+        run = shift = 0
+        while True:
+            b = data[pos]
+            pos += 1
+            run |= (b & 0x7F) << shift
+            shift += 7
+            if b < 0x80:
+                break
+        out.extend([cur] * run)
+        cur ^= 1
+    return out
+
+
+# ---- Porcje ----
+@dataclass(frozen=True)
+class ChunkRef:
+    """Polozenie zapisanej porcji (indeks w pamieci, bez dekodowania)."""
+
+    path: str
+    offset: int  # poczatek tresci (po naglowku)
+    length: int
+    n: int
+    t_first: int  # [ms]
+    t_last: int
+    raw_bytes: int  # rozmiar surowych probek: 8 B czas i float, 1 B bit
+
+
+def _raw_size(n: int, kinds: Sequence[int]) -> int:
+    return n * (8 + sum(8 if k == KIND_FLOAT else 1 for k in kinds))
+
+
+def encode_chunk(ts: Sequence[int], columns: Sequence[Tuple[str, int, Sequence]]) -> bytes:
+    """columns: (nazwa, KIND_FLOAT/KIND_BIT, wartosci)."""
+    enc = [(name, kind, encode_floats(vals) if kind == KIND_FLOAT else encode_bits(vals)) for name, kind, vals in columns]
+    tdata = encode_times(ts)
+    body = bytearray(_U16.pack(len(enc)))
+    for name, kind, data in enc:
+        nb = name.encode("utf-8")
+        body += _COL.pack(kind, len(nb)) + nb + _U32.pack(len(data))
+    body += _U32.pack(len(tdata)) + tdata
+    for _, _, data in enc:
+        body += data
+    return _CHUNK.pack(MAGIC, len(ts), ts[0], ts[-1], len(body)) + bytes(body)
+
+
+def chunk_columns(body: bytes) -> Tuple[List[Tuple[str, int, int]], int]:
+    """Naglowki kolumn tresci porcji: [(nazwa, rodzaj, dlugosc)], przesuniecie kolumny czasu."""
+    (count,) = _U16.unpack_from(body, 0)
+    off = _U16.size
+    cols = []
+    for _ in range(count):
+        kind, ln = _COL.unpack_from(body, off)
+        off += _COL.size
+        name = body[off:off + ln].decode("utf-8")
+        off += ln
+        (clen,) = _U32.unpack_from(body, off)
+        off += _U32.size
+        cols.append((name, kind, clen))
+    return cols, off
+
+
+def decode_chunk(body: bytes, n: int, names: Optional[Sequence[str]] = None) -> Tuple[List[int], Dict[str, array]]:
+    """Dekoduje czas i kolumny `names` (None - wszystkie) z tresci porcji."""
+    cols, off = chunk_columns(body)
+    (tlen,) = _U32.unpack_from(body, off)
+    off += _U32.size
+    ts = decode_times(body[off:off + tlen], n)
+    off += tlen
+    want = None if names is None else set(names)
+    out: Dict[str, array] = {}
+    for name, kind, clen in cols:
+        if want is None or name in want:
+            data = body[off:off + clen]
+            out[name] = decode_floats(data, n) if kind == KIND_FLOAT else decode_bits(data, n)
+        off += clen
+    return ts, out
+
+
+def _read_columns(f, ln: int) -> Optional[List[Tuple[str, int, int]]]:
+    """Tabela kolumn porcji o tresci dlugosci ln (od biezacej pozycji pliku).
+
+    Czyta 64 KiB, a gdy tabela jest dluzsza - dwa razy wiecej, az do calej
+    tresci. None, gdy tabela jest uszkodzona albo nie miesci sie w tresci.
+    """
+    buf = f.read(min(ln, 1 << 16))
+    while True:
+        try:
+            cols, off = chunk_columns(buf)
+            if off <= ln:
+                return cols
+        except (struct.error, IndexError, UnicodeDecodeError):
+            pass
+        if len(buf) >= ln:
+            return None
+        more = f.read(min(ln, 2 * len(buf)) - len(buf))
+        if not more:
+            return None
+        buf += more
+
+
+def scan_file(path: str) -> List[ChunkRef]:
+    """Indeks porcji pliku: czyta tylko naglowki i tabele kolumn (bez danych)."""
+    refs: List[ChunkRef] = []
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        off = 0
+        while off + _CHUNK.size <= size:
+            f.seek(off)
+            magic, n, t_first, t_last, ln = _CHUNK.unpack(f.read(_CHUNK.size))
+            if magic != MAGIC or off + _CHUNK.size + ln > size:
+                break  # uciety zapis (np. awaria) - reszta pliku pomijana
+            cols = _read_columns(f, ln)
+            if cols is None:
+                break  # uszkodzona tabela kolumn - traktowana jak uciety zapis
+            raw = _raw_size(n, [k for _, k, _ in cols])
+            refs.append(ChunkRef(path, off + _CHUNK.size, ln, n, t_first, t_last, raw))
+            off += _CHUNK.size + ln
+    return refs
+
+
+# ---- Archiwum ----
+class Archive:
+    """Katalog z plikami dni; dopisywanie probek i zapytania o przedzialy czasu.
+
+    float_names / bit_names - serie zapisywane przez append() (odczyt
+    archiwum nie wymaga ich podania). append() i zapytania obejmujace
+    otwarta porcje - z jednego watku albo pod wspolna blokada.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        float_names: Sequence[str] = (),
+        bit_names: Sequence[str] = (),
+        chunk_s: float = 600.0,
+    ):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.float_names = list(float_names)
+        self.bit_names = list(bit_names)
+        self.chunk_ms = int(chunk_s * 1000)
+
+        # otwarta porcja (kolumny w pamieci)
+        self._ts: List[int] = []
+        self._floats: List[array] = [array("d") for _ in self.float_names]
+        self._bits: List[array] = [array("B") for _ in self.bit_names]
+
+        # indeks zapisanych porcji (posortowany po t_first) + porcje w kolejce zapisu
+        self._lock = threading.Lock()
+        self._refs: List[ChunkRef] = []
+        for name in sorted(os.listdir(path)):
+            if name.endswith(SUFFIX):
+                self._refs.extend(scan_file(os.path.join(path, name)))
+        self._refs.sort(key=lambda r: r.t_first)
+        self._pending: List[Tuple[List[int], List[Tuple[str, int, Sequence]]]] = []
+
+        self.error: Optional[BaseException] = None  # ostatni blad zapisu porcji
+        self.errors = 0
+        self._q: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._writer, name="archive", daemon=True)
+        self._thread.start()
+
+    # ---- Zapis ----
+    def append(self, t: float, floats: Sequence[float], bits: Sequence[bool] = ()) -> None:
+        """Probka wszystkich serii w chwili t [s]. Koszt: dopisanie do list."""
+        ms = int(round(t * 1000.0))
+        if self._ts and ms - self._ts[0] >= self.chunk_ms:
+            self.seal()
+        self._ts.append(ms)
+        for col, v in zip(self._floats, floats):
+            col.append(v)
+        for col, v in zip(self._bits, bits):
+            col.append(1 if v else 0)
+
+    def seal(self) -> None:
+        """Zamyka otwarta porcje (zapis w tle; do tego czasu czytana z pamieci)."""
+        if not self._ts:
+            return
+        cols = [(n, KIND_FLOAT, c) for n, c in zip(self.float_names, self._floats)]
+        cols += [(n, KIND_BIT, c) for n, c in zip(self.bit_names, self._bits)]
+        item = (self._ts, cols)
+        with self._lock:
+            self._pending.append(item)
+        self._q.put(item)
+        self._ts = []
+        self._floats = [array("d") for _ in self.float_names]
+        self._bits = [array("B") for _ in self.bit_names]
+
+    def _file_for(self, ms: int) -> str:
+        day = datetime.datetime.fromtimestamp(ms / 1000.0, datetime.timezone.utc).strftime("%Y-%m-%d")
+        return os.path.join(self.path, day + SUFFIX)
+
+    def _writer(self) -> None:
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            if isinstance(item, threading.Event):
+                item.set()  # flush(): wszystko wczesniej w kolejce jest obsluzone
+                continue
+            try:
+                self._write(item)
+            except Exception as e:
+                # porcja zostaje w _pending (czytana z pamieci); watek dziala dalej
+                self.error = e
+                self.errors += 1
+                print(f"Archiwum: blad zapisu porcji: {e!r}", file=sys.stderr)
+
+    def _write(self, item) -> None:
+        ts, cols = item
+        data = encode_chunk(ts, cols)
+        fn = self._file_for(ts[0])
+        with open(fn, "ab") as f:
+            off = f.tell()
+            try:
+                f.write(data)
+                f.flush()
+            except BaseException:
+                f.truncate(off)  # bez polowy porcji - kolejne pozostaja czytelne
+                raise
+        raw = _raw_size(len(ts), [k for _, k, _ in cols])
+        ref = ChunkRef(fn, off + _CHUNK.size, len(data) - _CHUNK.size, len(ts), ts[0], ts[-1], raw)
+        with self._lock:
+            self._refs.insert(bisect_right([r.t_first for r in self._refs], ref.t_first), ref)
+            # usuwanie po tozsamosci (porownanie kolumn byloby kosztowne)
+            self._pending = [p for p in self._pending if p is not item]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Zamyka biezaca porcje i czeka na obsluzenie wszystkich porcji.
+
+        False - przekroczony timeout. Bledy zapisu: self.error / self.errors.
+        """
+        self.seal()
+        done = threading.Event()
+        self._q.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        self.flush(timeout)
+        self._q.put(None)
+        self._thread.join(timeout=timeout)
+
+    # ---- Odczyt ----
+    def series(self) -> List[str]:
+        """Nazwy serii: biezace + zapisane w najnowszej porcji."""
+        names = self.float_names + self.bit_names
+        with self._lock:
+            last = self._refs[-1] if self._refs else None
+        if last is not None:
+            with open(last.path, "rb") as f:
+                f.seek(last.offset)
+                body = f.read(last.length)
+            names += [n for n, _, _ in chunk_columns(body)[0] if n not in names]
+        return names
+
+    def iter_chunks(
+        self, names: Optional[Sequence[str]], t0: float, t1: float, include_open: bool = True
+    ) -> Iterator[Tuple[array, Dict[str, array]]]:
+        """Kolejne porcje przecinajace [t0, t1] (przyciete do przedzialu).
+
+        Zwraca (czasy [s], {seria: wartosci}); dekodowana jest jedna porcja
+        na raz, wiec pamiec nie zalezy od dlugosci przedzialu. Czytanie
+        z innego watku niz append(): seal() i include_open=False.
+        """
+        a, b = int(round(t0 * 1000.0)), int(round(t1 * 1000.0))
+        with self._lock:
+            refs = [r for r in self._refs if r.t_last >= a and r.t_first <= b]
+            pending = list(self._pending)
+        for ref in refs:
+            with open(ref.path, "rb") as f:
+                f.seek(ref.offset)
+                body = f.read(ref.length)
+            ts, cols = decode_chunk(body, ref.n, names)
+            yield _trim(ts, cols, a, b)
+        # porcje jeszcze w kolejce zapisu i porcja otwarta - z pamieci
+        raw = pending + ([(list(self._ts), self._open_columns())] if include_open and self._ts else [])
+        for ts, cols in raw:
+            if ts[-1] < a or ts[0] > b:
+                continue
+            want = None if names is None else set(names)
+            sel = {n: (array("d", v) if k == KIND_FLOAT else array("B", v)) for n, k, v in cols if want is None or n in want}
+            yield _trim(ts, sel, a, b)
+
+    def _open_columns(self) -> List[Tuple[str, int, Sequence]]:
+        n = len(self._ts)
+        cols = [(nm, KIND_FLOAT, c[:n]) for nm, c in zip(self.float_names, self._floats)]
+        cols += [(nm, KIND_BIT, c[:n]) for nm, c in zip(self.bit_names, self._bits)]
+        return cols
+
+    def query(self, names: Sequence[str], t0: float, t1: float) -> Tuple[array, Dict[str, array]]:
+        """Sklejone wyniki iter_chunks dla [t0, t1]."""
+        times = array("d")
+        out: Dict[str, array] = {}
+        for ts, cols in self.iter_chunks(names, t0, t1):
+            k = len(times)
+            times.extend(ts)
+            for n in names:
+                col = cols.get(n)
+                if n not in out:
+                    out[n] = array("d", [float("nan")] * k)
+                if col is None:
+                    out[n].extend([float("nan")] * len(ts))
+                else:
+                    out[n].extend(array("d", col) if col.typecode != "d" else col)
+        return times, out
+
+    def time_range(self) -> Optional[Tuple[float, float]]:
+        """Czas pierwszej i ostatniej zapisanej probki [s] albo None."""
+        with self._lock:
+            if not self._refs:
+                return None
+            return self._refs[0].t_first / 1000.0, max(r.t_last for r in self._refs) / 1000.0
+
+    def stats(self) -> Dict[str, float]:
+        """Rozmiar zapisanych porcji wzgledem surowych probek."""
+        with self._lock:
+            refs = list(self._refs)
+        raw = sum(r.raw_bytes for r in refs)
+        stored = sum(_CHUNK.size + r.length for r in refs)
+        return {
+            "chunks": len(refs),
+            "samples": sum(r.n for r in refs),
+            "bytes": stored,
+            "raw_bytes": raw,
+            "ratio": raw / stored if stored else 0.0,
+        }
+
+
+def _trim(ts: Sequence[int], cols: Dict[str, array], a: int, b: int) -> Tuple[array, Dict[str, array]]:
+    i = bisect_left(ts, a)
+    j = bisect_right(ts, b)
+    times = array("d", (t / 1000.0 for t in ts[i:j]))
+    return times, {n: v[i:j] for n, v in cols.items()}
+
+
+# ---- Serie instalacji ----
+def plant_series(inst: Instalacja) -> Tuple[List[str], List[str]]:
+    """Nazwy serii float i bitowych dla kazdego zbiornika, pompy i zaworu."""
+    floats = []
+    for z in inst.zbiorniki:
+        floats += [f"{z.nazwa}.poziom", f"{z.nazwa}.temperatura"]
+    floats += [f"{p.pompa.identyfikator}.predkosc" for p in inst.polaczenia]
+    bits = []
+    for p in inst.polaczenia:
+        bits += [f"{p.pompa.identyfikator}.wlaczona", f"{p.nazwa}.zawor_a", f"{p.nazwa}.zawor_b"]
+    return floats, bits
+
+
+def plant_sample(inst: Instalacja) -> Tuple[List[float], List[bool]]:
+    """Wartosci w kolejnosci plant_series()."""
+    floats = []
+    for z in inst.zbiorniki:
+        floats += (z.poziom, z.temperatura)
+    floats += [p.pompa.predkosc for p in inst.polaczenia]
+    bits = []
+    for p in inst.polaczenia:
+        bits += (p.pompa.wlaczona, p.zawor_a.otwarty, p.zawor_b.otwarty)
+    return floats, bits
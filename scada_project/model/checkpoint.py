@@ -0,0 +1,264 @@
+"""Binarny checkpoint pelnego stanu instalacji (zapis/odczyt w mikrosekundach).
+
+Uklad jest staly dla danej topologii (liczba zbiornikow i rur), little-endian,
+bez wypelnien:
+
+    naglowek  <4sHHHId   magic, wersja, liczba zbiornikow, liczba rur,
+                         crc32 nazw encji (zgodnosc topologii), czas zegara
+    zbiornik  <dddBddddBBB  ilosc, temperatura, temp_zadana,
+                            rampa? + (start_time, duration, start_value, target_value),
+                            zatrzask alarmu hi / lo / temp
+    rura      <BdBBBb    pompa wlaczona, predkosc, zawor A, zawor B,
+                         przeplyw, kierunek
+    planista  <dd        czas harmonogramu, reszta kroku solwera hydraulicznego
+    podsystem <dd        ostatnie i nastepne wykonanie (kolejnosc jak w harmonogramie)
+    petla     <14dBB     bank regulatorow (tylko z Instalacja.regulacja): nastawy,
+                         zadana, ograniczenia, calka, pochodna, pv, wyjscie,
+                         wyjscie reczne, auto, pv znane (kolejnosc jak w banku)
+
+crc32 obejmuje tez nazwy podsystemow i petli regulacji - checkpoint
+instalacji z regulacja wymaga odbiorcy zbudowanego z regulacja=True.
+
+Caly rekord jest pakowany jednym wywolaniem Struct.pack_into (bez pickle,
+bez obiektow posrednich). Plik z wieloma checkpointami to tablica rekordow
+o stalym rozmiarze - CheckpointFile otwiera go przez mmap i dekoduje
+wylacznie rekord, o ktory poproszono.
+"""
+
+from __future__ import annotations
+
+import mmap
+import struct
+import zlib
+from typing import List, Optional, Union
+
+from .simulation import Instalacja, RampAction
+
+MAGIC = b"SCKP"
+VERSION = 3
+
+_HEADER = "<4sHHHId"
+_TANK = "dddBddddBBB"
+_PIPE = "BdBBBb"
+_SCHED = "dd"
+_SUB = "dd"
+# pola banku jak control.POLA (14 x d) + auto, _pv_ok
+_LOOP = "d" * 14 + "BB"
+_LOOP_N = 16
+_HEADER_S = struct.Struct(_HEADER)
+_TANK_N = len(struct.unpack("<" + _TANK, bytes(struct.calcsize("<" + _TANK))))
+_PIPE_N = len(struct.unpack("<" + _PIPE, bytes(struct.calcsize("<" + _PIPE))))
+
+
+class CheckpointError(ValueError):
+    pass
+
+
+def layout_crc(inst: Instalacja) -> int:
+    names = "\0".join(
+        [z.nazwa for z in inst.zbiorniki]
+        + [p.nazwa for p in inst.polaczenia]
+        + [p.nazwa for p in inst.harmonogram.podsystemy]
+        + (list(inst.regulacja.petle) if inst.regulacja is not None else [])
+    )
+    return zlib.crc32(names.encode("utf-8"))
+
+
+class CheckpointCodec:
+    """Koder/dekoder checkpointow dla konkretnej topologii instalacji."""
+
+    def __init__(self, inst: Instalacja):
+        self.inst = inst
+        self.n_tanks = len(inst.zbiorniki)
+        self.n_pipes = len(inst.polaczenia)
+        self.crc = layout_crc(inst)
+        self.n_subs = len(inst.harmonogram.podsystemy)
+        self.n_loops = inst.regulacja.bank.n if inst.regulacja is not None else 0
+        self._struct = struct.Struct(
+            _HEADER + _TANK * self.n_tanks + _PIPE * self.n_pipes + _SCHED + _SUB * self.n_subs + _LOOP * self.n_loops
+        )
+        self.size = self._struct.size
+
+    # ---- Zapis ----
+    def _values(self, t: float) -> List:
+        inst = self.inst
+        vals: List = [MAGIC, VERSION, self.n_tanks, self.n_pipes, self.crc, t]
+        ramps = inst._ramp_actions
+        alarms = inst._last_alarm_state
+        for z in inst.zbiorniki:
+            act = ramps.get(z.nazwa)
+            al = alarms[z.nazwa]
+            if act:
+                vals += (z.aktualna_ilosc, z.temperatura, z.temp_zadana, 1,
+                         act.start_time, act.duration, act.start_value, act.target_value)
+            else:
+                vals += (z.aktualna_ilosc, z.temperatura, z.temp_zadana, 0, 0.0, 0.0, 0.0, 0.0)
+            vals += (al["hi"], al["lo"], al["temp"])
+        for pol in inst.polaczenia:
+            vals += (pol.pompa.wlaczona, pol.pompa.predkosc, pol.zawor_a.otwarty, pol.zawor_b.otwarty,
+                     pol.rura.czy_plynie, pol.rura.kierunek)
+        harm = inst.harmonogram
+        vals += (harm.t, inst.hydraulika._acc if inst.hydraulika is not None else 0.0)
+        for p in harm.podsystemy:
+            vals += (p.ostatni, p.nastepny)
+        if self.n_loops:
+            vals += self._loop_values()
+        return vals
+
+    def _loop_values(self) -> List:
+        import numpy as np
+
+        from .control import POLA
+
+        bank = self.inst.regulacja.bank
+        vals: List = []
+        rows = np.stack([getattr(bank, f) for f in POLA], axis=1).tolist()
+        for row, auto, pv_ok in zip(rows, bank.auto.tolist(), bank._pv_ok.tolist()):
+            vals += row
+            vals += (auto, pv_ok)
+        return vals
+
+    def pack(self, t: Optional[float] = None) -> bytes:
+        return self._struct.pack(*self._values(self.inst.clock() if t is None else t))
+
+    def pack_into(self, buf, offset: int = 0, t: Optional[float] = None) -> None:
+        self._struct.pack_into(buf, offset, *self._values(self.inst.clock() if t is None else t))
+
+    # ---- Odczyt ----
+    def check(self, buf, offset: int = 0) -> float:
+        """Sprawdza naglowek; zwraca czas zapisany w checkpoincie."""
+        magic, version, n_tanks, n_pipes, crc, t = _HEADER_S.unpack_from(buf, offset)
+        if magic != MAGIC:
+            raise CheckpointError("To nie jest checkpoint instalacji")
+        if version != VERSION:
+            raise CheckpointError(f"Nieobslugiwana wersja checkpointu: {version}")
+        if (n_tanks, n_pipes, crc) != (self.n_tanks, self.n_pipes, self.crc):
+            raise CheckpointError("Checkpoint pochodzi z instalacji o innej topologii")
+        return t
+
+    def restore(self, buf, offset: int = 0) -> float:
+        """Przywraca stan (pola ustawiane wprost, bez wpisow w logu). Zwraca czas checkpointu."""
+        t = self.check(buf, offset)
+        vals = self._struct.unpack_from(buf, offset)
+        inst = self.inst
+        i = 6
+        for z in inst.zbiorniki:
+            ilosc, temp, temp_zad, has_ramp, t0, dur, v0, v1, hi, lo, tt = vals[i:i + _TANK_N]
+            i += _TANK_N
+            z.aktualna_ilosc = ilosc
+            z.aktualizuj_poziom()
+            z.temperatura = temp
+            z.temp_zadana = temp_zad
+            inst._ramp_actions[z.nazwa] = RampAction(t0, dur, v0, v1) if has_ramp else None
+            inst._last_alarm_state[z.nazwa] = {"hi": bool(hi), "lo": bool(lo), "temp": bool(tt)}
+        for pol in inst.polaczenia:
+            on, speed, va, vb, flowing, kier = vals[i:i + _PIPE_N]
+            i += _PIPE_N
+            pol.pompa.wlaczona = bool(on)
+            pol.pompa.predkosc = speed
+            pol.zawor_a.otwarty = bool(va)
+            pol.zawor_b.otwarty = bool(vb)
+            pol.rura.ustaw_przeplyw(bool(flowing), kier)
+        harm = inst.harmonogram
+        harm.t, acc = vals[i:i + 2]
+        i += 2
+        if inst.hydraulika is not None:
+            inst.hydraulika._acc = acc
+        for p in harm.podsystemy:
+            p.ostatni, p.nastepny = vals[i:i + 2]
+            i += 2
+        if self.n_loops:
+            self._restore_loops(vals[i:i + _LOOP_N * self.n_loops])
+        return t
+
+    def _restore_loops(self, vals) -> None:
+        import numpy as np
+
+        from .control import POLA
+
+        reg = self.inst.regulacja
+        bank = reg.bank
+        a = np.array(vals, dtype=float).reshape(self.n_loops, _LOOP_N)
+        for k, f in enumerate(POLA):
+            setattr(bank, f, a[:, k].copy())
+        bank.auto = a[:, len(POLA)] != 0
+        bank._pv_ok = a[:, len(POLA) + 1] != 0
+        # moc grzalek = wyjscie petli TC z ostatniego kroku
+        reg.moc = bank.u[reg._tmp_idx].copy()
+
+
+def save(inst: Instalacja, path: str) -> None:
+    with open(path, "wb") as f:
+        f.write(CheckpointCodec(inst).pack())
+
+
+def load(inst: Instalacja, path: str) -> float:
+    with open(path, "rb") as f:
+        return CheckpointCodec(inst).restore(f.read())
+
+
+class CheckpointFile:
+    """Plik wielu checkpointow o stalym rozmiarze rekordu.
+
+    Zapis: append(). Odczyt: przez mmap - len() i t_at(i) czytaja tylko
+    naglowki, restore(i) dekoduje pojedynczy rekord.
+    """
+
+    def __init__(self, inst: Instalacja, path: str, mode: str = "r"):
+        if mode not in ("r", "a", "w"):
+            raise ValueError(f"Nieobslugiwany tryb: {mode!r}")
+        self.codec = CheckpointCodec(inst)
+        self.path = path
+        self.mode = mode
+        self._mm: Optional[mmap.mmap] = None
+        self._buf = bytearray(self.codec.size)
+        if mode == "r":
+            self._f = open(path, "rb")
+            if self._size() % self.codec.size:
+                raise CheckpointError("Uszkodzony plik checkpointow (niepelny rekord)")
+            if self._size():
+                self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._f = open(path, mode + "b")
+
+    def _size(self) -> int:
+        self._f.seek(0, 2)
+        return self._f.tell()
+
+    def __len__(self) -> int:
+        return (len(self._mm) if self._mm is not None else self._size()) // self.codec.size
+
+    def __enter__(self) -> "CheckpointFile":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def append(self, t: Optional[float] = None) -> None:
+        self.codec.pack_into(self._buf, 0, t)
+        self._f.write(self._buf)
+
+    def t_at(self, i: int) -> float:
+        return self.codec.check(self._view(), self._offset(i))
+
+    def restore(self, i: int) -> float:
+        return self.codec.restore(self._view(), self._offset(i))
+
+    def _offset(self, i: int) -> int:
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(i)
+        return i * self.codec.size
+
+    def _view(self) -> Union[mmap.mmap, bytes]:
+        if self._mm is None:
+            raise CheckpointError("Plik checkpointow otwarty do zapisu lub pusty")
+        return self._mm
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._f.close()
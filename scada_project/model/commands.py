@@ -0,0 +1,143 @@
+"""Komendy sterujace instalacja (niezalezne od zrodla: GUI, siec, skrypt).
+
+Jedna komenda = jedna operacja operatora. Dzieki temu ta sama sciezka
+wykonania obsluguje przyciski PyQt, klientow sieciowych i odtwarzanie.
+"""
+
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .simulation import Instalacja
+
+
+# Rodzaje komend (wartosci uzywane tez w kodowaniu binarnym - nie zmieniac)
+NAPELNIJ = 1
+OPROZNIJ = 2
+TEMP_ZADANA = 3
+ZAWOR = 4
+POMPA = 5
+REGULATOR_TRYB = 6
+REGULATOR_ZADANA = 7
+
+RODZAJE = (NAPELNIJ, OPROZNIJ, TEMP_ZADANA, ZAWOR, POMPA, REGULATOR_TRYB, REGULATOR_ZADANA)
+
+# rodzaj, pol_idx (0xFFFF = brak), which (0/1, 255 = brak), wartosc; potem nazwa zbiornika (u8 dlugosc + utf-8)
+_PACKED = struct.Struct("!BHBd")
+
+
+@dataclass(frozen=True)
+class Komenda:
+    """Pojedyncza komenda.
+
+    - NAPELNIJ / OPROZNIJ: zbiornik + wartosc = czas [s],
+    - TEMP_ZADANA: zbiornik + wartosc = temperatura [C],
+    - ZAWOR: pol_idx + which ("a"/"b") + wartosc (1.0 = otwarty),
+    - POMPA: pol_idx + wartosc = predkosc 0.0-1.0,
+    - REGULATOR_TRYB: petla LC rury pol_idx albo TC zbiornika + wartosc
+      (1.0 = auto, 0.0 = reczny),
+    - REGULATOR_ZADANA: petla jak wyzej + wartosc = poziom 0.0-1.0 albo
+      temperatura [C].
+    """
+
+    rodzaj: int
+    zbiornik: str = ""
+    pol_idx: int = -1
+    which: str = ""
+    wartosc: float = 0.0
+
+    @staticmethod
+    def napelnij(nazwa: str, duration_s: float) -> "Komenda":
+        return Komenda(NAPELNIJ, zbiornik=nazwa, wartosc=float(duration_s))
+
+    @staticmethod
+    def oproznij(nazwa: str, duration_s: float) -> "Komenda":
+        return Komenda(OPROZNIJ, zbiornik=nazwa, wartosc=float(duration_s))
+
+    @staticmethod
+    def temp_zadana(nazwa: str, temp: float) -> "Komenda":
+        return Komenda(TEMP_ZADANA, zbiornik=nazwa, wartosc=float(temp))
+
+    @staticmethod
+    def zawor(pol_idx: int, which: str, otwarty: bool) -> "Komenda":
+        return Komenda(ZAWOR, pol_idx=int(pol_idx), which=which, wartosc=1.0 if otwarty else 0.0)
+
+    @staticmethod
+    def pompa(pol_idx: int, predkosc_0_1: float) -> "Komenda":
+        return Komenda(POMPA, pol_idx=int(pol_idx), wartosc=float(predkosc_0_1))
+
+    @staticmethod
+    def regulator_tryb(auto: bool, pol_idx: int = -1, zbiornik: str = "") -> "Komenda":
+        """Petla LC-Pxy rury pol_idx albo TC-Tn zbiornika: auto/reczny."""
+        return Komenda(REGULATOR_TRYB, zbiornik=zbiornik, pol_idx=int(pol_idx), wartosc=1.0 if auto else 0.0)
+
+    @staticmethod
+    def regulator_zadana(sp: float, pol_idx: int = -1, zbiornik: str = "") -> "Komenda":
+        return Komenda(REGULATOR_ZADANA, zbiornik=zbiornik, pol_idx=int(pol_idx), wartosc=float(sp))
+
+    # ---- Kodowanie binarne (siec, nagrania scenariuszy) ----
+    def pack(self) -> bytes:
+        pol_idx = 0xFFFF if self.pol_idx < 0 else self.pol_idx
+        which = {"a": 0, "b": 1}.get(self.which, 255)
+        name = self.zbiornik.encode("utf-8")
+        return _PACKED.pack(self.rodzaj, pol_idx, which, self.wartosc) + bytes((len(name),)) + name
+
+    @staticmethod
+    def unpack_from(buf: bytes, off: int = 0) -> Tuple["Komenda", int]:
+        """Dekoduje komende od pozycji off. Zwraca (komenda, pozycja za komenda)."""
+        rodzaj, pol_idx, which, wartosc = _PACKED.unpack_from(buf, off)
+        off += _PACKED.size
+        n = buf[off]
+        name = bytes(buf[off + 1:off + 1 + n]).decode("utf-8")
+        k = Komenda(
+            rodzaj,
+            zbiornik=name,
+            pol_idx=-1 if pol_idx == 0xFFFF else pol_idx,
+            which={0: "a", 1: "b"}.get(which, ""),
+            wartosc=wartosc,
+        )
+        return k, off + 1 + n
+
+
+def wykonaj(instalacja: "Instalacja", k: Komenda) -> Optional[str]:
+    """Wykonuje komende na instalacji. Zwraca komunikat bledu (jak ustaw_pompe_predkosc)."""
+    if k.rodzaj == NAPELNIJ:
+        instalacja.napelnij(k.zbiornik, k.wartosc)
+    elif k.rodzaj == OPROZNIJ:
+        instalacja.oproznij(k.zbiornik, k.wartosc)
+    elif k.rodzaj == TEMP_ZADANA:
+        instalacja.ustaw_temp_zadana(k.zbiornik, k.wartosc)
+    elif k.rodzaj in (ZAWOR, POMPA) and not 0 <= k.pol_idx < len(instalacja.polaczenia):
+        raise IndexError(f"Nieznana rura: {k.pol_idx}")
+    elif k.rodzaj == ZAWOR:
+        if k.which not in ("a", "b"):
+            raise ValueError(f"Nieznany zawor: {k.which!r}")
+        instalacja.ustaw_zawor(k.pol_idx, k.which, k.wartosc >= 0.5)
+    elif k.rodzaj == POMPA:
+        return instalacja.ustaw_pompe_predkosc(k.pol_idx, k.wartosc)
+    elif k.rodzaj == REGULATOR_TRYB:
+        instalacja.regulator_tryb(_petla(instalacja, k), k.wartosc >= 0.5)
+    elif k.rodzaj == REGULATOR_ZADANA:
+        instalacja.regulator_zadana(_petla(instalacja, k), k.wartosc)
+    else:
+        raise ValueError(f"Nieznany rodzaj komendy: {k.rodzaj}")
+    return None
+
+
+def _petla(instalacja: "Instalacja", k: Komenda) -> str:
+    """Nazwa petli komendy regulatora: LC rury pol_idx albo TC zbiornika."""
+    r = instalacja.regulacja
+    if r is None:
+        raise ValueError("Regulacja wylaczona")
+    if k.pol_idx >= 0:
+        if k.pol_idx >= len(instalacja.polaczenia):
+            raise IndexError(f"Nieznana rura: {k.pol_idx}")
+        p = r.petla_pompy(instalacja.polaczenia[k.pol_idx])
+    else:
+        p = r.petla_temp(k.zbiornik)
+    if p is None:
+        raise KeyError(f"Brak petli regulacji: {k.zbiornik or k.pol_idx}")
+    return p.nazwa
@@ -0,0 +1,294 @@
+"""Regulacja: bank regulatorow PID liczony jednym krokiem wektorowym.
+
+Parametry (Kp, Ki, Kd, waga b wartosci zadanej, stala filtru pochodnej),
+wartosci zadane, stan calki, ograniczenia wyjscia i tryb (auto/reczny)
+wszystkich petli sa tablicami numpy - krok banku to kilkanascie operacji
+na tablicach niezaleznie od liczby petli. Postac ISA:
+
+    v = Kp * (b * sp - pv) + I - Kd * dpv_f,   u = clip(v, lo, hi)
+
+- pochodna z pomiaru (bez uderzenia przy zmianie sp), filtr 1. rzedu Tf,
+- anti-windup przez sledzenie (back-calculation): I += dt * (Ki * e + Kt * (u - v)),
+- tryb reczny: u = wyjscie reczne, a calka sledzi I = u - P - D, wiec
+  przejscie na auto nie zmienia wyjscia (bezuderzeniowe); przejscie na
+  reczny przejmuje ostatnie wyjscie.
+
+Regulacja wiaze bank z instalacja (Instalacja.wlacz_regulacje()) jako
+podsystem "regulacja" o wlasnym okresie:
+- LC-Pxy: poziom zbiornika docelowego rury -> predkosc jej pompy
+  (zamkniety zawor = gorne ograniczenie 0, calka nie nabiega; pusty
+  zbiornik zrodlowy - pompa nie jest wlaczana),
+- TC-Tn: temperatura zbiornika -> moc grzalki 0..1. Zbiornik z petla TC
+  grzeje sie modelem grzalki (dT/dt = GRZALKA_C_S * moc - STRATY_1_S * (T - T_OTOCZENIA))
+  zamiast zbiegania do temp_zadana w etapie "grzanie".
+
+Wymaga numpy (jak solwer hydrauliczny) - importowany leniwie przez Instalacja.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .entities import PolaczenieRury, Zbiornik
+    from .simulation import Instalacja
+
+# Model grzalki: przy mocy 1 i 80 C grzeje ~0.9 C/s, bez grzania stygnie ~0.3 C/s
+GRZALKA_C_S = 1.2
+STRATY_1_S = 0.005
+T_OTOCZENIA = 20.0
+
+# Spoczynek petli TC (Instalacja.czy_spoczynek): strefa wokol zadanej i szybkosc zmian
+SPOCZYNEK_STREFA_C = 0.1
+SPOCZYNEK_C_S = 0.01
+
+# Histereza wlaczenia pompy przez regulator poziomu (bez "terkotania" logu)
+POMPA_WL = 0.02
+POMPA_WYL = 0.005
+
+# Nastawy domyslne: poziom (0..1) -> predkosc, temperatura [C] -> moc
+NASTAWY_POZIOM = dict(kp=8.0, ki=0.05, kd=0.0)
+NASTAWY_TEMP = dict(kp=0.4, ki=0.01, kd=0.0)
+
+# tablice banku (kolejnosc bez znaczenia; wszystkie maja dlugosc n)
+POLA = ("kp", "ki", "kd", "b", "tf", "kt", "sp", "lo", "hi", "i", "d", "pv", "u", "reczne")
+
+
+class RegulatorBank:
+    """Stan i parametry n regulatorow PID w tablicach; step() liczy wszystkie naraz."""
+
+    def __init__(self):
+        self.n = 0
+        for pole in POLA:
+            setattr(self, pole, np.zeros(0))
+        self.auto = np.zeros(0, dtype=bool)
+        # pv z poprzedniego kroku jest znane (pochodna)
+        self._pv_ok = np.zeros(0, dtype=bool)
+
+    def dodaj(
+        self,
+        kp: float,
+        ki: float,
+        kd: float = 0.0,
+        sp: float = 0.0,
+        lo: float = 0.0,
+        hi: float = 1.0,
+        b: float = 1.0,
+        tf: float = 0.0,
+        kt: Optional[float] = None,
+        wyjscie: float = 0.0,
+        auto: bool = False,
+    ) -> int:
+        """Dodaje petle i zwraca jej indeks. kt domyslnie Ki/Kp (=1/Ti)."""
+        if kt is None:
+            kt = ki / kp if kp > 0 else 0.0
+        wart = dict(kp=kp, ki=ki, kd=kd, b=b, tf=tf, kt=kt, sp=sp, lo=lo, hi=hi,
+                    i=wyjscie, d=0.0, pv=0.0, u=wyjscie, reczne=wyjscie)
+        for pole in POLA:
+            setattr(self, pole, np.append(getattr(self, pole), float(wart[pole])))
+        self.auto = np.append(self.auto, bool(auto))
+        self._pv_ok = np.append(self._pv_ok, False)
+        self.n += 1
+        return self.n - 1
+
+    def ustaw_auto(self, idx, auto: bool) -> None:
+        """Przelaczenie trybu bez skoku wyjscia (idx: indeks albo tablica indeksow)."""
+        if not auto:
+            self.reczne[idx] = self.u[idx]
+        self.auto[idx] = auto
+
+    def step(self, pv: np.ndarray, dt: float, hi: Optional[np.ndarray] = None) -> np.ndarray:
+        """Jeden krok wszystkich petli; hi - dodatkowe gorne ograniczenie na ten krok."""
+        pv = np.asarray(pv, dtype=float)
+        if dt <= 0:
+            return self.u
+        hi = self.hi if hi is None else np.minimum(self.hi, hi)
+        lo = np.minimum(self.lo, hi)
+
+        # pochodna z pomiaru (przy pierwszym kroku petli - zero), filtr 1. rzedu
+        dpv = np.where(self._pv_ok, (pv - self.pv) / dt, 0.0)
+        self.d += dt / (self.tf + dt) * (dpv - self.d)
+
+        p = self.kp * (self.b * self.sp - pv)
+        dd = self.kd * self.d
+        v = p + self.i - dd
+        u = np.where(self.auto, v, self.reczne)
+        np.clip(u, lo, hi, out=u)
+
+        # auto: calkowanie + sledzenie nasycenia; reczny: calka sledzi wyjscie
+        i_auto = self.i + dt * (self.ki * (self.sp - pv) + self.kt * (u - v))
+        self.i = np.where(self.auto, i_auto, u - p + dd)
+
+        self.pv = pv
+        self._pv_ok[:] = True
+        self.u = u
+        return u
+
+
+@dataclass
+class Petla:
+    """Petla instalacji: nazwa (LC-P12, TC-T1), indeks w banku i obiekt."""
+
+    nazwa: str
+    rodzaj: str  # "poziom" | "temp"
+    idx: int
+    pol: Optional["PolaczenieRury"] = None
+    zbiornik: Optional["Zbiornik"] = None
+
+
+class Regulacja:
+    """Petle poziomu (przez pompy) i temperatury (przez grzalki) instalacji."""
+
+    def __init__(self, inst: "Instalacja", poziom: bool = True, temperatura: bool = True):
+        self.inst = inst
+        self.bank = RegulatorBank()
+        self.petle: Dict[str, Petla] = {}
+        self._lvl: List[Petla] = []
+        self._tmp: List[Petla] = []
+        self._lvl_idx = np.zeros(0, dtype=np.intp)
+        self._tmp_idx = np.zeros(0, dtype=np.intp)
+        # moc grzalek petli TC (kolejnosc jak _tmp)
+        self.moc = np.zeros(0)
+        if poziom:
+            for pol in inst.polaczenia:
+                self.dodaj_petle_poziomu(pol)
+        if temperatura:
+            for z in inst.zbiorniki:
+                self._dodaj_petle_temp(z)
+
+    # ---- Budowa ----
+    def dodaj_petle_poziomu(self, pol: "PolaczenieRury") -> Petla:
+        """LC-Pxy: recznie, z wyjsciem rownym biezacej predkosci pompy."""
+        pompa = pol.pompa
+        u0 = pompa.predkosc if pompa.wlaczona else 0.0
+        idx = self.bank.dodaj(sp=pol.zbiornik_b.poziom, wyjscie=u0, **NASTAWY_POZIOM)
+        p = Petla(f"LC-{pompa.identyfikator}", "poziom", idx, pol=pol)
+        self.petle[p.nazwa] = p
+        self._lvl.append(p)
+        self._lvl_idx = np.append(self._lvl_idx, idx)
+        return p
+
+    def _dodaj_petle_temp(self, z: "Zbiornik") -> Petla:
+        """TC-Tn: od razu w auto z wartoscia zadana temp_zadana zbiornika."""
+        idx = self.bank.dodaj(sp=z.temp_zadana, auto=True, **NASTAWY_TEMP)
+        p = Petla(f"TC-{z.nazwa}", "temp", idx, zbiornik=z)
+        self.petle[p.nazwa] = p
+        self._tmp.append(p)
+        self._tmp_idx = np.append(self._tmp_idx, idx)
+        self.moc = np.append(self.moc, 0.0)
+        return p
+
+    def petla_temp(self, nazwa_zbiornika: str) -> Optional[Petla]:
+        return self.petle.get(f"TC-{nazwa_zbiornika}")
+
+    def petla_pompy(self, pol: "PolaczenieRury") -> Optional[Petla]:
+        return self.petle.get(f"LC-{pol.pompa.identyfikator}")
+
+    # ---- Operator ----
+    def auto(self, nazwa: str, sp: Optional[float] = None) -> None:
+        """Przelacza petle na auto (bezuderzeniowo); sp: poziom 0..1 albo temperatura [C]."""
+        p = self.petle[nazwa]
+        if sp is not None:
+            self.ustaw_zadana(nazwa, sp, log=False)
+        if not self.bank.auto[p.idx]:
+            self.bank.ustaw_auto(p.idx, True)
+            self.inst._log(f"Regulator {nazwa}: auto (zadana {self._fmt_sp(p)})")
+
+    def reczny(self, nazwa: str, wyjscie: Optional[float] = None, powod: str = "") -> None:
+        """Przelacza petle na reczny; wyjscie - nowe wyjscie reczne (domyslnie ostatnie)."""
+        p = self.petle[nazwa]
+        was_auto = bool(self.bank.auto[p.idx])
+        self.bank.ustaw_auto(p.idx, False)
+        if wyjscie is not None:
+            self.bank.reczne[p.idx] = float(wyjscie)
+        if was_auto:
+            self.inst._log(f"Regulator {nazwa}: reczny{powod}")
+
+    def ustaw_zadana(self, nazwa: str, sp: float, log: bool = True) -> None:
+        p = self.petle[nazwa]
+        self.bank.sp[p.idx] = float(sp)
+        if log:
+            self.inst._log(f"Regulator {nazwa}: zadana {self._fmt_sp(p)}")
+
+    def ustaw_nastawy(self, nazwa: str, **nastawy: float) -> None:
+        """Zmiana kp/ki/kd/b/tf/kt/lo/hi petli w biegu."""
+        p = self.petle[nazwa]
+        for k, v in nastawy.items():
+            if k not in ("kp", "ki", "kd", "b", "tf", "kt", "lo", "hi"):
+                raise KeyError(k)
+            getattr(self.bank, k)[p.idx] = float(v)
+
+    def _fmt_sp(self, p: Petla) -> str:
+        sp = float(self.bank.sp[p.idx])
+        return f"{sp * 100.0:.1f}%" if p.rodzaj == "poziom" else f"{sp:.1f}C"
+
+    def aktywna(self) -> bool:
+        """Czy regulacja moze zmienic stan: petla poziomu w auto albo nieustalona petla TC.
+
+        Petla TC jest ustalona, gdy temperatura prawie sie nie zmienia
+        (|dT/dt| <= SPOCZYNEK_C_S) i - w auto - lezy w strefie SPOCZYNEK_STREFA_C
+        wokol zadanej (model grzalki dochodzi do niej tylko asymptotycznie).
+        """
+        if self.bank.auto[self._lvl_idx].any():
+            return True
+        if not self._tmp:
+            return False
+        t = np.fromiter((p.zbiornik.temperatura for p in self._tmp), float, len(self._tmp))
+        idx = self._tmp_idx
+        dtdt = GRZALKA_C_S * self.moc - STRATY_1_S * (t - T_OTOCZENIA)
+        poza = self.bank.auto[idx] & (np.abs(t - self.bank.sp[idx]) > SPOCZYNEK_STREFA_C)
+        return bool(poza.any() or (np.abs(dtdt) > SPOCZYNEK_C_S).any())
+
+    # ---- Krok (podsystem "regulacja") ----
+    def krok(self, dt_s: float, now: float) -> None:
+        bank = self.bank
+        lvl, tmp = self._lvl, self._tmp
+        pv = np.empty(bank.n)
+        hi = np.ones(bank.n)
+        li = self._lvl_idx
+        if lvl:
+            pv[li] = np.fromiter((p.pol.zbiornik_b.poziom for p in lvl), float, len(lvl))
+            # pompa za zamknietym zaworem nie ruszy - wyjscie 0 bez nabiegania calki
+            hi[li] = np.fromiter((p.pol.zawory_otwarte() for p in lvl), float, len(lvl))
+            # petle reczne sledza predkosc ustawiona przez operatora
+            man = np.fromiter((p.pol.pompa.predkosc if p.pol.pompa.wlaczona else 0.0 for p in lvl), float, len(lvl))
+            bank.reczne[li] = np.where(bank.auto[li], bank.reczne[li], man)
+        if tmp:
+            pv[self._tmp_idx] = np.fromiter((p.zbiornik.temperatura for p in tmp), float, len(tmp))
+
+        u = bank.step(pv, dt_s, hi)
+
+        if tmp:
+            self.moc = u[self._tmp_idx]
+        if lvl:
+            auto = bank.auto[li]
+            if auto.any():
+                for p, x in zip((p for p, a in zip(lvl, auto) if a), u[li][auto].tolist()):
+                    self._ustaw_pompe(p.pol, x)
+
+    @staticmethod
+    def _ustaw_pompe(pol: "PolaczenieRury", x: float) -> None:
+        pompa = pol.pompa
+        if pompa.wlaczona:
+            if x < POMPA_WYL:
+                pompa.ustaw_wlaczenie(False)
+                x = 0.0
+        elif x > POMPA_WL and pol.zawory_otwarte() and not pol.zbiornik_a.czy_pusty():
+            pompa.ustaw_wlaczenie(True)
+        else:
+            x = 0.0
+        # bez ustaw_predkosc(): zmiana co krok regulatora nie trafia do logu
+        pompa.predkosc = x
+
+    # ---- Model grzalek (wolany z etapu "grzanie") ----
+    def grzej(self, dt_s: float) -> None:
+        tmp = self._tmp
+        if not tmp:
+            return
+        t = np.fromiter((p.zbiornik.temperatura for p in tmp), float, len(tmp))
+        t += dt_s * (GRZALKA_C_S * self.moc - STRATY_1_S * (t - T_OTOCZENIA))
+        for p, x in zip(tmp, t.tolist()):
+            p.zbiornik.temperatura = x
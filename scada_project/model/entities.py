@@ -33,6 +33,7 @@ class Pompa:
     predkosc: float = 0.0  # 0.0-1.0
     wlaczona: bool = False
     on_change: Optional[Callable[[str], None]] = None
+    wysokosc_podnoszenia_m: float = 4.0  # przy predkosc=1 (solwer hydrauliczny)
 
     def ustaw_predkosc(self, predkosc: float) -> None:
         predkosc = max(0.0, min(1.0, float(predkosc)))
@@ -82,9 +83,16 @@ class Zbiornik:
         self.temperatura = 20.0
         self.temp_zadana = 20.0
 
-    def dodaj_ciecz(self, ilosc: float) -> float:
+        # geometria dla solwera hydraulicznego: wysokosc plaszcza i rzedna dna [m]
+        self.wysokosc_m = 2.0
+        self.rzedna_m = 0.0
+
+    def dodaj_ciecz(self, ilosc: float, temp: Optional[float] = None) -> float:
+        """Dolewa ciecz; z temp - temperatura mieszaniny wazona objetoscia."""
         wolne = self.pojemnosc - self.aktualna_ilosc
         dodano = min(float(ilosc), wolne)
+        if temp is not None and dodano > 0:
+            self.temperatura = (self.aktualna_ilosc * self.temperatura + dodano * temp) / (self.aktualna_ilosc + dodano)
         self.aktualna_ilosc += dodano
         self.aktualizuj_poziom()
         return dodano
@@ -122,6 +130,8 @@ class PolaczenieRury:
     pompa: Pompa
     zawor_a: Zawor
     zawor_b: Zawor
+    # przewodnosc hydrauliczna [jednostek/s na 1 m roznicy wysokosci] (solwer hydrauliczny)
+    przewodnosc: float = 5.0
 
     def zawory_otwarte(self) -> bool:
         return self.zawor_a.otwarty and self.zawor_b.otwarty
@@ -0,0 +1,70 @@
+"""Dziennik zdarzen na dysku (komunikaty EventBus: zmiany zaworow, pomp, alarmy).
+
+Jeden plik tekstowy na dzien UTC (RRRR-MM-DD.events), wiersz na zdarzenie:
+    czas [s epoki] TAB komunikat
+Znaki nowej linii i tabulacji w komunikacie sa zamieniane na spacje.
+Odczyt (iter_events) idzie wiersz po wierszu - pamiec nie zalezy od
+dlugosci przedzialu.
+"""
+
+from __future__ import annotations
+
+import datetime
+import os
+import threading
+from typing import IO, Iterator, Optional, Tuple
+
+SUFFIX = ".events"
+
+
+def _day(t: float) -> str:
+    return datetime.datetime.fromtimestamp(t, datetime.timezone.utc).strftime("%Y-%m-%d")
+
+
+class EventLog:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._f: Optional[IO[str]] = None
+        self._f_day = ""
+
+    def append(self, t: float, message: str) -> None:
+        """Dopisuje zdarzenie (wolane z dowolnego watku)."""
+        line = f"{t:.3f}\t{message.replace(chr(10), ' ').replace(chr(9), ' ')}\n"
+        day = _day(t)
+        with self._lock:
+            if self._f is None or day != self._f_day:
+                if self._f is not None:
+                    self._f.close()
+                self._f = open(os.path.join(self.path, day + SUFFIX), "a", encoding="utf-8")
+                self._f_day = day
+            self._f.write(line)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._f is not None:
+                self._f.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+
+    def iter_events(self, t0: float, t1: float) -> Iterator[Tuple[float, str]]:
+        """Zdarzenia z [t0, t1] w kolejnosci zapisu."""
+        self.flush()
+        first, last = _day(t0), _day(t1)
+        for name in sorted(os.listdir(self.path)):
+            if not name.endswith(SUFFIX) or not first <= name[: -len(SUFFIX)] <= last:
+                continue
+            with open(os.path.join(self.path, name), encoding="utf-8") as f:
+                for line in f:
+                    ts, _, msg = line.rstrip("\n").partition("\t")
+                    try:
+                        t = float(ts)
+                    except ValueError:
+                        continue  # uciety wiersz
+                    if t0 <= t <= t1:
+                        yield t, msg
@@ -0,0 +1,281 @@
+"""Eksport historii i zdarzen do CSV, JSONL i NumPy .npy (strumieniowo).
+
+Potok z generatorow: zrodlo (porcje archiwum albo wiersze dziennika
+zdarzen) -> bloki po chunk_rows wierszy -> zapis. W pamieci jest najwyzej
+jedna porcja archiwum i jeden blok, niezaleznie od zakresu czasu.
+
+Filtry: przedzial czasu, obiekty (np. T1, P12, T1-T2 - serie o tym
+prefiksie i zdarzenia, w ktorych obiekt wystepuje) i wzorce nazw serii
+(fnmatch, np. "*.poziom"). Kompresja gz/bz2/xz. Plik .npy jest tablica
+strukturalna (pola t i serie, float64); liczba wierszy w naglowku jest
+uzupelniana po zapisie (z kompresja - przez plik tymczasowy).
+
+export() sprawdza `cancel` miedzy blokami i raportuje postep (wiersze),
+wiec moze dzialac w watku tla GUI.
+"""
+
+from __future__ import annotations
+
+import bz2
+import csv
+import fnmatch
+import gzip
+import json
+import lzma
+import math
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+from array import array
+from dataclasses import dataclass
+from typing import IO, Callable, Iterator, List, Optional, Sequence, Tuple
+
+from .archive import Archive
+from .eventlog import EventLog
+
+FORMATS = ("csv", "jsonl", "npy")
+SOURCES = ("history", "events")
+_OPENERS = {"gz": gzip.open, "bz2": bz2.open, "xz": lzma.open}
+
+# naglowek .npy o stalej dlugosci (liczba wierszy dopisywana na koncu)
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+_NPY_SHAPE_WIDTH = 20
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    source: str  # "history" | "events"
+    fmt: str  # "csv" | "jsonl" | "npy"
+    t0: float
+    t1: float
+    entities: Tuple[str, ...] = ()  # puste - wszystkie
+    series: Tuple[str, ...] = ()  # wzorce fnmatch; puste - wszystkie
+    compression: Optional[str] = None  # "gz" | "bz2" | "xz"
+    chunk_rows: int = 4096
+
+    def validate(self) -> None:
+        if self.source not in SOURCES:
+            raise ValueError(f"Nieznane zrodlo eksportu: {self.source}")
+        if self.fmt not in FORMATS:
+            raise ValueError(f"Nieznany format eksportu: {self.fmt}")
+        if self.fmt == "npy" and self.source != "history":
+            raise ValueError("Format .npy tylko dla historii (wartosci liczbowe)")
+        if self.compression is not None and self.compression not in _OPENERS:
+            raise ValueError(f"Nieznana kompresja: {self.compression}")
+        if self.t1 < self.t0:
+            raise ValueError("Koniec przedzialu przed poczatkiem")
+
+
+# ---- Zrodla ----
+def select_series(names: Sequence[str], entities: Sequence[str] = (), patterns: Sequence[str] = ()) -> List[str]:
+    """Serie obiektow `entities` (prefiks przed kropka) pasujace do `patterns`."""
+    out = []
+    for n in names:
+        if entities and n.split(".", 1)[0] not in entities:
+            continue
+        if patterns and not any(fnmatch.fnmatchcase(n, p) for p in patterns):
+            continue
+        out.append(n)
+    return out
+
+
+HistoryBlock = Tuple[array, List[array]]
+
+
+def history_blocks(
+    archive: Archive, names: Sequence[str], t0: float, t1: float, chunk_rows: int = 4096, include_open: bool = True
+) -> Iterator[HistoryBlock]:
+    """Bloki (czasy, [kolumny w kolejnosci names]) po najwyzej chunk_rows wierszy."""
+    for ts, cols in archive.iter_chunks(names, t0, t1, include_open=include_open):
+        n = len(ts)
+        nan_col = None
+        columns = []
+        for name in names:
+            c = cols.get(name)
+            if c is None:
+                # seria nieobecna w tej porcji (zmiana zestawu serii)
+                nan_col = nan_col or array("d", [math.nan]) * n
+                c = nan_col
+            columns.append(c)
+        for i in range(0, n, chunk_rows):
+            yield ts[i:i + chunk_rows], [c[i:i + chunk_rows] for c in columns]
+
+
+def event_blocks(
+    log: EventLog, t0: float, t1: float, entities: Sequence[str] = (), chunk_rows: int = 4096
+) -> Iterator[List[Tuple[float, str]]]:
+    """Bloki zdarzen [(czas, komunikat)]; filtr: obiekt jako osobne slowo komunikatu."""
+    rx = None
+    if entities:
+        rx = re.compile(r"(?<![\w-])(?:" + "|".join(re.escape(e) for e in entities) + r")(?![\w-])")
+    block: List[Tuple[float, str]] = []
+    for t, msg in log.iter_events(t0, t1):
+        if rx is not None and rx.search(msg) is None:
+            continue
+        block.append((t, msg))
+        if len(block) >= chunk_rows:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+# ---- Zapis ----
+def _open_text(path: str, compression: Optional[str]) -> IO[str]:
+    if compression:
+        return _OPENERS[compression](path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def _num(v: float):
+    # NaN/inf nie sa poprawnym JSON
+    return v if math.isfinite(v) else None
+
+
+def _write_history_csv(f: IO[str], names: Sequence[str], blocks: Iterator[HistoryBlock], tick) -> None:
+    w = csv.writer(f)
+    w.writerow(["t", *names])
+    for ts, cols in blocks:
+        w.writerows(zip(ts, *cols))
+        tick(len(ts))
+
+
+def _write_history_jsonl(f: IO[str], names: Sequence[str], blocks: Iterator[HistoryBlock], tick) -> None:
+    keys = ["t", *names]
+    for ts, cols in blocks:
+        f.writelines(
+            json.dumps(dict(zip(keys, (_num(v) for v in row))), separators=(",", ":")) + "\n"
+            for row in zip(ts, *cols)
+        )
+        tick(len(ts))
+
+
+def _npy_header(names: Sequence[str], rows: int) -> bytes:
+    descr = [("t", "<f8")] + [(n, "<f8") for n in names]
+    shape = str(rows).rjust(_NPY_SHAPE_WIDTH)
+    head = f"{{'descr': {descr!r}, 'fortran_order': False, 'shape': ({shape},), }}"
+    # wyrownanie do 64 bajtow (magic + dlugosc + naglowek + \n)
+    pad = -(len(_NPY_MAGIC) + 2 + len(head) + 1) % 64
+    head = head + " " * pad + "\n"
+    return _NPY_MAGIC + len(head).to_bytes(2, "little") + head.encode("latin1")
+
+
+def _write_history_npy(f: IO[bytes], names: Sequence[str], blocks: Iterator[HistoryBlock], tick) -> int:
+    """Zapis pol przeplatanych wiersz po wierszu; zwraca liczbe wierszy."""
+    f.write(_npy_header(names, 0))
+    k = len(names) + 1
+    rows = 0
+    for ts, cols in blocks:
+        n = len(ts)
+        buf = array("d", bytes(8 * n * k))
+        buf[0::k] = ts
+        for j, c in enumerate(cols, start=1):
+            buf[j::k] = c if c.typecode == "d" else array("d", c)
+        if sys.byteorder != "little":
+            buf.byteswap()
+        f.write(buf.tobytes())
+        rows += n
+        tick(n)
+    return rows
+
+
+def _write_events_csv(f: IO[str], blocks, tick) -> None:
+    w = csv.writer(f)
+    w.writerow(["t", "message"])
+    for block in blocks:
+        w.writerows(block)
+        tick(len(block))
+
+
+def _write_events_jsonl(f: IO[str], blocks, tick) -> None:
+    for block in blocks:
+        f.writelines(json.dumps({"t": t, "message": m}, ensure_ascii=False) + "\n" for t, m in block)
+        tick(len(block))
+
+
+def export(
+    spec: ExportSpec,
+    out_path: str,
+    archive: Optional[Archive] = None,
+    event_log: Optional[EventLog] = None,
+    progress: Optional[Callable[[int], None]] = None,
+    cancel: Optional[threading.Event] = None,
+    include_open: bool = True,
+) -> int:
+    """Eksportuje wg spec do out_path. Zwraca liczbe wierszy.
+
+    Przerwanie (cancel) usuwa czesciowy plik i konczy sie ExportCancelled.
+    include_open=False - eksport z innego watku niz zapis archiwum
+    (przedtem Archive.seal()).
+    """
+    spec.validate()
+    done = 0
+
+    def tick(n: int) -> None:
+        nonlocal done
+        done += n
+        if progress is not None:
+            progress(done)
+        if cancel is not None and cancel.is_set():
+            raise ExportCancelled()
+
+    try:
+        if spec.source == "history":
+            if archive is None:
+                raise ValueError("Brak archiwum historii")
+            names = select_series(archive.series(), spec.entities, spec.series)
+            blocks = history_blocks(archive, names, spec.t0, spec.t1, spec.chunk_rows, include_open)
+            if spec.fmt == "npy":
+                _export_npy(out_path, spec.compression, names, blocks, tick)
+            else:
+                with _open_text(out_path, spec.compression) as f:
+                    (_write_history_csv if spec.fmt == "csv" else _write_history_jsonl)(f, names, blocks, tick)
+        else:
+            if event_log is None:
+                raise ValueError("Brak dziennika zdarzen")
+            blocks = event_blocks(event_log, spec.t0, spec.t1, spec.entities, spec.chunk_rows)
+            with _open_text(out_path, spec.compression) as f:
+                (_write_events_csv if spec.fmt == "csv" else _write_events_jsonl)(f, blocks, tick)
+    except BaseException:
+        if os.path.exists(out_path):
+            os.remove(out_path)
+        raise
+    return done
+
+
+def _export_npy(out_path: str, compression: Optional[str], names, blocks, tick) -> None:
+    if compression is None:
+        with open(out_path, "wb") as f:
+            rows = _write_history_npy(f, names, blocks, tick)
+            f.seek(0)
+            f.write(_npy_header(names, rows))
+        return
+    # naglowek wymaga liczby wierszy: najpierw plik tymczasowy, potem kompresja strumieniowa
+    fd, tmp = tempfile.mkstemp(suffix=".npy", dir=os.path.dirname(os.path.abspath(out_path)))
+    try:
+        with os.fdopen(fd, "w+b") as f:
+            rows = _write_history_npy(f, names, blocks, tick)
+            f.seek(0)
+            f.write(_npy_header(names, rows))
+            f.seek(0)
+            with _OPENERS[compression](out_path, "wb") as out:
+                shutil.copyfileobj(f, out, 1 << 20)
+    finally:
+        os.remove(tmp)
+
+
+def guess_format(path: str) -> Tuple[str, Optional[str]]:
+    """(format, kompresja) z rozszerzenia, np. dane.csv.gz -> ("csv", "gz")."""
+    base, ext = os.path.splitext(path)
+    comp = ext[1:] if ext[1:] in _OPENERS else None
+    if comp:
+        base, ext = os.path.splitext(base)
+    fmt = ext[1:].lower()
+    return (fmt if fmt in FORMATS else "csv"), comp
@@ -0,0 +1,293 @@
+"""Flota instalacji: N niezaleznych kopii linii zbiornikow w procesach roboczych.
+
+Instalacje sa dzielone na shardy (instalacja i -> proces i % workers, albo
+wlasny przydzial). Kazdy proces tyka swoje instalacje niezaleznie, kazda
+z wlasnym dt (opozniona instalacja dostaje dluzszy krok zamiast spowalniac
+symulacje). Instalacje w roznych procesach nie wplywaja na siebie, wiec
+ciezka instalacje mozna odizolowac we wlasnym shardzie.
+
+Podsumowania (poziomy, temperatury, aktywne alarmy, pracujace pompy, czas
+ticku) trafiaja do wspolnej pamieci - jeden rekord o stalym rozmiarze na
+instalacje, zapisywany pod licznikiem sekwencji (seqlock): czytelnik nie
+blokuje procesu roboczego, a rozdarty odczyt jest powtarzany.
+
+Komendy operatora ida do procesu przez kolejke (Komenda.pack). Pelny stan
+pojedynczej instalacji (podglad szczegolowy) jest dostarczany na zadanie
+jako checkpoint (model.checkpoint).
+
+Przyklad:
+    with FleetSupervisor(64, workers=4) as fleet:
+        fleet.command(7, Komenda.pompa(0, 0.5))
+        for s in fleet.summaries():
+            print(s.plant, s.levels, s.alarms_active)
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import queue
+import struct
+import time
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .checkpoint import CheckpointCodec
+from .commands import Komenda, wykonaj
+from .simulation import Instalacja, ZegarReczny
+
+# seq, czas symulacji, czas ticku [ms] (srednia kroczaca), liczba tickow,
+# aktywne alarmy, pracujace pompy
+_HEAD = "<QdfIII"
+
+CMD = 1
+CHECKPOINT = 2
+STOP = 3
+
+
+@dataclass(frozen=True)
+class PlantSummary:
+    plant: int
+    t: float
+    tick_ms: float
+    ticks: int
+    alarms_active: int
+    pumps_running: int
+    levels: Tuple[float, ...]  # [%]
+    temps: Tuple[float, ...]   # [C]
+    alarms: Tuple[int, ...]    # bity na zbiornik: 1 hi, 2 lo, 4 temp
+
+
+class _SummaryLayout:
+    def __init__(self, n_tanks: int):
+        self.n_tanks = n_tanks
+        self.struct = struct.Struct(f"{_HEAD}{n_tanks}f{n_tanks}f{n_tanks}B")
+        self.slot = (self.struct.size + 7) // 8 * 8
+        self._seq = struct.Struct("<Q")
+
+    def write(self, buf, pid: int, seq: int, inst: Instalacja, ticks: int, tick_ms: float) -> int:
+        """Zapis rekordu pod seqlockiem. Zwraca nowa (parzysta) wartosc seq."""
+        off = pid * self.slot
+        self._seq.pack_into(buf, off, seq + 1)  # nieparzyste = zapis w toku
+        levels = [z.poziom * 100.0 for z in inst.zbiorniki]
+        temps = [z.temperatura for z in inst.zbiorniki]
+        alarms = []
+        for z in inst.zbiorniki:
+            st = inst._last_alarm_state[z.nazwa]
+            alarms.append(st["hi"] | (st["lo"] << 1) | (st["temp"] << 2))
+        active = sum(bin(a).count("1") for a in alarms)
+        pumps = sum(1 for p in inst.polaczenia if p.pompa.wlaczona)
+        self.struct.pack_into(
+            buf, off, seq + 1, inst.harmonogram.t, tick_ms, ticks, active, pumps, *levels, *temps, *alarms
+        )
+        self._seq.pack_into(buf, off, seq + 2)
+        return seq + 2
+
+    def read(self, buf, pid: int, retries: int = 100) -> Optional[PlantSummary]:
+        off = pid * self.slot
+        n = self.n_tanks
+        for _ in range(retries):
+            vals = self.struct.unpack_from(buf, off)
+            seq = vals[0]
+            if seq & 1 or self._seq.unpack_from(buf, off)[0] != seq:
+                continue
+            if seq == 0:
+                return None  # jeszcze bez pierwszego ticku
+            _, t, tick_ms, ticks, active, pumps = vals[:6]
+            rest = vals[6:]
+            return PlantSummary(pid, t, tick_ms, ticks, active, pumps, rest[:n], rest[n:2 * n], rest[2 * n:])
+        return None
+
+
+def _worker(
+    shm_name: str,
+    plants: Sequence[int],
+    n_tanks: int,
+    tick_s: float,
+    hydraulika: bool,
+    max_speed: bool,
+    cmd_q,
+    out_q,
+    regulacja: bool = False,
+) -> None:
+    shm = SharedMemory(shm_name)
+    try:
+        _worker_loop(shm.buf, plants, n_tanks, tick_s, hydraulika, max_speed, cmd_q, out_q, regulacja)
+    finally:
+        shm.close()
+
+
+def _worker_loop(buf, plants, n_tanks, tick_s, hydraulika, max_speed, cmd_q, out_q, regulacja=False) -> None:
+    layout = _SummaryLayout(n_tanks)
+    clocks: Dict[int, ZegarReczny] = {}
+    insts: Dict[int, Instalacja] = {}
+    for pid in plants:
+        if max_speed:
+            # czas symulowany: zegar przesuwany o staly krok
+            clocks[pid] = ZegarReczny(time.time())
+            insts[pid] = Instalacja(
+                clock=clocks[pid], liczba_zbiornikow=n_tanks, hydraulika=hydraulika, regulacja=regulacja
+            )
+        else:
+            insts[pid] = Instalacja(liczba_zbiornikow=n_tanks, hydraulika=hydraulika, regulacja=regulacja)
+    seq = {pid: 0 for pid in plants}
+    ticks = {pid: 0 for pid in plants}
+    tick_ms = {pid: 0.0 for pid in plants}
+    now = time.perf_counter()
+    last = {pid: now for pid in plants}
+    due = {pid: now for pid in plants}
+
+    while True:
+        # komendy (bez blokowania)
+        while True:
+            try:
+                msg = cmd_q.get_nowait()
+            except queue.Empty:
+                break
+            kind = msg[0]
+            if kind == STOP:
+                return
+            inst = insts.get(msg[1])
+            if inst is None:
+                continue
+            if kind == CMD:
+                k, _ = Komenda.unpack_from(msg[2], 0)
+                try:
+                    wykonaj(inst, k)
+                except (IndexError, ValueError, KeyError):
+                    pass
+            elif kind == CHECKPOINT:
+                out_q.put((msg[1], CheckpointCodec(inst).pack()))
+
+        now = time.perf_counter()
+        next_due = now + tick_s
+        for pid, inst in insts.items():
+            if not max_speed:
+                if now < due[pid]:
+                    next_due = min(next_due, due[pid])
+                    continue
+                # wlasny dt: opozniona instalacja robi dluzszy krok (max 1 s)
+                dt = min(1.0, now - last[pid])
+                due[pid] = max(due[pid] + tick_s, now)
+                next_due = min(next_due, due[pid])
+            else:
+                dt = tick_s
+                clocks[pid].t += dt
+            last[pid] = now
+            t0 = time.perf_counter()
+            inst.tick(dt)
+            ms = (time.perf_counter() - t0) * 1e3
+            tick_ms[pid] = ms if ticks[pid] == 0 else 0.9 * tick_ms[pid] + 0.1 * ms
+            ticks[pid] += 1
+            seq[pid] = layout.write(buf, pid, seq[pid], inst, ticks[pid], tick_ms[pid])
+        if not max_speed:
+            delay = next_due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+
+class FleetSupervisor:
+    """Uruchamia n_plants instalacji w `workers` procesach (spawn)."""
+
+    def __init__(
+        self,
+        n_plants: int,
+        workers: Optional[int] = None,
+        liczba_zbiornikow: int = 4,
+        tick_s: float = 0.05,
+        hydraulika: bool = False,
+        max_speed: bool = False,
+        przydzial: Optional[Sequence[int]] = None,
+        regulacja: bool = False,
+    ):
+        self.n_plants = int(n_plants)
+        self.workers = max(1, min(self.n_plants, workers or os.cpu_count() or 1))
+        self.n_tanks = int(liczba_zbiornikow)
+        self.tick_s = float(tick_s)
+        self.hydraulika = hydraulika
+        # bank regulatorow w kazdej instalacji (lustro w GUI musi miec te sama topologie)
+        self.regulacja = regulacja
+        self.max_speed = max_speed
+        # instalacja -> numer procesu
+        self.przydzial = list(przydzial) if przydzial is not None else [i % self.workers for i in range(self.n_plants)]
+        if len(self.przydzial) != self.n_plants or not all(0 <= w < self.workers for w in self.przydzial):
+            raise ValueError("Przydzial musi wskazywac proces 0..workers-1 dla kazdej instalacji")
+        self._layout = _SummaryLayout(self.n_tanks)
+        self._shm: Optional[SharedMemory] = None
+        self._procs: List[multiprocessing.Process] = []
+        self._cmd_qs: List = []
+        self._out_q = None
+        self._checkpoints: Dict[int, bytes] = {}
+
+    def start(self) -> "FleetSupervisor":
+        ctx = multiprocessing.get_context("spawn")
+        self._shm = SharedMemory(create=True, size=max(1, self._layout.slot * self.n_plants))
+        self._shm.buf[:] = bytes(len(self._shm.buf))
+        self._out_q = ctx.Queue()
+        for w in range(self.workers):
+            plants = [i for i, ww in enumerate(self.przydzial) if ww == w]
+            q = ctx.Queue()
+            p = ctx.Process(
+                target=_worker,
+                args=(self._shm.name, plants, self.n_tanks, self.tick_s, self.hydraulika, self.max_speed, q, self._out_q,
+                      self.regulacja),
+                name=f"fleet-{w}",
+                daemon=True,
+            )
+            p.start()
+            self._cmd_qs.append(q)
+            self._procs.append(p)
+        return self
+
+    def stop(self) -> None:
+        for q in self._cmd_qs:
+            q.put((STOP,))
+        for p in self._procs:
+            p.join(timeout=2.0)
+            if p.is_alive():
+                p.terminate()
+        self._procs.clear()
+        self._cmd_qs.clear()
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self) -> "FleetSupervisor":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ---- Sterowanie ----
+    def command(self, plant: int, k: Komenda) -> None:
+        self._cmd_qs[self.przydzial[plant]].put((CMD, plant, k.pack()))
+
+    def request_checkpoint(self, plant: int) -> None:
+        """Zleca przeslanie pelnego stanu instalacji (odbior: poll_checkpoint)."""
+        self._cmd_qs[self.przydzial[plant]].put((CHECKPOINT, plant))
+
+    def poll_checkpoint(self, plant: int) -> Optional[bytes]:
+        """Najnowszy otrzymany checkpoint instalacji (bez czekania) albo None."""
+        while True:
+            try:
+                pid, data = self._out_q.get_nowait()
+            except queue.Empty:
+                break
+            self._checkpoints[pid] = data
+        return self._checkpoints.pop(plant, None)
+
+    # ---- Odczyt ----
+    def summary(self, plant: int) -> Optional[PlantSummary]:
+        return self._layout.read(self._shm.buf, plant)
+
+    def summaries(self) -> List[Optional[PlantSummary]]:
+        buf = self._shm.buf
+        return [self._layout.read(buf, i) for i in range(self.n_plants)]
+
+    def total_ticks(self) -> int:
+        return sum(s.ticks for s in self.summaries() if s is not None)
+
+    def alive(self) -> List[bool]:
+        return [p.is_alive() for p in self._procs]
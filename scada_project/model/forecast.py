@@ -0,0 +1,134 @@
+"""Prognoza "co jesli": symulacja do przodu z kopii biezacego stanu.
+
+Stan jest klonowany przez checkpoint (model.checkpoint) - kilkaset bajtow
+zamiast kopiowania grafu obiektow. Kopia jest odtwarzana na swiezej
+Instalacji z ZegarReczny i tykana ze stalym krokiem, tak szybko jak sie da,
+w watku lub osobnym procesie (Forecaster).
+
+Przyklad:
+    fc = Forecaster()
+    fut = fc.submit(inst, horizon_s=300, komendy=[Komenda.pompa(0, 0.7)])
+    wynik = fut.result()
+    wynik.first_alarm("T2", "hi")   # za ile sekund T2 > 80%
+    wynik.first_alarm("T1", "pusty")
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .checkpoint import CheckpointCodec
+from .commands import Komenda, wykonaj
+from .simulation import ALARM_HI_PCT, ALARM_LO_PCT, ALARM_TEMP_C, Instalacja, ZegarReczny
+
+# rodzaje zdarzen: alarmy jak w Instalacja._update_alarms + stany skrajne
+ZDARZENIA = ("hi", "lo", "temp", "pusty", "pelny")
+
+
+@dataclass
+class Forecast:
+    """Wynik prognozy. Czasy liczone w sekundach od t0 (chwili klonu)."""
+
+    t0: float
+    times: List[float] = field(default_factory=list)
+    levels: Dict[str, List[float]] = field(default_factory=dict)  # [%]
+    temps: Dict[str, List[float]] = field(default_factory=dict)   # [C]
+    # (zbiornik, zdarzenie) -> czas pierwszego wystapienia (tylko nowe - nie aktywne w t0)
+    alarms: Dict[Tuple[str, str], float] = field(default_factory=dict)
+
+    def first_alarm(self, zbiornik: str, zdarzenie: str) -> Optional[float]:
+        return self.alarms.get((zbiornik, zdarzenie))
+
+
+def _stany(inst: Instalacja) -> Dict[Tuple[str, str], bool]:
+    out = {}
+    for z in inst.zbiorniki:
+        out[(z.nazwa, "hi")] = z.poziom * 100.0 > ALARM_HI_PCT
+        out[(z.nazwa, "lo")] = z.poziom * 100.0 < ALARM_LO_PCT
+        out[(z.nazwa, "temp")] = z.temperatura > ALARM_TEMP_C
+        out[(z.nazwa, "pusty")] = z.czy_pusty()
+        out[(z.nazwa, "pelny")] = z.czy_pelny()
+    return out
+
+
+def run_forecast(
+    checkpoint: bytes,
+    horizon_s: float,
+    dt_s: float = 0.05,
+    sample_s: float = 1.0,
+    komendy: Sequence[Komenda] = (),
+    factory: Callable[..., Instalacja] = Instalacja,
+) -> Forecast:
+    """Odtwarza checkpoint i symuluje horizon_s sekund do przodu.
+
+    Funkcja modulu (nie metoda), aby dalo sie ja wyslac do procesu roboczego.
+    factory musi budowac instalacje o tej samej topologii co zrodlo.
+    """
+    zegar = ZegarReczny()
+    inst = factory(clock=zegar)
+    t0 = CheckpointCodec(inst).restore(checkpoint)
+    zegar.t = t0
+    for k in komendy:
+        wykonaj(inst, k)
+
+    fc = Forecast(t0)
+    names = [z.nazwa for z in inst.zbiorniki]
+    for n in names:
+        fc.levels[n] = []
+        fc.temps[n] = []
+
+    def sample(t: float) -> None:
+        fc.times.append(t)
+        for z in inst.zbiorniki:
+            fc.levels[z.nazwa].append(z.poziom * 100.0)
+            fc.temps[z.nazwa].append(z.temperatura)
+
+    prev = _stany(inst)
+    sample(0.0)
+    n_steps = int(round(horizon_s / dt_s))
+    every = max(1, int(round(sample_s / dt_s)))
+    for i in range(1, n_steps + 1):
+        zegar.t = t0 + i * dt_s
+        inst.tick(dt_s)
+        t = i * dt_s
+        cur = _stany(inst)
+        for key, on in cur.items():
+            if on and not prev[key] and key not in fc.alarms:
+                fc.alarms[key] = t
+        prev = cur
+        if i % every == 0:
+            sample(t)
+    return fc
+
+
+class Forecaster:
+    """Uruchamia prognozy w tle (proces lub watek), nie blokujac ticku.
+
+    Procesy startuja metoda "spawn" - bezpieczne w aplikacji z watkami Qt
+    i pygame. Model nie importuje GUI, wiec start procesu jest lekki.
+    """
+
+    def __init__(self, use_processes: bool = True, factory: Callable[..., Instalacja] = Instalacja):
+        self.factory = factory
+        if use_processes:
+            self._pool: Executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="forecast")
+
+    def submit(
+        self,
+        inst: Instalacja,
+        horizon_s: float = 120.0,
+        dt_s: float = 0.05,
+        sample_s: float = 1.0,
+        komendy: Sequence[Komenda] = (),
+    ) -> "Future[Forecast]":
+        """Klonuje stan (wolajacy trzyma blokade instalacji) i zleca prognoze."""
+        checkpoint = CheckpointCodec(inst).pack()
+        return self._pool.submit(run_forecast, checkpoint, horizon_s, dt_s, sample_s, tuple(komendy), self.factory)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
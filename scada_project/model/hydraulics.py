@@ -0,0 +1,168 @@
+"""Solwer hydrauliczny: przeplyw w obu kierunkach od roznicy wysokosci.
+
+Model (opcjonalny, Instalacja(hydraulika=True)):
+- wysokosc cieczy w zbiorniku i:  h_i = rzedna_m + V_i / A_i,  A_i = pojemnosc / wysokosc_m,
+- przeplyw w rurze k (A -> B):    q_k = g_k * (h_A - h_B + H_k),
+  g_k = przewodnosc (0 gdy ktorys zawor zamkniety),
+  H_k = wysokosc_podnoszenia_m * predkosc^2 gdy pompa wlaczona (pcha A -> B).
+
+Przy otwartych zaworach woda plynie grawitacyjnie takze bez pompy, rowniez
+wstecz (B -> A). Calkowanie niejawne (Euler wstecz) ze stalym krokiem krok_s:
+
+    (diag(A / krok) + B G B^T) h+ = diag(A / krok) h - B G H
+
+Macierz jest rzadka (Laplasjan sieci) i zalezy tylko od topologii i stanu
+zaworow - faktoryzacja jest liczona ponownie wylacznie po ich zmianie.
+Nadwyzka dt ponizej krok_s przechodzi na nastepny tick.
+
+Ograniczenia 0..pojemnosc: przeplyw kazdej rury jest skalowany wspolczynnikiem
+zrodla (ile wody jest) i celu (ile miejsca jest) - bilans masy jest zachowany.
+
+Mieszanie (Instalacja.mieszanie): w tym samym kroku co objetosc przenoszona
+jest energia e = V * T - rura niesie amount * T zrodla, a T = e / V po kroku.
+Suma e przed i po ticku trafia do Instalacja.sprawdz_energie (dwa iloczyny
+skalarne).
+
+Wymaga numpy (zaleznosc matplotlib). scipy jest opcjonalne: bez niego
+uzywana jest odwrotnosc gesta (wystarczajaca dla malych instalacji).
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable, Optional
+
+import numpy as np
+
+try:  # opcjonalnie: rzadka faktoryzacja LU
+    from scipy.sparse import csc_matrix
+    from scipy.sparse.linalg import factorized
+except ImportError:  # pragma: no cover - zalezy od srodowiska
+    csc_matrix = None
+    factorized = None
+
+if TYPE_CHECKING:
+    from .simulation import Instalacja
+
+# ponizej tej objetosci na krok uznajemy, ze rura nie plynie
+_EPS_FLOW = 1e-9
+
+
+class HydraulicSolver:
+    def __init__(self, inst: "Instalacja", krok_s: float = 0.05):
+        self.inst = inst
+        self.krok_s = float(krok_s)
+        self._acc = 0.0
+        self.refaktoryzacje = 0
+        self.zbuduj()
+
+    def zbuduj(self) -> None:
+        """Odczytuje topologie (po dodaniu zbiornikow/rur)."""
+        inst = self.inst
+        idx = {id(z): i for i, z in enumerate(inst.zbiorniki)}
+        pols = inst.polaczenia
+        self.n = len(inst.zbiorniki)
+        self.a = np.array([idx[id(p.zbiornik_a)] for p in pols], dtype=np.intp)
+        self.b = np.array([idx[id(p.zbiornik_b)] for p in pols], dtype=np.intp)
+        self.area = np.array([z.pojemnosc / z.wysokosc_m for z in inst.zbiorniki], dtype=float)
+        self.cap = np.array([z.pojemnosc for z in inst.zbiorniki], dtype=float)
+        self.elev = np.array([z.rzedna_m for z in inst.zbiorniki], dtype=float)
+        self.g = np.array([p.przewodnosc for p in pols], dtype=float)
+        self.head_max = np.array([p.pompa.wysokosc_podnoszenia_m for p in pols], dtype=float)
+        self._sig: Optional[bytes] = None
+        self._solve: Optional[Callable[[np.ndarray], np.ndarray]] = None
+
+    # ---- Macierz systemu ----
+    def _factor(self, g: np.ndarray) -> Callable[[np.ndarray], np.ndarray]:
+        n = self.n
+        diag = self.area / self.krok_s
+        diag = diag + np.bincount(self.a, g, n) + np.bincount(self.b, g, n)
+        self.refaktoryzacje += 1
+        if factorized is not None:
+            idx = np.arange(n)
+            rows = np.concatenate([idx, self.a, self.b])
+            cols = np.concatenate([idx, self.b, self.a])
+            vals = np.concatenate([diag, -g, -g])
+            return factorized(csc_matrix((vals, (rows, cols)), shape=(n, n)))
+        m = np.diag(diag)
+        np.add.at(m, (self.a, self.b), -g)
+        np.add.at(m, (self.b, self.a), -g)
+        inv = np.linalg.inv(m)
+        return lambda rhs: inv @ rhs
+
+    # ---- Krok ----
+    def tick(self, dt_s: float) -> None:
+        inst = self.inst
+        pols = inst.polaczenia
+        self._acc += dt_s
+        steps = int(self._acc / self.krok_s + 1e-9)
+        if steps <= 0:
+            return
+        self._acc -= steps * self.krok_s
+
+        zb = inst.zbiorniki
+        vol = np.fromiter((z.aktualna_ilosc for z in zb), float, self.n)
+        mix = inst.mieszanie
+        if mix:
+            temp = np.fromiter((z.temperatura for z in zb), float, self.n)
+            e_przed = float(vol @ temp)
+        open_ = np.fromiter((p.zawor_a.otwarty and p.zawor_b.otwarty for p in pols), bool, len(pols))
+        pump = np.fromiter(
+            (p.pompa.predkosc ** 2 if p.pompa.wlaczona else 0.0 for p in pols), float, len(pols)
+        )
+
+        sig = open_.tobytes()
+        if sig != self._sig:
+            self._solve = self._factor(self.g * open_)
+            self._sig = sig
+        g = self.g * open_
+        gh = g * self.head_max * pump
+        src_term = np.bincount(self.a, gh, self.n) - np.bincount(self.b, gh, self.n)
+        a_over = self.area / self.krok_s
+
+        moved = np.zeros(len(pols))
+        for _ in range(steps):
+            h = self.elev + vol / self.area
+            h_new = self._solve(a_over * h - src_term)
+            q = g * (h_new[self.a] - h_new[self.b]) + gh  # A -> B dodatnie
+            amount = np.abs(q) * self.krok_s
+            fwd = q >= 0
+            src = np.where(fwd, self.a, self.b)
+            dst = np.where(fwd, self.b, self.a)
+            out = np.bincount(src, amount, self.n)
+            inn = np.bincount(dst, amount, self.n)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                f_src = np.where(out > 0, np.minimum(1.0, vol / out), 1.0)
+                f_dst = np.where(inn > 0, np.minimum(1.0, (self.cap - vol) / inn), 1.0)
+            amount = amount * np.minimum(f_src[src], f_dst[dst])
+            signed = np.where(fwd, amount, -amount)
+            if mix:
+                heat = amount * temp[src]
+                e = vol * temp - np.bincount(src, heat, self.n) + np.bincount(dst, heat, self.n)
+            vol = vol - np.bincount(self.a, signed, self.n) + np.bincount(self.b, signed, self.n)
+            vol = np.clip(vol, 0.0, self.cap)
+            if mix:
+                # pusty zbiornik zachowuje temperature (e ~ 0)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    temp = np.where(vol > _EPS_FLOW, e / vol, temp)
+            moved += signed
+
+        if mix:
+            for z, v, t in zip(zb, vol.tolist(), temp.tolist()):
+                z.aktualna_ilosc = v
+                z.aktualizuj_poziom()
+                z.temperatura = t
+            if inst.kontrola_energii:
+                inst.sprawdz_energie(e_przed, float(vol @ temp))
+        else:
+            for z, v in zip(zb, vol.tolist()):
+                z.aktualna_ilosc = v
+                z.aktualizuj_poziom()
+
+        for pol, m in zip(pols, moved.tolist()):
+            kier = 1 if m >= 0 else -1
+            pol.rura.ustaw_przeplyw(abs(m) > _EPS_FLOW, kier)
+            # jak w trybie prostym: pompa bez wody w zrodle (A) jest wylaczana
+            if pol.pompa.wlaczona and pol.zbiornik_a.czy_pusty():
+                inst._log(f"{pol.nazwa}: brak wody w zrodle, wylacz pompe")
+                pol.pompa.ustaw_wlaczenie(False)
+                pol.pompa.ustaw_predkosc(0.0)
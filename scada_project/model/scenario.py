@@ -0,0 +1,287 @@
+"""Nagrywanie scenariuszy i deterministyczne odtwarzanie.
+
+Nagranie to binarny strumien rekordow ze znacznikiem czasu:
+- TICK: krok symulacji (dt),
+- CMD: komenda operatora (model.commands.Komenda),
+- CHECKPOINT: pelny stan instalacji w formacie model.checkpoint
+  (co checkpoint_every_s sekund).
+
+Podczas nagrywania instalacja dziala na ZegarReczny ustawianym przed kazda
+operacja, wiec ta sama wartosc czasu trafia do modelu i do pliku. Przy
+odtwarzaniu zegar dostaje dokladnie te same wartosci - wynik jest
+powtarzalny co do bitu. Skok do dowolnej chwili = przywrocenie najblizszego
+wczesniejszego checkpointu i odtworzenie rekordow do przodu.
+
+Format pliku:
+    naglowek  !4sHHHdB  (magic, wersja, liczba zbiornikow, liczba rur, t0,
+                         opcje: bit 0 hydraulika, bit 1 regulacja)
+    rekord    !Bd       (typ, czas) + tresc zalezna od typu
+Naglowek wersji 2 nie ma bajtu opcji - opcje podaje odtwarzajacy.
+Odtwarzanie buduje instalacje z naglowka (albo sprawdza podana).
+"""
+
+from __future__ import annotations
+
+import struct
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, List, Optional, Tuple, Union
+
+from .checkpoint import CheckpointCodec
+from .commands import Komenda, wykonaj
+from .simulation import Instalacja, ZegarReczny
+
+MAGIC = b"SCNR"
+VERSION = 3
+
+REC_TICK = 1
+REC_CMD = 2
+REC_CHECKPOINT = 3
+
+_HEADER_V2 = struct.Struct("!4sHHHd")
+_HEADER = struct.Struct("!4sHHHdB")
+_OPT_HYDRAULIKA = 0x01
+_OPT_REGULACJA = 0x02
+_REC = struct.Struct("!Bd")
+_F64 = struct.Struct("!d")
+_U32 = struct.Struct("!I")
+
+
+# ---- Nagrywanie ----
+class ScenarioRecorder:
+    """Nagrywa ticki i komendy wykonywane na instalacji.
+
+    Wszystkie ticki i komendy musza przechodzic przez tick()/command(),
+    aby nagranie bylo kompletne.
+    """
+
+    def __init__(
+        self,
+        instalacja: Instalacja,
+        out: Union[str, BinaryIO],
+        checkpoint_every_s: float = 10.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.instalacja = instalacja
+        self.checkpoint_every_s = float(checkpoint_every_s)
+        self._clock = clock
+        self._own_file = isinstance(out, str)
+        self._f: BinaryIO = open(out, "wb") if isinstance(out, str) else out
+
+        self._codec = CheckpointCodec(instalacja)
+        self._prev_clock = instalacja.clock
+        self._zegar = ZegarReczny(clock())
+        instalacja.clock = self._zegar
+
+        t0 = self._zegar.t
+        opcje = (_OPT_HYDRAULIKA if instalacja.hydraulika is not None else 0) | (
+            _OPT_REGULACJA if instalacja.regulacja is not None else 0
+        )
+        self._f.write(_HEADER.pack(MAGIC, VERSION, len(instalacja.zbiorniki), len(instalacja.polaczenia), t0, opcje))
+        self._write_checkpoint(t0)
+
+    def _now(self) -> float:
+        # czas nie moze sie cofac (rampy liczone sa z roznic czasu)
+        self._zegar.t = max(self._zegar.t, self._clock())
+        return self._zegar.t
+
+    def _write_checkpoint(self, t: float) -> None:
+        data = self._codec.pack(t)
+        self._f.write(_REC.pack(REC_CHECKPOINT, t) + _U32.pack(len(data)) + data)
+        self._last_checkpoint = t
+
+    def tick(self, dt_s: float) -> None:
+        t = self._now()
+        self.instalacja.tick(dt_s)
+        self._f.write(_REC.pack(REC_TICK, t) + _F64.pack(dt_s))
+        if t - self._last_checkpoint >= self.checkpoint_every_s:
+            self._write_checkpoint(t)
+
+    def command(self, k: Komenda) -> Optional[str]:
+        t = self._now()
+        self._f.write(_REC.pack(REC_CMD, t) + k.pack())
+        return wykonaj(self.instalacja, k)
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        self._f.flush()
+        if self._own_file:
+            self._f.close()
+        self.instalacja.clock = self._prev_clock
+
+
+# ---- Odtwarzanie ----
+Record = Tuple[int, float, Union[float, Komenda, bytes]]
+
+
+@dataclass(frozen=True)
+class ScenarioInfo:
+    """Naglowek nagrania: uklad i opcje instalacji (None - nieznane, wersja 2)."""
+
+    t0: float
+    n_tanks: int
+    n_pipes: int
+    hydraulika: Optional[bool]
+    regulacja: Optional[bool]
+
+    def instalacja(self, hydraulika: bool = False, regulacja: bool = False, **kw) -> Instalacja:
+        """Instalacja jak w nagraniu; hydraulika/regulacja - gdy naglowek ich nie zawiera."""
+        return Instalacja(
+            liczba_zbiornikow=self.n_tanks,
+            hydraulika=hydraulika if self.hydraulika is None else self.hydraulika,
+            regulacja=regulacja if self.regulacja is None else self.regulacja,
+            **kw,
+        )
+
+    def sprawdz(self, inst: Instalacja) -> None:
+        """ValueError, gdy instalacja ma inny uklad albo opcje niz nagranie."""
+        rozne = []
+        if (len(inst.zbiorniki), len(inst.polaczenia)) != (self.n_tanks, self.n_pipes):
+            rozne.append(
+                f"zbiorniki/rury {len(inst.zbiorniki)}/{len(inst.polaczenia)} zamiast {self.n_tanks}/{self.n_pipes}"
+            )
+        for nazwa, want, have in (
+            ("hydraulika", self.hydraulika, inst.hydraulika is not None),
+            ("regulacja", self.regulacja, inst.regulacja is not None),
+        ):
+            if want is not None and want != have:
+                rozne.append(f"{nazwa} {'wlaczona' if have else 'wylaczona'}, w nagraniu {'tak' if want else 'nie'}")
+        if rozne:
+            raise ValueError("Instalacja niezgodna z nagraniem: " + "; ".join(rozne))
+
+
+def read_header(data: bytes) -> Tuple[ScenarioInfo, int]:
+    """Naglowek nagrania i przesuniecie pierwszego rekordu."""
+    magic, version = struct.unpack_from("!4sH", data, 0)
+    if magic != MAGIC:
+        raise ValueError("To nie jest plik scenariusza")
+    if version == 2:
+        _, _, n_tanks, n_pipes, t0 = _HEADER_V2.unpack_from(data, 0)
+        info = ScenarioInfo(t0, n_tanks, n_pipes, None, None)
+        off = _HEADER_V2.size
+    elif version == VERSION:
+        _, _, n_tanks, n_pipes, t0, opcje = _HEADER.unpack_from(data, 0)
+        info = ScenarioInfo(t0, n_tanks, n_pipes, bool(opcje & _OPT_HYDRAULIKA), bool(opcje & _OPT_REGULACJA))
+        off = _HEADER.size
+    else:
+        raise ValueError(f"Nieobslugiwana wersja scenariusza: {version}")
+    return info, off
+
+
+def read_scenario(data: bytes) -> Tuple[ScenarioInfo, List[Record]]:
+    info, off = read_header(data)
+    recs: List[Record] = []
+    n = len(data)
+    while off < n:
+        typ, t = _REC.unpack_from(data, off)
+        off += _REC.size
+        if typ == REC_TICK:
+            (dt,) = _F64.unpack_from(data, off)
+            off += _F64.size
+            recs.append((typ, t, dt))
+        elif typ == REC_CMD:
+            k, off = Komenda.unpack_from(data, off)
+            recs.append((typ, t, k))
+        elif typ == REC_CHECKPOINT:
+            (ln,) = _U32.unpack_from(data, off)
+            off += _U32.size
+            recs.append((typ, t, bytes(data[off:off + ln])))
+            off += ln
+        else:
+            raise ValueError(f"Nieznany rekord scenariusza: {typ}")
+    return info, recs
+
+
+class ScenarioReplayer:
+    """Odtwarza nagranie na instalacji sterowanej ZegarReczny.
+
+    speed: 1.0 = czas rzeczywisty, N = N razy szybciej, None = maksymalnie.
+    Przy verify=True kazdy mijany checkpoint jest porownywany ze stanem
+    odtwarzanym (licznik divergences). Bez instalacji - budowana z naglowka
+    (ScenarioInfo.instalacja); podana jest sprawdzana (ScenarioInfo.sprawdz).
+    """
+
+    def __init__(self, source: Union[str, bytes], instalacja: Optional[Instalacja] = None, verify: bool = False):
+        if isinstance(source, str):
+            with open(source, "rb") as f:
+                source = f.read()
+        self.info, self.records = read_scenario(source)
+        self.t0 = self.info.t0
+        self.zegar = ZegarReczny(self.t0)
+        if instalacja is None:
+            instalacja = self.info.instalacja()
+        self.info.sprawdz(instalacja)
+        self.instalacja = instalacja
+        self.instalacja.clock = self.zegar
+        self._codec = CheckpointCodec(self.instalacja)
+        self.verify = verify
+        self.divergences = 0
+        self.command_errors: List[str] = []
+
+        self._cp_idx = [i for i, r in enumerate(self.records) if r[0] == REC_CHECKPOINT]
+        self._cp_t = [self.records[i][1] for i in self._cp_idx]
+        self._pos = 0
+        self.seek(self.t0)
+
+    @property
+    def t(self) -> float:
+        return self.zegar.t
+
+    @property
+    def t_end(self) -> float:
+        return self.records[-1][1] if self.records else self.t0
+
+    def finished(self) -> bool:
+        return self._pos >= len(self.records)
+
+    def _apply(self, rec: Record) -> None:
+        typ, t, payload = rec
+        self.zegar.t = t
+        if typ == REC_TICK:
+            self.instalacja.tick(payload)
+        elif typ == REC_CMD:
+            err = wykonaj(self.instalacja, payload)
+            if err:
+                self.command_errors.append(err)
+        elif self.verify and self._codec.pack(t) != payload:
+            self.divergences += 1
+
+    def step(self) -> bool:
+        """Wykonuje jeden rekord. Zwraca False na koncu nagrania."""
+        if self._pos >= len(self.records):
+            return False
+        self._apply(self.records[self._pos])
+        self._pos += 1
+        return True
+
+    def seek(self, t: float) -> None:
+        """Ustawia stan na chwile t: najblizszy checkpoint <= t + odtworzenie do przodu."""
+        k = max(0, bisect_right(self._cp_t, t) - 1)
+        i = self._cp_idx[k]
+        data = self.records[i][2]
+        self.zegar.t = self._codec.restore(data)
+        self._pos = i + 1
+        recs = self.records
+        while self._pos < len(recs) and recs[self._pos][1] <= t:
+            self._apply(recs[self._pos])
+            self._pos += 1
+
+    def play(self, speed: Optional[float] = 1.0, until: Optional[float] = None, on_record: Optional[Callable[[Record], None]] = None) -> None:
+        """Odtwarza od biezacej pozycji do konca (lub do chwili until)."""
+        recs = self.records
+        wall0 = time.perf_counter()
+        sim0 = self.zegar.t
+        while self._pos < len(recs):
+            rec = recs[self._pos]
+            if until is not None and rec[1] > until:
+                break
+            if speed:
+                delay = (rec[1] - sim0) / speed - (time.perf_counter() - wall0)
+                if delay > 0:
+                    time.sleep(delay)
+            self._apply(rec)
+            self._pos += 1
+            if on_record:
+                on_record(rec)
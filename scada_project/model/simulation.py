@@ -4,10 +4,24 @@ from __future__ import annotations
 
 import time
 from dataclasses import dataclass
-from typing import Callable, Dict, List, Optional
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
 
 from .entities import PolaczenieRury, Pompa, Rura, Zawor, Zbiornik
 
+if TYPE_CHECKING:
+    from .control import Regulacja
+    from .hydraulics import HydraulicSolver
+
+# Progi alarmow
+ALARM_HI_PCT = 80.0
+ALARM_LO_PCT = 5.0
+ALARM_TEMP_C = 80.0
+
+# Temperatura wody doplywajacej przy napelnianiu
+TEMP_ZASILANIA_C = 15.0
+# Dopuszczalna wzgledna odchylka bilansu energii jednego przejscia przeplywu
+TOL_ENERGII = 1e-9
+
 
 @dataclass
 class RampAction:
@@ -32,95 +46,239 @@ class RampAction:
         return (now - self.start_time) >= self.duration
 
 
+@dataclass
+class Podsystem:
+    """Etap ticku wykonywany co okres_s sekund symulacji (0 = w kazdym ticku).
+
+    krok(dt_s, now) dostaje czas, jaki uplynal od jego poprzedniego wykonania.
+    """
+
+    nazwa: str
+    krok: Callable[[float, float], None]
+    okres_s: float = 0.0
+    faza_s: float = 0.0
+    ostatni: float = 0.0   # czas symulacji ostatniego wykonania
+    nastepny: float = 0.0  # czas symulacji nastepnego wykonania
+
+
+class Harmonogram:
+    """Planista wielu czestotliwosci: w ticku wykonuje tylko podsystemy, na ktore przyszla pora.
+
+    pomiar(nazwa, sekundy) - opcjonalny odbiorca czasu wykonania kazdego
+    podsystemu (profilowanie); None = brak pomiaru.
+    """
+
+    def __init__(self):
+        self.t = 0.0  # czas symulacji (suma dt)
+        self.podsystemy: List[Podsystem] = []
+        self.pomiar: Optional[Callable[[str, float], None]] = None
+
+    def dodaj(self, p: Podsystem) -> Podsystem:
+        p.ostatni = self.t
+        p.nastepny = self.t + p.faza_s
+        self.podsystemy.append(p)
+        return p
+
+    def get(self, nazwa: str) -> Podsystem:
+        for p in self.podsystemy:
+            if p.nazwa == nazwa:
+                return p
+        raise KeyError(nazwa)
+
+    def tick(self, dt_s: float, now: float) -> None:
+        self.t += dt_s
+        t = self.t
+        for p in self.podsystemy:
+            if t + 1e-9 < p.nastepny:
+                continue
+            if self.pomiar is None:
+                p.krok(t - p.ostatni, now)
+            else:
+                t0 = time.perf_counter()
+                p.krok(t - p.ostatni, now)
+                self.pomiar(p.nazwa, time.perf_counter() - t0)
+            p.ostatni = t
+            if p.okres_s > 0:
+                p.nastepny += p.okres_s
+                if p.nastepny <= t:
+                    # zaleglosci nie sa nadrabiane - dt obejmuje caly odstep
+                    p.nastepny = t + p.okres_s
+            else:
+                p.nastepny = t
+
+
+class ZegarReczny:
+    """Zegar ustawiany z zewnatrz (odtwarzanie, symulacja bez czasu rzeczywistego)."""
+
+    def __init__(self, t: float = 0.0):
+        self.t = float(t)
+
+    def __call__(self) -> float:
+        return self.t
+
+
 class Instalacja:
     """Stan calej instalacji + logika procesu."""
 
-    def __init__(self, log_cb: Optional[Callable[[str], None]] = None):
+    def __init__(
+        self,
+        log_cb: Optional[Callable[[str], None]] = None,
+        clock: Callable[[], float] = time.time,
+        liczba_zbiornikow: int = 4,
+        hydraulika: bool = False,
+        regulacja: bool = False,
+    ):
         self.log_cb = log_cb
-
-        # Zbiorniki (pozycje x,y sa uzywane przez pygame; w PyQt sa niezalezne)
-        self.T1 = Zbiornik(80, 260, nazwa="T1")
-        self.T2 = Zbiornik(280, 260, nazwa="T2")
-        self.T3 = Zbiornik(480, 260, nazwa="T3")
-        self.T4 = Zbiornik(680, 260, nazwa="T4")
-        self.zbiorniki: List[Zbiornik] = [self.T1, self.T2, self.T3, self.T4]
+        # zrodlo czasu dla ramp (domyslnie czas rzeczywisty)
+        self.clock = clock
+
+        # Zbiorniki (pozycje x,y sa uzywane przez pygame; w PyQt sa niezalezne).
+        # Linia T1..Tn w rzedach po 10 - dla 4 zbiornikow uklad jak na rysunku.
+        self.zbiorniki: List[Zbiornik] = [
+            Zbiornik(80 + 200 * (i % 10), 260 + 320 * (i // 10), nazwa=f"T{i + 1}")
+            for i in range(liczba_zbiornikow)
+        ]
+        self._tank_by_name: Dict[str, Zbiornik] = {z.nazwa: z for z in self.zbiorniki}
+        for z in self.zbiorniki[:4]:
+            setattr(self, z.nazwa, z)  # self.T1 .. self.T4
 
         # Poczatkowy stan (dla efektu): T1 ma troche wody
-        self.T1.aktualna_ilosc = 50.0
-        self.T1.aktualizuj_poziom()
+        self.zbiorniki[0].aktualna_ilosc = 50.0
+        self.zbiorniki[0].aktualizuj_poziom()
 
         # Akcje ramp (napelnianie/oproz) per zbiornik
         self._ramp_actions: Dict[str, Optional[RampAction]] = {z.nazwa: None for z in self.zbiorniki}
 
-        # Rury: musza miec 2 zakrety (4 punkty)
-        self.polaczenia: List[PolaczenieRury] = self._zbuduj_polaczenia()
-
         # Alarmy
         self._last_alarm_state: Dict[str, Dict[str, bool]] = {z.nazwa: {"hi": False, "lo": False, "temp": False} for z in self.zbiorniki}
+        # odbiorca przejsc alarmow (zbiornik, rodzaj hi/lo/temp, aktywny, czas) - np. AlarmKPI.zdarzenie
+        self.alarm_cb: Optional[Callable[[str, str, bool, float], None]] = None
+
+        # Mieszanie temperatur przy przeplywie i napelnianiu (srednia wazona objetoscia).
+        # Bilans energii (entalpia wzgledna: objetosc * C przy stalym cp i gestosci)
+        # jest sprawdzany w kazdym przejsciu etapu przeplywu.
+        self.mieszanie = True
+        self.temp_zasilania = TEMP_ZASILANIA_C
+        self.kontrola_energii = True
+        self.odchylka_energii_max = 0.0
+        self._odchylka_energii = False
+
+        # Opcjonalny solwer hydrauliczny (przeplyw od roznicy poziomow + wysokosci pompy)
+        self.hydraulika: Optional["HydraulicSolver"] = None
+        # Opcjonalny bank regulatorow PID (wlacz_regulacje())
+        self.regulacja: Optional["Regulacja"] = None
+
+        # Rury: musza miec 2 zakrety (4 punkty)
+        self.polaczenia: List[PolaczenieRury] = []
+        # zwiekszana przy zmianie topologii (widoki przebudowuja indeksy)
+        self.wersja_ukladu = 0
+        # (wersja_ukladu, czy kazda rura ma inny zbiornik docelowy) - szybka sciezka mieszania
+        self._jeden_doplyw = (-1, False)
+        for za, zb in zip(self.zbiorniki, self.zbiorniki[1:]):
+            self.dodaj_polaczenie(za.nazwa, zb.nazwa)
+
+        if hydraulika:
+            # import leniwy: solwer wymaga numpy, tryb prosty - nie
+            from .hydraulics import HydraulicSolver
+
+            self.hydraulika = HydraulicSolver(self)
+
+        # Etapy ticku jako podsystemy o wlasnych okresach. Temperatura zmienia sie
+        # o <1 C/s, a alarmy nie wymagaja 20 Hz - liczone sa rzadziej.
+        self.harmonogram = Harmonogram()
+        self.harmonogram.dodaj(Podsystem("rampy", self._etap_rampy))
+        self.harmonogram.dodaj(Podsystem("grzanie", self._etap_grzanie, okres_s=0.25))
+        self.harmonogram.dodaj(Podsystem("przeplyw", self._etap_przeplyw))
+        self.harmonogram.dodaj(Podsystem("alarmy", self._etap_alarmy, okres_s=0.2, faza_s=0.1))
+        if regulacja:
+            # jak wlacz_regulacje() z ustawieniami domyslnymi (te same petle - zgodny checkpoint)
+            self.wlacz_regulacje()
 
     def _log(self, msg: str) -> None:
         if self.log_cb:
             self.log_cb(msg)
 
-    def _zbuduj_polaczenia(self) -> List[PolaczenieRury]:
-        def mk_pipe(zA: Zbiornik, zB: Zbiornik) -> Rura:
-            """Tworzy przebieg rury jak na rysunku uzytkownika:
-            start w dolnym srodku zbiornika A, odcinek w dol,
-            potem poziomo do srodka miedzy zbiornikami, pionowo w gore
-            do poziomu gornej krawedzi zbiornika B i poziomo do wejscia.
-
-            Daje to "U"-ksztalt z wyraznymi zakretami 90 stopni.
-            """
-
-            p_start = zA.punkt_dol_srodek()      # (x, y) - dol A
-            p_end = zB.punkt_gora_srodek()       # (x, y) - gora B
-
-            # zejscie ponizej zbiornikow
-            y_low = p_start[1] + 60
-            # punkt posredni w polowie odleglosci w osi X
-            x_mid = (p_start[0] + p_end[0]) / 2.0
-            # wzniesienie do poziomu gornej krawedzi zbiornika B
-            y_top = p_end[1]
-
-            return Rura([
-                p_start,
-                (p_start[0], y_low),
-                (x_mid, y_low),
-                (x_mid, y_top),
-                p_end,
-            ])
-
-        pol = []
-        # T1-T2
-        p1 = Pompa("P12", on_change=self._log)
-        v1a = Zawor("T1 (T1-T2)", "rura T1-T2", on_change=self._log)
-        v1b = Zawor("T2 (T1-T2)", "rura T1-T2", on_change=self._log)
-        pol.append(PolaczenieRury("T1-T2", self.T1, self.T2, mk_pipe(self.T1, self.T2), p1, v1a, v1b))
-
-        # T2-T3
-        p2 = Pompa("P23", on_change=self._log)
-        v2a = Zawor("T2 (T2-T3)", "rura T2-T3", on_change=self._log)
-        v2b = Zawor("T3 (T2-T3)", "rura T2-T3", on_change=self._log)
-        pol.append(PolaczenieRury("T2-T3", self.T2, self.T3, mk_pipe(self.T2, self.T3), p2, v2a, v2b))
-
-        # T3-T4
-        p3 = Pompa("P34", on_change=self._log)
-        v3a = Zawor("T3 (T3-T4)", "rura T3-T4", on_change=self._log)
-        v3b = Zawor("T4 (T3-T4)", "rura T3-T4", on_change=self._log)
-        pol.append(PolaczenieRury("T3-T4", self.T3, self.T4, mk_pipe(self.T3, self.T4), p3, v3a, v3b))
-
+    @staticmethod
+    def _mk_pipe(zA: Zbiornik, zB: Zbiornik) -> Rura:
+        """Tworzy przebieg rury jak na rysunku uzytkownika:
+        start w dolnym srodku zbiornika A, odcinek w dol,
+        potem poziomo do srodka miedzy zbiornikami, pionowo w gore
+        do poziomu gornej krawedzi zbiornika B i poziomo do wejscia.
+
+        Daje to "U"-ksztalt z wyraznymi zakretami 90 stopni.
+        """
+
+        p_start = zA.punkt_dol_srodek()      # (x, y) - dol A
+        p_end = zB.punkt_gora_srodek()       # (x, y) - gora B
+
+        # zejscie ponizej zbiornikow
+        y_low = p_start[1] + 60
+        # punkt posredni w polowie odleglosci w osi X
+        x_mid = (p_start[0] + p_end[0]) / 2.0
+        # wzniesienie do poziomu gornej krawedzi zbiornika B
+        y_top = p_end[1]
+
+        return Rura([
+            p_start,
+            (p_start[0], y_low),
+            (x_mid, y_low),
+            (x_mid, y_top),
+            p_end,
+        ])
+
+    def dodaj_polaczenie(self, nazwa_a: str, nazwa_b: str) -> PolaczenieRury:
+        """Dodaje rure A -> B (pompa + 2 zawory). Pozwala budowac dowolna siec."""
+        zA = self._get_tank(nazwa_a)
+        zB = self._get_tank(nazwa_b)
+        nazwa = f"{zA.nazwa}-{zB.nazwa}"
+        pompa = Pompa(f"P{zA.nazwa.lstrip('T')}{zB.nazwa.lstrip('T')}", on_change=self._log)
+        va = Zawor(f"{zA.nazwa} ({nazwa})", f"rura {nazwa}", on_change=self._log)
+        vb = Zawor(f"{zB.nazwa} ({nazwa})", f"rura {nazwa}", on_change=self._log)
+        pol = PolaczenieRury(nazwa, zA, zB, self._mk_pipe(zA, zB), pompa, va, vb)
+        self.polaczenia.append(pol)
+        self.wersja_ukladu += 1
+        if self.hydraulika is not None:
+            self.hydraulika.zbuduj()
+        if self.regulacja is not None and self.regulacja._lvl:
+            self.regulacja.dodaj_petle_poziomu(pol)
         return pol
 
+    def wlacz_regulacje(self, okres_s: float = 0.1, poziom: bool = True, temperatura: bool = True) -> "Regulacja":
+        """Dodaje podsystem "regulacja": petle LC-Pxy (recznie) i TC-Tn (auto, grzalki)."""
+        if self.regulacja is None:
+            # import leniwy: bank regulatorow wymaga numpy
+            from .control import Regulacja
+
+            self.regulacja = Regulacja(self, poziom=poziom, temperatura=temperatura)
+            self.harmonogram.dodaj(Podsystem("regulacja", self.regulacja.krok, okres_s=okres_s))
+        return self.regulacja
+
+    # ---- Regulatory (komendy REGULATOR_*) ----
+    def regulator_tryb(self, petla: str, auto: bool) -> None:
+        """Petla regulacji na auto (bezuderzeniowo) albo reczny (ostatnie wyjscie)."""
+        if auto:
+            self.regulacja.auto(petla)
+        else:
+            self.regulacja.reczny(petla, powod=" (komenda operatora)")
+
+    def regulator_zadana(self, petla: str, sp: float) -> None:
+        """Wartosc zadana petli: poziom 0..1 (LC) albo temperatura [C] (TC, jak ustaw_temp_zadana)."""
+        p = self.regulacja.petle[petla]
+        if p.rodzaj == "temp":
+            self.ustaw_temp_zadana(p.zbiornik.nazwa, sp)
+        else:
+            self.regulacja.ustaw_zadana(petla, max(0.0, min(1.0, float(sp))))
+
     # ---- Sterowanie zbiornikami ----
     def napelnij(self, nazwa: str, duration_s: float) -> None:
         z = self._get_tank(nazwa)
-        now = time.time()
+        now = self.clock()
         self._ramp_actions[nazwa] = RampAction(now, duration_s, z.aktualna_ilosc, z.pojemnosc)
         self._log(f"{nazwa}: napelnianie przez {int(duration_s)}s")
 
     def oproznij(self, nazwa: str, duration_s: float) -> None:
         z = self._get_tank(nazwa)
-        now = time.time()
+        now = self.clock()
         self._ramp_actions[nazwa] = RampAction(now, duration_s, z.aktualna_ilosc, 0.0)
         self._log(f"{nazwa}: oproznianie przez {int(duration_s)}s")
 
@@ -128,12 +286,11 @@ class Instalacja:
         z = self._get_tank(nazwa)
         z.temp_zadana = float(temp)
         self._log(f"{nazwa}: temp zadana = {z.temp_zadana:.1f}C")
+        if self.regulacja is not None and self.regulacja.petla_temp(nazwa) is not None:
+            self.regulacja.ustaw_zadana(f"TC-{nazwa}", z.temp_zadana, log=False)
 
     def _get_tank(self, nazwa: str) -> Zbiornik:
-        for z in self.zbiorniki:
-            if z.nazwa == nazwa:
-                return z
-        raise KeyError(nazwa)
+        return self._tank_by_name[nazwa]
 
     # ---- Sterowanie pompami/zaworami ----
     def ustaw_zawor(self, pol_idx: int, which: str, otwarty: bool) -> None:
@@ -151,6 +308,10 @@ class Instalacja:
         """Ustawia predkosc. Zwraca komunikat bledu jesli nie mozna wlaczyc."""
         pol = self.polaczenia[pol_idx]
         predkosc_0_1 = max(0.0, min(1.0, float(predkosc_0_1)))
+        petla = self.regulacja.petla_pompy(pol) if self.regulacja is not None else None
+        if petla is not None:
+            # reka operatora ma pierwszenstwo: regulator poziomu przechodzi na reczny
+            self.regulacja.reczny(petla.nazwa, predkosc_0_1, powod=" (komenda operatora)")
 
         if predkosc_0_1 <= 0.0:
             # wylacz
@@ -183,29 +344,94 @@ class Instalacja:
         pol.zawor_a.ustaw(True)
         pol.zawor_b.ustaw(True)
 
+    def czy_spoczynek(self) -> bool:
+        """True, gdy tick nic nie zmieni: brak ramp, pracujacych pomp i przeplywow,
+        a kazda temperatura jest rowna zadanej (zbiorniki z petla TC - ustalone
+        w strefie wokol zadanej, Regulacja.aktywna)."""
+        if any(self._ramp_actions.values()):
+            return False
+        for pol in self.polaczenia:
+            if pol.pompa.wlaczona or pol.rura.czy_plynie:
+                return False
+        r = self.regulacja
+        if r is not None and r.aktywna():
+            return False
+        return all(
+            z.temperatura == z.temp_zadana for z in self.zbiorniki if r is None or r.petla_temp(z.nazwa) is None
+        )
+
     # ---- Tick symulacji ----
     def tick(self, dt_s: float) -> None:
-        now = time.time()
+        self.harmonogram.tick(dt_s, self.clock())
 
-        # 1) rampy napelniania/oproz
+    def ustaw_okres(self, nazwa: str, okres_s: float) -> None:
+        """Zmienia okres podsystemu (rampy, grzanie, przeplyw, alarmy, regulacja); 0 = kazdy tick."""
+        self.harmonogram.get(nazwa).okres_s = max(0.0, float(okres_s))
+
+    # 1) rampy napelniania/oproz
+    def _etap_rampy(self, dt_s: float, now: float) -> None:
         for z in self.zbiorniki:
             act = self._ramp_actions.get(z.nazwa)
             if not act:
                 continue
-            z.aktualna_ilosc = max(0.0, min(z.pojemnosc, act.value_at(now)))
+            v = max(0.0, min(z.pojemnosc, act.value_at(now)))
+            if self.mieszanie and v > z.aktualna_ilosc:
+                z.dodaj_ciecz(v - z.aktualna_ilosc, self.temp_zasilania)
+            z.aktualna_ilosc = v
             z.aktualizuj_poziom()
             if act.finished(now):
                 self._ramp_actions[z.nazwa] = None
 
-        # 2) grzanie (stopniowo do temp_zadana)
-        for z in self.zbiorniki:
+    # 2) grzanie (stopniowo do temp_zadana; zbiorniki z petla TC - model grzalki)
+    def _etap_grzanie(self, dt_s: float, now: float) -> None:
+        r = self.regulacja
+        if r is not None and r._tmp:
+            r.grzej(dt_s)
+            zbiorniki = [z for z in self.zbiorniki if r.petla_temp(z.nazwa) is None]
+        else:
+            zbiorniki = self.zbiorniki
+        for z in zbiorniki:
             if z.temperatura < z.temp_zadana:
                 z.temperatura = min(z.temp_zadana, z.temperatura + 0.8 * dt_s)
             elif z.temperatura > z.temp_zadana:
                 z.temperatura = max(z.temp_zadana, z.temperatura - 0.3 * dt_s)
 
-        # 3) przeplywy przez pompy
+    # 3) przeplywy: solwer hydrauliczny (oba kierunki) albo tryb prosty (pompa A -> B)
+    def _etap_przeplyw(self, dt_s: float, now: float) -> None:
+        if self.hydraulika is not None:
+            self.hydraulika.tick(dt_s)
+        else:
+            self._przeplyw_prosty(dt_s)
+
+    # 4) alarmy
+    def _etap_alarmy(self, dt_s: float, now: float) -> None:
+        self._update_alarms(now)
+
+    def sprawdz_energie(self, przed: float, po: float, zewn: float = 0.0) -> float:
+        """Bilans energii przejscia: po = przed + zewn. Zwraca odchylke wzgledna;
+        przekroczenie TOL_ENERGII jest logowane raz na epizod."""
+        odch = abs(po - przed - zewn) / max(1.0, abs(przed))
+        if odch > self.odchylka_energii_max:
+            self.odchylka_energii_max = odch
+        if odch > TOL_ENERGII:
+            if not self._odchylka_energii:
+                self._odchylka_energii = True
+                self._log(f"BILANS ENERGII: odchylka {odch:.2e} w etapie przeplywu")
+        else:
+            self._odchylka_energii = False
+        return odch
+
+    def _przeplyw_prosty(self, dt_s: float) -> None:
+        """Przeplyw pompowany A -> B ze stala wydajnoscia.
+
+        Mieszanie raz na tick: petla po rurach przenosi tylko objetosc
+        i zapamietuje transfery (temperatura zrodla z poczatku ticku); potem
+        jedno przejscie po zbiornikach docelowych ustawia temperatury
+        (T = T0 + (suma a*t - T0 * suma a) / V) i liczy bilans energii.
+        """
         base_flow_per_s = 20.0  # jednostek/sek przy predkosc=1
+        mieszanie = self.mieszanie
+        transfery = []  # (temperatura zrodla, zbiornik docelowy, objetosc)
         for pol in self.polaczenia:
             # domyslnie brak przeplywu
             pol.rura.ustaw_przeplyw(False, 1)
@@ -234,18 +460,61 @@ class Instalacja:
             if added < removed:
                 # gdyby dst sie zapelnil, zwroc nadmiar do src
                 z_src.dodaj_ciecz(removed - added)
+            if mieszanie and added > 0:
+                transfery.append((z_src.temperatura, z_dst, added))
 
             if removed > 0:
                 pol.rura.ustaw_przeplyw(True, kierunek)
-
-        # 4) alarmy
-        self._update_alarms()
-
-    def _update_alarms(self) -> None:
+        if transfery:
+            self._mieszaj(transfery)
+
+    def _mieszaj(self, transfery: list) -> None:
+        """Temperatury zbiornikow docelowych po transferach ticku + bilans energii.
+
+        Odplyw nie zmienia temperatury zrodla, wiec zmieniaja sie tylko
+        zbiorniki docelowe. Bilans: energia oddana przez zrodla (suma a*t)
+        = przyrost energii zbiornikow docelowych ponad ich T0.
+        """
+        przed = po = 0.0
+        wersja, jeden = self._jeden_doplyw
+        if wersja != self.wersja_ukladu:
+            cele = [id(p.zbiornik_b) for p in self.polaczenia]
+            jeden = len(set(cele)) == len(cele)
+            self._jeden_doplyw = (self.wersja_ukladu, jeden)
+        if jeden:
+            # kazdy zbiornik ma najwyzej jeden doplyw (np. linia T1..Tn) - bez grupowania
+            for t, z, a in transfery:
+                t0 = z.temperatura
+                v = z.aktualna_ilosc
+                z.temperatura = t1 = t0 + (a * t - t0 * a) / v
+                przed += a * t
+                po += v * (t1 - t0) + t0 * a
+            if self.kontrola_energii:
+                self.sprawdz_energie(przed, po)
+            return
+        dop: Dict[int, list] = {}  # id zbiornika -> [zbiornik, suma a, suma a*t]
+        for t, z, a in transfery:
+            d = dop.get(id(z))
+            if d is None:
+                dop[id(z)] = [z, a, a * t]
+            else:
+                d[1] += a
+                d[2] += a * t
+        for z, a, at in dop.values():
+            t0 = z.temperatura
+            v = z.aktualna_ilosc
+            z.temperatura = t0 + (at - t0 * a) / v
+            przed += at
+            po += v * (z.temperatura - t0) + t0 * a
+        if self.kontrola_energii:
+            self.sprawdz_energie(przed, po)
+
+    def _update_alarms(self, now: float) -> None:
+        cb = self.alarm_cb
         for z in self.zbiorniki:
-            hi = (z.poziom * 100.0) > 80.0
-            lo = (z.poziom * 100.0) < 5.0
-            tt = z.temperatura > 80.0
+            hi = (z.poziom * 100.0) > ALARM_HI_PCT
+            lo = (z.poziom * 100.0) < ALARM_LO_PCT
+            tt = z.temperatura > ALARM_TEMP_C
 
             last = self._last_alarm_state[z.nazwa]
             if hi and not last["hi"]:
@@ -255,4 +524,9 @@ class Instalacja:
             if tt and not last["temp"]:
                 self._log(f"ALARM: {z.nazwa} temperatura > 80C")
 
+            if cb is not None:
+                for rodzaj, akt in (("hi", hi), ("lo", lo), ("temp", tt)):
+                    if akt != last[rodzaj]:
+                        cb(z.nazwa, rodzaj, akt, now)
+
             last["hi"], last["lo"], last["temp"] = hi, lo, tt
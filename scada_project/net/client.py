@@ -0,0 +1,117 @@
+"""Klient serwera stanu: lustrzana kopia stanu instalacji po stronie HMI.
+
+Odpowiedzi na komendy przychodza w strumieniu ramek, wiec command() czeka
+na nie tylko wtedy, gdy ramki sa czytane (updates() w osobnym zadaniu).
+
+Przyklad:
+    async def main():
+        c = await StateClient.connect(port=5020)
+        await c.subscribe(tanks=["T1", "T2"], pipes=None)
+
+        async def odbior():
+            async for _ in c.updates():
+                print(c.tanks)
+
+        task = asyncio.create_task(odbior())
+        ok, msg = await c.command(Komenda.napelnij("T1", 3.0))
+        await task
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator, Callable, Dict, Optional, Sequence, Tuple
+
+from ..model.commands import Komenda
+from . import protocol as proto
+
+
+class StateClient:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self.seq = 0
+        self.t = 0.0
+        # nazwa encji -> slownik pol (jak w protocol._unpack_*_entry)
+        self.tanks: Dict[str, Dict[str, float]] = {}
+        self.pipes: Dict[str, Dict[str, float]] = {}
+        self._tank_names: Dict[int, str] = {}
+        self._pipe_names: Dict[int, str] = {}
+        self._next_id = 1
+        self._pending: Dict[int, asyncio.Future] = {}
+        self.on_log: Optional[Callable[[str], None]] = None
+
+    @classmethod
+    async def connect(cls, host: str = "127.0.0.1", port: Optional[int] = 5020, unix_path: Optional[str] = None) -> "StateClient":
+        if unix_path:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def subscribe(self, tanks: Optional[Sequence[str]] = None, pipes: Optional[Sequence[str]] = None) -> None:
+        self._writer.write(proto.pack_subscribe(tanks, pipes))
+        await self._writer.drain()
+
+    async def command(self, k: Komenda, timeout: Optional[float] = 5.0) -> Tuple[bool, str]:
+        """Wysyla komende; odpowiedz przychodzi w trakcie updates().
+
+        Bez odpowiedzi w ciagu timeout [s] (None - bez limitu): (False, komunikat).
+        """
+        req_id = self._next_id
+        self._next_id += 1
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[req_id] = fut
+        self._writer.write(proto.pack_command(req_id, k))
+        await self._writer.drain()
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            self._pending.pop(req_id, None)
+            return False, f"Brak odpowiedzi serwera w {timeout:g} s"
+
+    def _apply(self, d: proto.Decoded, full: bool) -> None:
+        self.seq, self.t = d.seq, d.t
+        if full:
+            self._tank_names = d.tank_names
+            self._pipe_names = d.pipe_names
+            self.tanks = {d.tank_names[i]: v for i, v in d.tanks.items()}
+            self.pipes = {d.pipe_names[i]: v for i, v in d.pipes.items()}
+            return
+        for i, v in d.tanks.items():
+            self.tanks.setdefault(self._tank_names.get(i, str(i)), {}).update(v)
+        for i, v in d.pipes.items():
+            self.pipes.setdefault(self._pipe_names.get(i, str(i)), {}).update(v)
+
+    async def read_frame(self) -> int:
+        """Czyta i stosuje jedna ramke. Zwraca jej typ."""
+        hdr = await self._reader.readexactly(proto.HEADER.size)
+        n, typ = proto.HEADER.unpack(hdr)
+        payload = await self._reader.readexactly(n) if n else b""
+        if typ == proto.SNAPSHOT:
+            self._apply(proto.unpack_snapshot(payload), True)
+        elif typ == proto.DELTA:
+            self._apply(proto.unpack_delta(payload), False)
+        elif typ == proto.LOG:
+            if self.on_log:
+                self.on_log(proto.unpack_log(payload))
+        elif typ == proto.REPLY:
+            req_id, ok, msg = proto.unpack_reply(payload)
+            fut = self._pending.pop(req_id, None)
+            if fut and not fut.done():
+                fut.set_result((ok, msg))
+        return typ
+
+    async def updates(self) -> AsyncIterator[int]:
+        """Generator kolejnych aktualizacji stanu (SNAPSHOT/DELTA)."""
+        try:
+            while True:
+                typ = await self.read_frame()
+                if typ in (proto.SNAPSHOT, proto.DELTA):
+                    yield typ
+        except asyncio.IncompleteReadError:
+            return
+
+    async def close(self) -> None:
+        self._writer.close()
+        await self._writer.wait_closed()
@@ -0,0 +1,288 @@
+"""Modbus/TCP: fasada instalacji dla zewnetrznego systemu SCADA.
+
+Mapa rejestrow jest generowana z Instalacja.zbiorniki i Instalacja.polaczenia
+(adresy od 0, kolejnosc jak w listach):
+
+- Input Registers (FC04), 2 na zbiornik:
+    2*i     poziom zbiornika i [0.1 %]  (0-1000)
+    2*i + 1 temperatura zbiornika i [0.1 C] (int16)
+- Holding Registers (FC03 / FC06 / FC16), 1 na rure:
+    j       predkosc pompy rury j [%] (0-100, 0 = wylaczona)
+- Coils (FC01 / FC05 / FC15), 2 na rure:
+    2*j     zawor A rury j
+    2*j + 1 zawor B rury j
+- Discrete Inputs (FC02), 2 na rure:
+    2*j     pompa rury j wlaczona
+    2*j + 1 przeplyw w rurze j
+
+Zapytania sa obslugiwane z obrazu rejestrow (gotowe bajty big-endian),
+odswiezanego raz na tick - odczyt to wyciecie fragmentu bufora, bez
+chodzenia po obiektach modelu. Zapisy ida przez model.commands (ta sama
+sciezka co GUI) i od razu odswiezaja obraz.
+
+Wiele ramek w jednym pakiecie (pipelining) jest obslugiwanych w jednym
+przebiegu, odpowiedzi wysylane sa jednym write().
+"""
+
+from __future__ import annotations
+
+import asyncio
+import struct
+from typing import List, Optional, Tuple
+
+from ..model.commands import Komenda, wykonaj
+from ..model.simulation import Instalacja
+
+MBAP = struct.Struct("!HHHB")  # transaction, protocol, length, unit
+
+# kody wyjatkow Modbus
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_ADDRESS = 0x02
+ILLEGAL_VALUE = 0x03
+DEVICE_FAILURE = 0x04
+
+_RANGE = struct.Struct("!HH")
+
+
+class ModbusError(Exception):
+    def __init__(self, code: int):
+        super().__init__(code)
+        self.code = code
+
+
+def _pack_bits(bits: List[bool]) -> bytearray:
+    out = bytearray((len(bits) + 7) // 8)
+    for i, b in enumerate(bits):
+        if b:
+            out[i >> 3] |= 1 << (i & 7)
+    return out
+
+
+def _slice_bits(packed: bytes, start: int, count: int) -> bytes:
+    """Wycina bity [start, start+count) i pakuje je od bitu 0 (format odpowiedzi FC01/FC02)."""
+    val = (int.from_bytes(packed, "little") >> start) & ((1 << count) - 1)
+    return val.to_bytes((count + 7) // 8, "little")
+
+
+class RegisterImage:
+    """Obraz rejestrow Modbus odswiezany raz na tick."""
+
+    def __init__(self, instalacja: Instalacja):
+        self.instalacja = instalacja
+        self.n_tanks = len(instalacja.zbiorniki)
+        self.n_pipes = len(instalacja.polaczenia)
+        self._ir_fmt = struct.Struct(f"!{self.n_tanks * 2}H")
+        self._hr_fmt = struct.Struct(f"!{self.n_pipes}H")
+        self.input_regs = b""
+        self.holding_regs = b""
+        self.coils = b""
+        self.discrete = b""
+        self.refresh()
+
+    def refresh(self) -> None:
+        ir = []
+        for z in self.instalacja.zbiorniki:
+            ir.append(max(0, min(1000, int(round(z.poziom * 1000.0)))))
+            ir.append(int(round(z.temperatura * 10.0)) & 0xFFFF)
+        hr = []
+        coils = []
+        di = []
+        for pol in self.instalacja.polaczenia:
+            hr.append(int(round(pol.pompa.predkosc * 100.0)) if pol.pompa.wlaczona else 0)
+            coils += [pol.zawor_a.otwarty, pol.zawor_b.otwarty]
+            di += [pol.pompa.wlaczona, pol.rura.czy_plynie]
+        self.input_regs = self._ir_fmt.pack(*ir)
+        self.holding_regs = self._hr_fmt.pack(*hr)
+        self.coils = bytes(_pack_bits(coils))
+        self.discrete = bytes(_pack_bits(di))
+
+    # ---- Odczyty ----
+    @staticmethod
+    def _check(start: int, count: int, size: int, max_count: int) -> None:
+        if not 1 <= count <= max_count:
+            raise ModbusError(ILLEGAL_VALUE)
+        if start + count > size:
+            raise ModbusError(ILLEGAL_ADDRESS)
+
+    def read_registers(self, regs: bytes, start: int, count: int) -> bytes:
+        self._check(start, count, len(regs) // 2, 125)
+        return bytes((count * 2,)) + regs[start * 2:(start + count) * 2]
+
+    def read_bits(self, packed: bytes, size: int, start: int, count: int) -> bytes:
+        self._check(start, count, size, 2000)
+        data = _slice_bits(packed, start, count)
+        return bytes((len(data),)) + data
+
+    # ---- Zapisy ----
+    def write_coil(self, addr: int, on: bool) -> None:
+        if addr >= self.n_pipes * 2:
+            raise ModbusError(ILLEGAL_ADDRESS)
+        wykonaj(self.instalacja, Komenda.zawor(addr // 2, "ab"[addr & 1], on))
+
+    def write_holding(self, addr: int, value: int) -> None:
+        if addr >= self.n_pipes:
+            raise ModbusError(ILLEGAL_ADDRESS)
+        if value > 100:
+            raise ModbusError(ILLEGAL_VALUE)
+        if wykonaj(self.instalacja, Komenda.pompa(addr, value / 100.0)):
+            # blokada pompy (zamkniety zawor)
+            raise ModbusError(DEVICE_FAILURE)
+
+
+class _ModbusProtocol(asyncio.Protocol):
+    def __init__(self, server: "ModbusServer"):
+        self.server = server
+        self.image = server.image
+        self._buf = bytearray()
+        self.transport: Optional[asyncio.Transport] = None
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+        self.server.connections += 1
+
+    def connection_lost(self, exc) -> None:
+        self.server.connections -= 1
+
+    def data_received(self, data: bytes) -> None:
+        buf = self._buf
+        buf += data
+        out = []
+        off = 0
+        n = len(buf)
+        while n - off >= MBAP.size:
+            tid, pid, length, unit = MBAP.unpack_from(buf, off)
+            end = off + 6 + length
+            if length < 2 or length > 254:
+                # zly naglowek - nie da sie zsynchronizowac strumienia
+                self.transport.close()
+                return
+            if end > n:
+                break
+            pdu = bytes(buf[off + MBAP.size:end])
+            off = end
+            if pid != 0:
+                continue
+            resp = self._dispatch(pdu)
+            out.append(MBAP.pack(tid, 0, len(resp) + 1, unit) + resp)
+        del buf[:off]
+        if out:
+            self.server.requests += len(out)
+            self.transport.write(b"".join(out))
+
+    def _dispatch(self, pdu: bytes) -> bytes:
+        fc = pdu[0]
+        img = self.image
+        try:
+            if fc in (1, 2, 3, 4):
+                if len(pdu) != 5:
+                    raise ModbusError(ILLEGAL_VALUE)
+                start, count = _RANGE.unpack_from(pdu, 1)
+                if fc == 1:
+                    data = img.read_bits(img.coils, img.n_pipes * 2, start, count)
+                elif fc == 2:
+                    data = img.read_bits(img.discrete, img.n_pipes * 2, start, count)
+                elif fc == 3:
+                    data = img.read_registers(img.holding_regs, start, count)
+                else:
+                    data = img.read_registers(img.input_regs, start, count)
+                return bytes((fc,)) + data
+
+            if fc == 5:
+                addr, val = _RANGE.unpack_from(pdu, 1)
+                if val not in (0x0000, 0xFF00):
+                    raise ModbusError(ILLEGAL_VALUE)
+                img.write_coil(addr, val == 0xFF00)
+                img.refresh()
+                return pdu[:5]
+
+            if fc == 6:
+                addr, val = _RANGE.unpack_from(pdu, 1)
+                img.write_holding(addr, val)
+                img.refresh()
+                return pdu[:5]
+
+            if fc == 15:
+                start, count = _RANGE.unpack_from(pdu, 1)
+                img._check(start, count, img.n_pipes * 2, 1968)
+                bits = pdu[6:]
+                if len(bits) != (count + 7) // 8:
+                    raise ModbusError(ILLEGAL_VALUE)
+                for i in range(count):
+                    img.write_coil(start + i, bool(bits[i >> 3] & (1 << (i & 7))))
+                img.refresh()
+                return pdu[:5]
+
+            if fc == 16:
+                start, count = _RANGE.unpack_from(pdu, 1)
+                img._check(start, count, img.n_pipes, 123)
+                if len(pdu) != 6 + 2 * count:
+                    raise ModbusError(ILLEGAL_VALUE)
+                vals = struct.unpack_from(f"!{count}H", pdu, 6)
+                try:
+                    for i, v in enumerate(vals):
+                        img.write_holding(start + i, v)
+                finally:
+                    img.refresh()
+                return pdu[:5]
+
+            raise ModbusError(ILLEGAL_FUNCTION)
+        except ModbusError as e:
+            return bytes((fc | 0x80, e.code))
+        except struct.error:
+            return bytes((fc | 0x80, ILLEGAL_VALUE))
+
+
+class ModbusServer:
+    """Serwer Modbus/TCP nad obrazem rejestrow instalacji.
+
+    Jesli tick_s jest podane, serwer sam tyka instalacje; w przeciwnym razie
+    tyka ja wlasciciel (np. StateServer), wolajac refresh() po kazdym ticku.
+    """
+
+    def __init__(self, instalacja: Instalacja, tick_s: Optional[float] = None):
+        self.instalacja = instalacja
+        self.tick_s = tick_s
+        self.image = RegisterImage(instalacja)
+        self.connections = 0
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def refresh(self) -> None:
+        self.image.refresh()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 5502) -> Tuple[str, int]:
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(lambda: _ModbusProtocol(self), host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def _tick_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        last = loop.time()
+        while True:
+            await asyncio.sleep(self.tick_s)
+            now = loop.time()
+            self.instalacja.tick(max(0.001, now - last))
+            last = now
+            self.image.refresh()
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 5502) -> None:
+        await self.start(host, port)
+        try:
+            if self.tick_s:
+                await self._tick_loop()
+            else:
+                await asyncio.Event().wait()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if self._server:
+            self._server.close()
+
+
+def run_modbus_server(host: str = "127.0.0.1", port: int = 5502, tick_s: float = 0.05) -> None:
+    server = ModbusServer(Instalacja(log_cb=print), tick_s=tick_s)
+    try:
+        asyncio.run(server.serve_forever(host, port))
+    except KeyboardInterrupt:
+        pass
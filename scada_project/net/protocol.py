@@ -0,0 +1,279 @@
+"""Binarny protokol telemetrii (serwer stanu <-> klienci HMI).
+
+Ramka: naglowek ``!IB`` (dlugosc tresci, typ) + tresc.
+
+Typy ramek:
+- SNAPSHOT (serwer): pelny stan wybranych encji (z nazwami),
+- DELTA (serwer): tylko zmienione pola zbiornikow i rur (indeksy + maska pol),
+- LOG (serwer): komunikat z logu instalacji,
+- REPLY (serwer): odpowiedz na komende (id, ok, komunikat); id 0 - bledna
+  subskrypcja albo nieczytelna komenda,
+- SUBSCRIBE (klient): wybor podzbioru zbiornikow/rur,
+- COMMAND (klient): komenda sterujaca (model.commands.Komenda).
+
+Wartosci analogowe sa przesylane jako float32 - zmiana ponizej precyzji
+float32 nie generuje wpisu w delcie.
+"""
+
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ..model.commands import Komenda
+
+HEADER = struct.Struct("!IB")
+
+SNAPSHOT = 1
+DELTA = 2
+LOG = 3
+REPLY = 4
+SUBSCRIBE = 5
+COMMAND = 6
+
+# Pola zbiornika (bity maski w DELTA)
+T_POZIOM = 0x01
+T_TEMP = 0x02
+T_TEMP_ZADANA = 0x04
+T_WSZYSTKO = T_POZIOM | T_TEMP | T_TEMP_ZADANA
+
+# Pola rury (bity maski w DELTA)
+P_FLAGI = 0x01
+P_PREDKOSC = 0x02
+P_WSZYSTKO = P_FLAGI | P_PREDKOSC
+
+# Bity bajtu flag rury
+F_PLYNIE = 0x01
+F_WSTECZ = 0x02
+F_ZAWOR_A = 0x04
+F_ZAWOR_B = 0x08
+F_POMPA = 0x10
+
+_SEQ = struct.Struct("!Id")       # numer ticku, czas symulacji
+_COUNT = struct.Struct("!H")
+_ENTRY = struct.Struct("!HB")     # indeks encji, maska pol
+_F32 = struct.Struct("!f")
+_FLAGS = struct.Struct("!B")
+_REPLY = struct.Struct("!IB")
+_CMD_ID = struct.Struct("!I")     # id komendy (dalej Komenda.pack)
+
+SUB_WSZYSTKIE_ZBIORNIKI = 0x01
+SUB_WSZYSTKIE_RURY = 0x02
+
+# (poziom, temperatura, temp_zadana)
+TankValues = Tuple[float, float, float]
+# (flagi, predkosc)
+PipeValues = Tuple[int, float]
+
+
+def frame(typ: int, payload: bytes) -> bytes:
+    return HEADER.pack(len(payload), typ) + payload
+
+
+def f32(x: float) -> float:
+    """Zaokragla do float32 (tak jak wartosc po stronie klienta)."""
+    return _F32.unpack(_F32.pack(x))[0]
+
+
+def _pack_str(s: str) -> bytes:
+    b = s.encode("utf-8")
+    return _FLAGS.pack(len(b)) + b
+
+
+def _unpack_str(buf: bytes, off: int) -> Tuple[str, int]:
+    n = buf[off]
+    off += 1
+    return buf[off:off + n].decode("utf-8"), off + n
+
+
+# ---- Wpisy encji (wspolne dla SNAPSHOT i DELTA) ----
+def pack_tank_entry(idx: int, mask: int, v: TankValues) -> bytes:
+    out = [_ENTRY.pack(idx, mask)]
+    if mask & T_POZIOM:
+        out.append(_F32.pack(v[0]))
+    if mask & T_TEMP:
+        out.append(_F32.pack(v[1]))
+    if mask & T_TEMP_ZADANA:
+        out.append(_F32.pack(v[2]))
+    return b"".join(out)
+
+
+def pack_pipe_entry(idx: int, mask: int, v: PipeValues) -> bytes:
+    out = [_ENTRY.pack(idx, mask)]
+    if mask & P_FLAGI:
+        out.append(_FLAGS.pack(v[0]))
+    if mask & P_PREDKOSC:
+        out.append(_F32.pack(v[1]))
+    return b"".join(out)
+
+
+def _unpack_tank_entry(buf: bytes, off: int) -> Tuple[int, Dict[str, float], int]:
+    idx, mask = _ENTRY.unpack_from(buf, off)
+    off += _ENTRY.size
+    vals: Dict[str, float] = {}
+    for bit, key in ((T_POZIOM, "poziom"), (T_TEMP, "temperatura"), (T_TEMP_ZADANA, "temp_zadana")):
+        if mask & bit:
+            vals[key] = _F32.unpack_from(buf, off)[0]
+            off += _F32.size
+    return idx, vals, off
+
+
+def _unpack_pipe_entry(buf: bytes, off: int) -> Tuple[int, Dict[str, float], int]:
+    idx, mask = _ENTRY.unpack_from(buf, off)
+    off += _ENTRY.size
+    vals: Dict[str, float] = {}
+    if mask & P_FLAGI:
+        fl = buf[off]
+        off += 1
+        vals["plynie"] = bool(fl & F_PLYNIE)
+        vals["kierunek"] = -1 if fl & F_WSTECZ else 1
+        vals["zawor_a"] = bool(fl & F_ZAWOR_A)
+        vals["zawor_b"] = bool(fl & F_ZAWOR_B)
+        vals["pompa"] = bool(fl & F_POMPA)
+    if mask & P_PREDKOSC:
+        vals["predkosc"] = _F32.unpack_from(buf, off)[0]
+        off += _F32.size
+    return idx, vals, off
+
+
+# ---- SNAPSHOT ----
+def pack_snapshot(
+    seq: int,
+    t: float,
+    tanks: Sequence[Tuple[int, str, TankValues]],
+    pipes: Sequence[Tuple[int, str, PipeValues]],
+) -> bytes:
+    out = [_SEQ.pack(seq, t), _COUNT.pack(len(tanks))]
+    for idx, name, v in tanks:
+        out.append(_pack_str(name))
+        out.append(pack_tank_entry(idx, T_WSZYSTKO, v))
+    out.append(_COUNT.pack(len(pipes)))
+    for idx, name, v in pipes:
+        out.append(_pack_str(name))
+        out.append(pack_pipe_entry(idx, P_WSZYSTKO, v))
+    return frame(SNAPSHOT, b"".join(out))
+
+
+@dataclass
+class Decoded:
+    """Zdekodowany SNAPSHOT lub DELTA."""
+
+    seq: int
+    t: float
+    tanks: Dict[int, Dict[str, float]]
+    pipes: Dict[int, Dict[str, float]]
+    tank_names: Dict[int, str]
+    pipe_names: Dict[int, str]
+
+
+def unpack_snapshot(payload: bytes) -> Decoded:
+    seq, t = _SEQ.unpack_from(payload, 0)
+    off = _SEQ.size
+    tanks, pipes, tnames, pnames = {}, {}, {}, {}
+    (n,) = _COUNT.unpack_from(payload, off)
+    off += _COUNT.size
+    for _ in range(n):
+        name, off = _unpack_str(payload, off)
+        idx, vals, off = _unpack_tank_entry(payload, off)
+        tanks[idx] = vals
+        tnames[idx] = name
+    (n,) = _COUNT.unpack_from(payload, off)
+    off += _COUNT.size
+    for _ in range(n):
+        name, off = _unpack_str(payload, off)
+        idx, vals, off = _unpack_pipe_entry(payload, off)
+        pipes[idx] = vals
+        pnames[idx] = name
+    return Decoded(seq, t, tanks, pipes, tnames, pnames)
+
+
+# ---- DELTA ----
+def pack_delta(seq: int, t: float, tank_entries: Sequence[bytes], pipe_entries: Sequence[bytes]) -> bytes:
+    """Sklada delte z gotowych (wspoldzielonych miedzy klientami) wpisow."""
+    payload = b"".join([
+        _SEQ.pack(seq, t),
+        _COUNT.pack(len(tank_entries)),
+        *tank_entries,
+        _COUNT.pack(len(pipe_entries)),
+        *pipe_entries,
+    ])
+    return frame(DELTA, payload)
+
+
+def unpack_delta(payload: bytes) -> Decoded:
+    seq, t = _SEQ.unpack_from(payload, 0)
+    off = _SEQ.size
+    tanks, pipes = {}, {}
+    (n,) = _COUNT.unpack_from(payload, off)
+    off += _COUNT.size
+    for _ in range(n):
+        idx, vals, off = _unpack_tank_entry(payload, off)
+        tanks[idx] = vals
+    (n,) = _COUNT.unpack_from(payload, off)
+    off += _COUNT.size
+    for _ in range(n):
+        idx, vals, off = _unpack_pipe_entry(payload, off)
+        pipes[idx] = vals
+    return Decoded(seq, t, tanks, pipes, {}, {})
+
+
+# ---- LOG / REPLY ----
+def pack_log(msg: str) -> bytes:
+    return frame(LOG, msg.encode("utf-8"))
+
+
+def unpack_log(payload: bytes) -> str:
+    return payload.decode("utf-8", errors="replace")
+
+
+def pack_reply(req_id: int, ok: bool, msg: str = "") -> bytes:
+    return frame(REPLY, _REPLY.pack(req_id, 1 if ok else 0) + msg.encode("utf-8"))
+
+
+def unpack_reply(payload: bytes) -> Tuple[int, bool, str]:
+    req_id, ok = _REPLY.unpack_from(payload, 0)
+    return req_id, bool(ok), payload[_REPLY.size:].decode("utf-8", errors="replace")
+
+
+# ---- SUBSCRIBE ----
+def pack_subscribe(tanks: Optional[Sequence[str]], pipes: Optional[Sequence[str]]) -> bytes:
+    """None = wszystkie encje danego typu."""
+    flags = 0
+    if tanks is None:
+        flags |= SUB_WSZYSTKIE_ZBIORNIKI
+    if pipes is None:
+        flags |= SUB_WSZYSTKIE_RURY
+    out = [_FLAGS.pack(flags)]
+    for names in (tanks or (), pipes or ()):
+        out.append(_COUNT.pack(len(names)))
+        out.extend(_pack_str(n) for n in names)
+    return frame(SUBSCRIBE, b"".join(out))
+
+
+def unpack_subscribe(payload: bytes) -> Tuple[Optional[List[str]], Optional[List[str]]]:
+    flags = payload[0]
+    off = 1
+    lists: List[List[str]] = []
+    for _ in range(2):
+        (n,) = _COUNT.unpack_from(payload, off)
+        off += _COUNT.size
+        names = []
+        for _ in range(n):
+            name, off = _unpack_str(payload, off)
+            names.append(name)
+        lists.append(names)
+    tanks = None if flags & SUB_WSZYSTKIE_ZBIORNIKI else lists[0]
+    pipes = None if flags & SUB_WSZYSTKIE_RURY else lists[1]
+    return tanks, pipes
+
+
+# ---- COMMAND ----
+def pack_command(req_id: int, k: Komenda) -> bytes:
+    return frame(COMMAND, _CMD_ID.pack(req_id) + k.pack())
+
+
+def unpack_command(payload: bytes) -> Tuple[int, Komenda]:
+    (req_id,) = _CMD_ID.unpack_from(payload, 0)
+    k, _ = Komenda.unpack_from(payload, _CMD_ID.size)
+    return req_id, k
@@ -0,0 +1,283 @@
+"""Serwer stanu bez GUI (asyncio): jedna Instalacja, wielu obserwatorow HMI.
+
+Serwer sam tyka symulacje i po kazdym ticku wysyla klientom tylko zmienione
+pola (DELTA). Nowy klient dostaje najpierw pelny SNAPSHOT. Klient moze
+zawezic subskrypcje do podzbioru zbiornikow/rur i wysylac komendy.
+
+Wpisy delty sa kodowane raz na tick i wspoldzielone przez wszystkich
+klientow - koszt ticku nie rosnie z liczba obserwatorow. Klient, ktory nie
+nadaza (pelny bufor zapisu), pomija delty i dostaje SNAPSHOT, gdy bufor
+sie oprozni.
+
+Start:
+    python main.py --headless --port 5020
+    python main.py --headless --unix /tmp/scada.sock
+"""
+
+from __future__ import annotations
+
+import asyncio
+import struct
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from ..model.commands import wykonaj
+from ..model.simulation import Instalacja
+from . import protocol as proto
+
+# powyzej tylu bajtow w buforze zapisu klient przechodzi w tryb resync
+WRITE_HIGH_WATER = 256 * 1024
+# najwieksza ramka od klienta (subskrypcja, komenda); dluzsza - rozlaczenie
+MAX_FRAME = 1 << 20
+
+
+@dataclass
+class _Client:
+    writer: asyncio.StreamWriter
+    tanks: Optional[Set[int]] = None   # None = wszystkie
+    pipes: Optional[Set[int]] = None
+    resync: bool = True                # wymaga pelnego SNAPSHOT
+    pending_logs: List[bytes] = field(default_factory=list)
+
+
+class StateServer:
+    """Tyka Instalacje w petli asyncio i publikuje stan przez TCP lub gniazdo Unix."""
+
+    def __init__(self, instalacja: Optional[Instalacja] = None, tick_s: float = 0.05):
+        self.tick_s = float(tick_s)
+        self._logs: List[str] = []
+        self.instalacja = instalacja or Instalacja()
+        # przechwyc logi instalacji i rozeslij je klientom
+        prev_cb = self.instalacja.log_cb
+
+        def _log_cb(msg: str) -> None:
+            self._logs.append(msg)
+            if prev_cb:
+                prev_cb(msg)
+
+        self.instalacja.log_cb = _log_cb
+
+        self._clients: Dict[asyncio.StreamWriter, _Client] = {}
+        self._seq = 0
+        self._t = 0.0
+        # ostatnio opublikowane wartosci (po zaokragleniu do float32)
+        self._last_tanks: List[proto.TankValues] = []
+        self._last_pipes: List[proto.PipeValues] = []
+        self._tank_idx = {z.nazwa: i for i, z in enumerate(self.instalacja.zbiorniki)}
+        self._pipe_idx = {p.nazwa: i for i, p in enumerate(self.instalacja.polaczenia)}
+        self._servers: List[asyncio.AbstractServer] = []
+        # dodatkowi odbiorcy stanu wolani po kazdym ticku (np. ModbusServer.refresh)
+        self.on_tick: List[Callable[[], None]] = []
+
+    # ---- Odczyt stanu ----
+    def _tank_values(self) -> List[proto.TankValues]:
+        f32 = proto.f32
+        return [(f32(z.poziom), f32(z.temperatura), f32(z.temp_zadana)) for z in self.instalacja.zbiorniki]
+
+    def _pipe_values(self) -> List[proto.PipeValues]:
+        out = []
+        for pol in self.instalacja.polaczenia:
+            fl = 0
+            if pol.rura.czy_plynie:
+                fl |= proto.F_PLYNIE
+            if pol.rura.kierunek < 0:
+                fl |= proto.F_WSTECZ
+            if pol.zawor_a.otwarty:
+                fl |= proto.F_ZAWOR_A
+            if pol.zawor_b.otwarty:
+                fl |= proto.F_ZAWOR_B
+            if pol.pompa.wlaczona:
+                fl |= proto.F_POMPA
+            out.append((fl, proto.f32(pol.pompa.predkosc)))
+        return out
+
+    def _snapshot_frame(self, c: _Client) -> bytes:
+        tanks = [
+            (i, z.nazwa, v)
+            for i, (z, v) in enumerate(zip(self.instalacja.zbiorniki, self._last_tanks))
+            if c.tanks is None or i in c.tanks
+        ]
+        pipes = [
+            (i, p.nazwa, v)
+            for i, (p, v) in enumerate(zip(self.instalacja.polaczenia, self._last_pipes))
+            if c.pipes is None or i in c.pipes
+        ]
+        return proto.pack_snapshot(self._seq, self._t, tanks, pipes)
+
+    # ---- Publikacja ----
+    def _diff(self) -> Tuple[List[Tuple[int, bytes]], List[Tuple[int, bytes]]]:
+        """Porownuje stan z ostatnio opublikowanym, zwraca zakodowane wpisy delty."""
+        tanks = self._tank_values()
+        pipes = self._pipe_values()
+        t_entries: List[Tuple[int, bytes]] = []
+        p_entries: List[Tuple[int, bytes]] = []
+
+        for i, (new, old) in enumerate(zip(tanks, self._last_tanks)):
+            if new == old:
+                continue
+            mask = 0
+            if new[0] != old[0]:
+                mask |= proto.T_POZIOM
+            if new[1] != old[1]:
+                mask |= proto.T_TEMP
+            if new[2] != old[2]:
+                mask |= proto.T_TEMP_ZADANA
+            t_entries.append((i, proto.pack_tank_entry(i, mask, new)))
+
+        for i, (new, old) in enumerate(zip(pipes, self._last_pipes)):
+            if new == old:
+                continue
+            mask = (proto.P_FLAGI if new[0] != old[0] else 0) | (proto.P_PREDKOSC if new[1] != old[1] else 0)
+            p_entries.append((i, proto.pack_pipe_entry(i, mask, new)))
+
+        self._last_tanks = tanks
+        self._last_pipes = pipes
+        return t_entries, p_entries
+
+    def _publish(self) -> None:
+        t_entries, p_entries = self._diff()
+        logs = [proto.pack_log(m) for m in self._logs]
+        self._logs.clear()
+
+        shared: Optional[bytes] = None  # delta dla klientow subskrybujacych wszystko
+        for c in list(self._clients.values()):
+            w = c.writer
+            if w.is_closing():
+                continue
+            if w.transport.get_write_buffer_size() > WRITE_HIGH_WATER:
+                # klient nie nadaza - nie dokladaj, wyslij SNAPSHOT po oproznieniu bufora
+                c.resync = True
+                c.pending_logs.extend(logs)
+                del c.pending_logs[:-100]
+                continue
+
+            if c.pending_logs:
+                w.write(b"".join(c.pending_logs))
+                c.pending_logs.clear()
+            if logs:
+                w.write(b"".join(logs))
+
+            if c.resync:
+                w.write(self._snapshot_frame(c))
+                c.resync = False
+                continue
+            if not t_entries and not p_entries:
+                continue
+
+            if c.tanks is None and c.pipes is None:
+                if shared is None:
+                    shared = proto.pack_delta(self._seq, self._t, [e for _, e in t_entries], [e for _, e in p_entries])
+                w.write(shared)
+            else:
+                te = [e for i, e in t_entries if c.tanks is None or i in c.tanks]
+                pe = [e for i, e in p_entries if c.pipes is None or i in c.pipes]
+                if te or pe:
+                    w.write(proto.pack_delta(self._seq, self._t, te, pe))
+
+    # ---- Obsluga klienta ----
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        c = _Client(writer)
+        self._clients[writer] = c
+        writer.write(self._snapshot_frame(c))
+        c.resync = False
+        try:
+            while True:
+                hdr = await reader.readexactly(proto.HEADER.size)
+                n, typ = proto.HEADER.unpack(hdr)
+                if n > MAX_FRAME:
+                    break  # bledny albo wrogi naglowek - bez buforowania n bajtow
+                payload = await reader.readexactly(n) if n else b""
+                if typ == proto.SUBSCRIBE:
+                    self._on_subscribe(c, payload)
+                elif typ == proto.COMMAND:
+                    self._on_command(c, payload)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._clients.pop(writer, None)
+            writer.close()
+
+    def _on_subscribe(self, c: _Client, payload: bytes) -> None:
+        try:
+            tanks, pipes = proto.unpack_subscribe(payload)
+        except (struct.error, IndexError, UnicodeDecodeError):
+            # bledna subskrypcja: odpowiedz z id 0 (komendy klienta maja id >= 1)
+            c.writer.write(proto.pack_reply(0, False, "Bledna subskrypcja"))
+            return
+        c.tanks = None if tanks is None else {self._tank_idx[n] for n in tanks if n in self._tank_idx}
+        c.pipes = None if pipes is None else {self._pipe_idx[n] for n in pipes if n in self._pipe_idx}
+        c.resync = False
+        c.writer.write(self._snapshot_frame(c))
+
+    def _on_command(self, c: _Client, payload: bytes) -> None:
+        try:
+            req_id, k = proto.unpack_command(payload)
+        except (struct.error, IndexError, UnicodeDecodeError):
+            # id komendy nieczytelne - odpowiedz z id 0 jak dla blednej subskrypcji
+            c.writer.write(proto.pack_reply(0, False, "Bledna komenda"))
+            return
+        try:
+            err = wykonaj(self.instalacja, k)
+        except (KeyError, IndexError, ValueError) as e:
+            err = f"Bledna komenda: {e}"
+        c.writer.write(proto.pack_reply(req_id, err is None, err or ""))
+
+    # ---- Petla ----
+    async def _tick_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        last = loop.time()
+        while True:
+            await asyncio.sleep(self.tick_s)
+            now = loop.time()
+            dt = max(0.001, now - last)
+            last = now
+            self.instalacja.tick(dt)
+            self._seq = (self._seq + 1) & 0xFFFFFFFF
+            self._t += dt
+            for cb in self.on_tick:
+                cb()
+            self._publish()
+
+    async def start(self, host: Optional[str] = "127.0.0.1", port: Optional[int] = 5020, unix_path: Optional[str] = None) -> None:
+        self._last_tanks = self._tank_values()
+        self._last_pipes = self._pipe_values()
+        if unix_path:
+            self._servers.append(await asyncio.start_unix_server(self._handle, path=unix_path))
+        if port is not None:
+            self._servers.append(await asyncio.start_server(self._handle, host, port))
+
+    async def serve_forever(self, host: Optional[str] = "127.0.0.1", port: Optional[int] = 5020, unix_path: Optional[str] = None) -> None:
+        await self.start(host, port, unix_path)
+        try:
+            await self._tick_loop()
+        finally:
+            for s in self._servers:
+                s.close()
+            for w in list(self._clients):
+                w.close()
+
+
+def run_server(
+    host: str = "127.0.0.1",
+    port: Optional[int] = 5020,
+    unix_path: Optional[str] = None,
+    tick_s: float = 0.05,
+    modbus_port: Optional[int] = None,
+    hydraulika: bool = False,
+    regulacja: bool = False,
+) -> None:
+    server = StateServer(Instalacja(log_cb=print, hydraulika=hydraulika, regulacja=regulacja), tick_s=tick_s)
+
+    async def _main() -> None:
+        if modbus_port is not None:
+            from .modbus_server import ModbusServer
+
+            mb = ModbusServer(server.instalacja)
+            await mb.start(host, modbus_port)
+            server.on_tick.append(mb.refresh)
+        await server.serve_forever(host, port, unix_path)
+
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        pass
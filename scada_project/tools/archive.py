@@ -0,0 +1,127 @@
+"""Archiwum historii: statystyki, zapytania i generowanie danych testowych.
+
+Start:
+    python -m scada_project.tools.archive stats historia/
+    python -m scada_project.tools.archive query historia/ -s T1.poziom -s P12.wlaczona --last 600
+    python -m scada_project.tools.archive synth /tmp/arch --hours 6 --tanks 40
+
+synth symuluje instalacje (20 Hz, czas symulowany) z losowymi komendami
+operatora i zapisuje ja do archiwum; na koncu wypisuje stopien kompresji.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import datetime, timezone
+
+from ..model.archive import Archive, plant_sample, plant_series
+from ..model.commands import Komenda, wykonaj
+from ..model.simulation import Instalacja, ZegarReczny
+
+
+def _fmt_size(n: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if n < 1024 or unit == "GiB":
+            return f"{n:.1f} {unit}"
+        n /= 1024.0
+    return f"{n:.1f} GiB"
+
+
+def cmd_stats(args) -> None:
+    a = Archive(args.dir)
+    try:
+        st = a.stats()
+        rng = a.time_range()
+    finally:
+        a.close()
+    if rng is None:
+        print("Archiwum puste")
+        return
+    t0, t1 = (datetime.fromtimestamp(t, timezone.utc) for t in rng)
+    print(f"zakres: {t0:%Y-%m-%d %H:%M:%S} .. {t1:%Y-%m-%d %H:%M:%S} UTC")
+    print(f"porcje: {st['chunks']}, probki: {st['samples']}")
+    print(f"rozmiar: {_fmt_size(st['bytes'])} (surowo {_fmt_size(st['raw_bytes'])}, x{st['ratio']:.1f})")
+
+
+def cmd_query(args) -> None:
+    a = Archive(args.dir)
+    try:
+        t1 = args.to if args.to is not None else time.time()
+        t0 = args.frm if args.frm is not None else t1 - args.last
+        t_dec = time.perf_counter()
+        times, cols = a.query(args.series, t0, t1)
+        t_dec = time.perf_counter() - t_dec
+    finally:
+        a.close()
+    print("t," + ",".join(args.series))
+    step = max(1, len(times) // args.limit) if args.limit else 1
+    for i in range(0, len(times), step):
+        print(f"{times[i]:.3f}," + ",".join(f"{cols[n][i]:g}" for n in args.series))
+    print(f"# {len(times)} probek, dekodowanie {t_dec * 1e3:.1f} ms")
+
+
+def cmd_synth(args) -> None:
+    z = ZegarReczny(args.start if args.start is not None else time.time() - args.hours * 3600.0)
+    inst = Instalacja(clock=z, liczba_zbiornikow=args.tanks)
+    a = Archive(args.dir, *plant_series(inst), chunk_s=args.chunk)
+    rng = random.Random(args.seed)
+    dt = 1.0 / args.hz
+    n = int(args.hours * 3600.0 * args.hz)
+    wall = time.perf_counter()
+    for i in range(n):
+        # co ~2 min losowa komenda operatora
+        if rng.random() < dt / 120.0:
+            p = rng.randrange(len(inst.polaczenia))
+            k = rng.choice([
+                Komenda.zawor(p, rng.choice("ab"), rng.random() < 0.5),
+                Komenda.pompa(p, rng.choice([0.0, 0.3, 0.6, 1.0])),
+                Komenda.napelnij(rng.choice(inst.zbiorniki).nazwa, 30.0),
+                Komenda.temp_zadana(rng.choice(inst.zbiorniki).nazwa, rng.choice([20.0, 45.0, 70.0])),
+            ])
+            wykonaj(inst, k)
+        z.t += dt
+        inst.tick(dt)
+        a.append(z.t, *plant_sample(inst))
+    a.close()
+    st = a.stats()
+    print(
+        f"{n} probek x {len(a.float_names)} float + {len(a.bit_names)} bit w {time.perf_counter() - wall:.1f} s; "
+        f"archiwum {_fmt_size(st['bytes'])}, surowo {_fmt_size(st['raw_bytes'])} (x{st['ratio']:.1f})"
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Archiwum historii procesu")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("stats", help="zakres, rozmiar i kompresja")
+    p.add_argument("dir")
+    p.set_defaults(fn=cmd_stats)
+
+    p = sub.add_parser("query", help="serie w przedziale czasu (CSV na stdout)")
+    p.add_argument("dir")
+    p.add_argument("-s", "--series", action="append", required=True)
+    p.add_argument("--from", dest="frm", type=float, default=None, help="poczatek [s epoki]")
+    p.add_argument("--to", type=float, default=None, help="koniec [s epoki] (domyslnie teraz)")
+    p.add_argument("--last", type=float, default=3600.0, help="ostatnie N sekund (bez --from)")
+    p.add_argument("--limit", type=int, default=50, help="najwyzej tyle wierszy (0 - wszystkie)")
+    p.set_defaults(fn=cmd_query)
+
+    p = sub.add_parser("synth", help="symulacja zapisywana do archiwum")
+    p.add_argument("dir")
+    p.add_argument("--hours", type=float, default=1.0)
+    p.add_argument("--tanks", type=int, default=4)
+    p.add_argument("--hz", type=float, default=20.0)
+    p.add_argument("--chunk", type=float, default=600.0, help="dlugosc porcji [s]")
+    p.add_argument("--start", type=float, default=None, help="czas poczatku [s epoki]")
+    p.add_argument("--seed", type=int, default=1)
+    p.set_defaults(fn=cmd_synth)
+
+    args = ap.parse_args()
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+"""Benchmarki symulacji, rysowania i zdarzen (bez ekranu).
+
+Przypadki:
+- tick/N          Instalacja.tick dla N zbiornikow (pompy pracuja),
+- flow/N, flow_hyd/N
+                  sam etap przeplywu (tryb prosty / solwer hydrauliczny)
+                  z mieszaniem temperatur i bilansem energii; /nomix - bez
+                  (przeplyw jak przed mieszaniem),
+- snapshot_pygame MainWindow._snapshot_for_pygame,
+- plots_push      LivePlots.push + render Agg,
+- pygame_frame    jedna klatka PygameView (SDL_VIDEODRIVER=dummy),
+- pygame_view/N   snapshot + klatka dla N zbiornikow: skala 1 (fragment
+                  instalacji, odciecie indeksem) i /fit (cala, tryb LOD),
+- tank_paint      TankWidget.paintEvent (QT_QPA_PLATFORM=offscreen),
+- tank_panel/N    TankPanel: aktualizacja N zbiornikow + odmalowanie widoku,
+- bus_emit/N      EventBus.emit z N subskrybentami,
+- pid_bank/N      krok banku N regulatorow PID (model.control; wymaga numpy),
+- regulacja/N     Regulacja.krok dla N zbiornikow (petle TC i LC w auto):
+                  odczyt pomiarow, krok banku i ustawienie pomp.
+
+Kazdy przypadek jest kalibrowany do ~min_time_s na powtorzenie; wynik to
+min i mediana czasu jednego wywolania z `repeat` powtorzen. Przypadki,
+ktorych zaleznosci (PyQt5, pygame, matplotlib) brakuje, sa pomijane.
+
+Start:
+    python -m scada_project.tools.bench run -o wyniki.json
+    python -m scada_project.tools.bench run -k tick --repeat 9
+    python -m scada_project.tools.bench compare baza.json wyniki.json --threshold 0.15
+
+compare porownuje mediany i konczy sie kodem 1, gdy ktorys przypadek jest
+wolniejszy o wiecej niz threshold (ulamek).
+"""
+
+from __future__ import annotations
+
+import os
+
+# bez ekranu - musi byc ustawione przed importem Qt / pygame / matplotlib
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import threading
+import time
+import types
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..model.simulation import Instalacja
+from ..utils.event_bus import EventBus
+from ..utils.tracing import Tracer
+
+TICK_SIZES = (4, 40, 400)
+BUS_SUBSCRIBERS = (1, 2, 5, 10)
+VIEW_SIZES = (40, 1000)
+PANEL_SIZES = (4, 400)
+PID_SIZES = (1, 100, 1000)
+REG_SIZES = (4, 100, 1000)
+FLOW_SIZES = (40, 400)
+
+# przypadek: nazwa -> funkcja przygotowujaca, zwracajaca wywolanie do pomiaru
+Case = Callable[[], Callable[[], None]]
+
+
+# ---- Przygotowanie ----
+def _plant(n: int = 4) -> Instalacja:
+    """Instalacja z woda w co drugim zbiorniku i wszystkimi pompami w ruchu."""
+    inst = Instalacja(liczba_zbiornikow=n)
+    for i, z in enumerate(inst.zbiorniki):
+        z.aktualna_ilosc = z.pojemnosc * (0.6 if i % 2 == 0 else 0.2)
+        z.aktualizuj_poziom()
+        z.temp_zadana = 60.0
+    for i in range(len(inst.polaczenia)):
+        inst.wymus_otworz_zawory_dla_pompy(i)
+        inst.ustaw_pompe_predkosc(i, 0.5)
+    return inst
+
+
+_app = None
+
+
+def _qapp():
+    global _app
+    from PyQt5.QtWidgets import QApplication
+
+    # referencja modulowa - inaczej QApplication zostalby od razu zwolniony
+    if QApplication.instance() is None:
+        _app = QApplication([])
+    return QApplication.instance()
+
+
+def _case_tick(n: int) -> Case:
+    def setup() -> Callable[[], None]:
+        inst = _plant(n)
+        return lambda: inst.tick(0.05)
+
+    return setup
+
+
+def _case_flow(n: int, hydraulika: bool, mix: bool) -> Case:
+    def setup() -> Callable[[], None]:
+        inst = _plant(n)
+        for i, z in enumerate(inst.zbiorniki):
+            z.temperatura = 20.0 + 3.0 * (i % 20)
+        if hydraulika:
+            from ..model.hydraulics import HydraulicSolver
+
+            inst.hydraulika = HydraulicSolver(inst)
+        inst.mieszanie = mix
+        # tryb prosty: krotki dt - zbiorniki nie oprozniaja sie w trakcie pomiaru
+        # (ta sama praca na wywolanie); solwer: jeden krok krok_s na wywolanie
+        dt = inst.hydraulika.krok_s if hydraulika else 1e-6
+        return lambda: inst._etap_przeplyw(dt, 0.0)
+
+    return setup
+
+
+def _case_snapshot() -> Callable[[], None]:
+    from ..ui.main_window import MainWindow
+
+    # metoda potrzebuje tylko instalacji i blokady - bez budowania okna
+    host = types.SimpleNamespace(instalacja=_plant(), _lock=threading.Lock(), tracer=Tracer())
+    return lambda: MainWindow._snapshot_for_pygame(host)
+
+
+def _case_plots_push() -> Callable[[], None]:
+    _qapp()
+    from ..viz.mpl_plots import LivePlots
+
+    inst = _plant()
+    plots = LivePlots(history_s=120.0, maxlen=800)
+    state = {"t": 0.0}
+
+    def run() -> None:
+        inst.tick(0.05)
+        state["t"] += 0.05
+        plots.push(
+            state["t"],
+            {z.nazwa: z.poziom * 100.0 for z in inst.zbiorniki},
+            {z.nazwa: z.temperatura for z in inst.zbiorniki},
+        )
+        plots.canvas.draw()  # draw_idle tylko planuje; mierzymy render Agg
+
+    # pelne okno historii, jak w dzialajacej aplikacji (bez 800 renderow rozgrzewki)
+    names = [z.nazwa for z in inst.zbiorniki]
+    plots._t0 = 0.0
+    plots._ensure(names)
+    for i in range(plots.maxlen):
+        t = i * 0.05
+        for n in names:
+            for ser, y in ((plots._series_level[n], 50.0), (plots._series_temp[n], 20.0)):
+                ser.x.append(t)
+                ser.y.append(y)
+    state["t"] = plots.maxlen * 0.05
+    return run
+
+
+def _case_pygame_frame() -> Callable[[], None]:
+    import pygame
+
+    from ..viz.pygame_view import PlantSnapshot, PipeSnapshot, PygameView, TankSnapshot
+
+    inst = _plant()
+    inst.tick(0.05)
+    snap = PlantSnapshot(
+        [TankSnapshot(z.nazwa, z.x, z.y, z.width, z.height, z.poziom, z.temperatura) for z in inst.zbiorniki],
+        [
+            PipeSnapshot(p.nazwa, list(p.rura.punkty), p.rura.czy_plynie, p.rura.kierunek,
+                         p.pompa.predkosc, p.zawor_a.otwarty, p.zawor_b.otwarty)
+            for p in inst.polaczenia
+        ],
+    )
+    pygame.init()
+    screen = pygame.display.set_mode((980, 520))
+    font = pygame.font.SysFont(None, 18)
+    view = PygameView(lambda visible=None: snap)
+
+    def run() -> None:
+        view.draw_frame(screen, font, snap, 1.0 / 60.0)
+        pygame.display.flip()
+
+    return run
+
+
+def _case_pygame_view(n: int, fit: bool) -> Case:
+    def setup() -> Callable[[], None]:
+        import pygame
+
+        from ..ui.main_window import MainWindow
+        from ..viz.pygame_view import PygameView
+
+        host = types.SimpleNamespace(instalacja=_plant(n), _lock=threading.Lock(), tracer=Tracer())
+        host.instalacja.tick(0.05)
+        pygame.init()
+        screen = pygame.display.set_mode((980, 520))
+        font = pygame.font.SysFont(None, 18)
+        view = PygameView(lambda visible=None: MainWindow._snapshot_for_pygame(host, visible))
+        view._take_snapshot()  # pelny snapshot -> indeks
+        if fit:
+            view.fit_all()
+        else:
+            view.viewport.scale = 1.0
+            view.viewport.ox = view.viewport.oy = 0.0
+
+        def run() -> None:
+            view.draw_frame(screen, font, view._take_snapshot(), 1.0 / 60.0)
+            pygame.display.flip()
+
+        return run
+
+    return setup
+
+
+def _case_tank_paint() -> Callable[[], None]:
+    _qapp()
+    from PyQt5.QtGui import QImage
+
+    from ..ui.tank_widget import Zbiornik as TankWidget
+
+    w = TankWidget()
+    w.resize(250, 340)
+    w.setPolozenie(25, 20)
+    w.setName("T1")
+    w.setPoziom(0.6)
+    w.setTemp(45.0)
+    img = QImage(w.size(), QImage.Format_ARGB32_Premultiplied)
+    return lambda: w.render(img)  # render() wywoluje paintEvent
+
+
+def _case_tank_panel(n: int) -> Case:
+    def setup() -> Callable[[], None]:
+        _qapp()
+        from PyQt5.QtGui import QImage, QPainter
+
+        from ..ui.tank_scene import TankPanel
+
+        inst = _plant(n)
+        panel = TankPanel([z.nazwa for z in inst.zbiorniki])
+        panel.resize(1000, 360)
+        img = QImage(panel.viewport().size(), QImage.Format_ARGB32_Premultiplied)
+        dt = 0.05
+
+        def run() -> None:
+            inst.tick(dt)
+            panel.update_tanks((z.nazwa, z.poziom, z.temperatura) for z in inst.zbiorniki)
+            p = QPainter(img)
+            panel.render(p)
+            p.end()
+
+        return run
+
+    return setup
+
+
+def _case_bus(n: int) -> Case:
+    def setup() -> Callable[[], None]:
+        bus = EventBus()
+        sink: List = []
+        for _ in range(n):
+            bus.subscribe(sink.append)
+
+        def run() -> None:
+            bus.emit("bench")
+            sink.clear()
+
+        return run
+
+    return setup
+
+
+def _case_pid(n: int) -> Case:
+    def setup() -> Callable[[], None]:
+        import numpy as np
+
+        from ..model.control import RegulatorBank
+
+        bank = RegulatorBank()
+        for k in range(n):
+            bank.dodaj(kp=2.0, ki=0.1, kd=0.5, sp=1.0, tf=0.5, auto=k % 4 != 0)
+        pv = np.linspace(0.0, 2.0, n)
+        return lambda: bank.step(pv, 0.1)
+
+    return setup
+
+
+def _case_regulacja(n: int) -> Case:
+    def setup() -> Callable[[], None]:
+        inst = _plant(n)
+        inst.wlacz_regulacje()
+        reg = inst.regulacja
+        for p in list(reg.petle.values()):
+            if p.rodzaj == "poziom":
+                reg.auto(p.nazwa, 0.4)
+        return lambda: reg.krok(0.1, 0.0)
+
+    return setup
+
+
+def cases() -> Dict[str, Case]:
+    out: Dict[str, Case] = {}
+    for n in TICK_SIZES:
+        out[f"tick/{n}"] = _case_tick(n)
+    for n in FLOW_SIZES:
+        out[f"flow/{n}"] = _case_flow(n, False, True)
+        out[f"flow/{n}/nomix"] = _case_flow(n, False, False)
+        out[f"flow_hyd/{n}"] = _case_flow(n, True, True)
+        out[f"flow_hyd/{n}/nomix"] = _case_flow(n, True, False)
+    out["snapshot_pygame"] = _case_snapshot
+    out["plots_push"] = _case_plots_push
+    out["pygame_frame"] = _case_pygame_frame
+    for n in VIEW_SIZES:
+        out[f"pygame_view/{n}"] = _case_pygame_view(n, fit=False)
+        out[f"pygame_view/{n}/fit"] = _case_pygame_view(n, fit=True)
+    out["tank_paint"] = _case_tank_paint
+    for n in PANEL_SIZES:
+        out[f"tank_panel/{n}"] = _case_tank_panel(n)
+    for n in BUS_SUBSCRIBERS:
+        out[f"bus_emit/{n}"] = _case_bus(n)
+    for n in PID_SIZES:
+        out[f"pid_bank/{n}"] = _case_pid(n)
+    for n in REG_SIZES:
+        out[f"regulacja/{n}"] = _case_regulacja(n)
+    return out
+
+
+# ---- Pomiar ----
+def measure(fn: Callable[[], None], repeat: int = 5, min_time_s: float = 0.2) -> Dict[str, float]:
+    """Kalibruje liczbe petli (jak timeit) i zwraca czasy jednego wywolania."""
+    fn()  # rozgrzewka
+    loops = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time_s or loops >= 1 << 20:
+            break
+        loops *= 2 if elapsed <= 0 else max(2, min(10, int(min_time_s / elapsed) + 1))
+    times = [elapsed / loops]
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        times.append((time.perf_counter() - t0) / loops)
+    return {"min_s": min(times), "median_s": statistics.median(times), "loops": loops, "repeat": repeat}
+
+
+def run_all(only: Optional[str] = None, repeat: int = 5, min_time_s: float = 0.2, out=sys.stdout) -> Dict:
+    results: Dict[str, Dict] = {}
+    skipped: Dict[str, str] = {}
+    for name, setup in cases().items():
+        if only and only not in name:
+            continue
+        try:
+            fn = setup()
+        except ImportError as e:
+            skipped[name] = str(e)
+            print(f"{name:<18} pominiety ({e})", file=out)
+            continue
+        r = measure(fn, repeat, min_time_s)
+        results[name] = r
+        print(f"{name:<18} {_fmt(r['median_s']):>10}  (min {_fmt(r['min_s'])}, {r['loops']} x {r['repeat']})", file=out)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def _fmt(s: float) -> str:
+    if s < 1e-6:
+        return f"{s * 1e9:.0f} ns"
+    if s < 1e-3:
+        return f"{s * 1e6:.2f} us"
+    return f"{s * 1e3:.2f} ms"
+
+
+# ---- Porownanie ----
+def compare(base: Dict, new: Dict, threshold: float = 0.10) -> List[Tuple[str, float, float, float, bool]]:
+    """Zwraca (nazwa, baza, nowy, zmiana, regresja?) dla wspolnych przypadkow."""
+    rows = []
+    for name, b in base["results"].items():
+        n = new["results"].get(name)
+        if n is None:
+            continue
+        change = n["median_s"] / b["median_s"] - 1.0 if b["median_s"] > 0 else 0.0
+        rows.append((name, b["median_s"], n["median_s"], change, change > threshold))
+    return rows
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmarki instalacji (bez ekranu)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("run", help="uruchom benchmarki")
+    r.add_argument("-o", "--out", default=None, help="zapis wynikow JSON")
+    r.add_argument("-k", dest="only", default=None, help="tylko przypadki zawierajace tekst")
+    r.add_argument("--repeat", type=int, default=5)
+    r.add_argument("--min-time", type=float, default=0.2, help="minimalny czas powtorzenia [s]")
+
+    c = sub.add_parser("compare", help="porownaj wyniki z baza")
+    c.add_argument("base")
+    c.add_argument("new")
+    c.add_argument("--threshold", type=float, default=0.10, help="dopuszczalne spowolnienie (ulamek)")
+    args = ap.parse_args()
+
+    if args.cmd == "run":
+        res = run_all(args.only, args.repeat, args.min_time)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(res, f, indent=2)
+            print(f"Zapisano: {args.out}")
+        return
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    rows = compare(base, new, args.threshold)
+    for name, b, n, change, bad in rows:
+        flag = "  REGRESJA" if bad else ""
+        print(f"{name:<18} {_fmt(b):>10} -> {_fmt(n):>10}  {change * 100:+6.1f}%{flag}")
+    missing = sorted(set(base["results"]) - set(new["results"]))
+    if missing:
+        print("Brak w nowych wynikach: " + ", ".join(missing))
+    n_bad = sum(1 for row in rows if row[4])
+    print(f"Regresje (> {args.threshold * 100:.0f}%): {n_bad}")
+    sys.exit(1 if n_bad else 0)
+
+
+if __name__ == "__main__":
+    main()
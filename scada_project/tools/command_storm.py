@@ -0,0 +1,278 @@
+"""Burza komend: wielu operatorow/skryptow naraz a blokada instalacji i bus zdarzen.
+
+Droga komendy jak w ui.main_window: TimedLock -> wykonaj() -> log instalacji
+-> EventBus.emit -> subskrybenci (w watku komendy, pod blokada). Bez Qt:
+watek ticku w miejsce QTimer (--tick-hz) i subskrybenci zastepczy -
+synchroniczny o koszcie CPU --sub-us (jak dopisanie do listy alertow) oraz
+kolejka z watkiem odbiorcy (jak log Tk). N watkow wysyla komendy wg
+mieszanki --mix z zadana czestotliwoscia (--rate na watek, 0 - bez limitu).
+
+Raport: komendy/s (zadane i osiagniete, odrzucone przez blokady pomp),
+oczekiwanie na blokade osobno dla komend i ticku, czas komendy, jitter
+ticku (spoznienie startu wzgledem harmonogramu) i opoznienie dostarczenia
+zdarzen (emit -> odbiorca kolejki). Kwantyle z histogramow utils.metrics
+(gorne granice kubelkow, co 2x).
+
+--sweep uruchamia kolejne poziomy liczby watkow; nasycenie to pierwszy
+poziom, na ktorym osiagnieta przepustowosc jest ponizej 90% zadanej (albo
+przestaje rosnac przy --rate 0) lub p99 jitteru ticku przekracza okres ticku.
+
+Start:
+    python -m scada_project.tools.command_storm --threads 8 --rate 50 --seconds 5
+    python -m scada_project.tools.command_storm --threads 4 --rate 0 --mix zawor=1,pompa=1
+    python -m scada_project.tools.command_storm --sweep 1,2,4,8,16,32 --rate 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import queue
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..model.commands import Komenda, wykonaj
+from ..model.simulation import Instalacja
+from ..utils.event_bus import EventBus, LogEvent
+from ..utils.metrics import Metrics, TimedLock
+
+# rodzaj w --mix -> generator komendy
+_KINDS: Dict[str, Callable[[Instalacja, random.Random], Komenda]] = {
+    "zawor": lambda inst, rng: Komenda.zawor(rng.randrange(len(inst.polaczenia)), rng.choice("ab"), rng.random() < 0.5),
+    "pompa": lambda inst, rng: Komenda.pompa(rng.randrange(len(inst.polaczenia)), rng.choice([0.0, 0.3, 0.6, 1.0])),
+    "napelnij": lambda inst, rng: Komenda.napelnij(rng.choice(inst.zbiorniki).nazwa, rng.choice([3.0, 15.0])),
+    "oproznij": lambda inst, rng: Komenda.oproznij(rng.choice(inst.zbiorniki).nazwa, rng.choice([3.0, 15.0])),
+    "temp": lambda inst, rng: Komenda.temp_zadana(rng.choice(inst.zbiorniki).nazwa, rng.choice([20.0, 45.0, 70.0])),
+}
+DEFAULT_MIX = "zawor=4,pompa=3,napelnij=1,oproznij=1,temp=2"
+
+
+def parse_mix(text: str) -> List[Tuple[str, float]]:
+    out = []
+    for part in text.split(","):
+        name, _, w = part.partition("=")
+        name = name.strip()
+        if name not in _KINDS:
+            raise ValueError(f"Nieznany rodzaj komendy w mieszance: {name!r} (dostepne: {', '.join(_KINDS)})")
+        out.append((name, float(w) if w else 1.0))
+    if not any(w > 0 for _, w in out):
+        raise ValueError("Mieszanka bez komend")
+    return out
+
+
+def _spin(seconds: float) -> None:
+    # koszt CPU (jak praca subskrybenta GUI), nie sleep - sleep zwalnia GIL
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def _stat(m: Metrics, name: str, label: str = "") -> Tuple[int, float, float, float]:
+    """(liczba, p50, p99, max) histogramu `name` z etykieta `label`."""
+    for metryka, lab, count, _mean, p50, p99, mx in m.rows():
+        if metryka == name and lab == label:
+            # granica kubelka moze przekraczac najwieksza obserwacje
+            return count, min(p50, mx), min(p99, mx), mx
+    return 0, 0.0, 0.0, 0.0
+
+
+def run_storm(
+    threads: int = 8,
+    rate: float = 50.0,
+    seconds: float = 5.0,
+    mix: str = DEFAULT_MIX,
+    tick_hz: float = 20.0,
+    tanks: int = 4,
+    sub_us: float = 50.0,
+    hydraulika: bool = False,
+    seed: int = 1,
+) -> Dict[str, float]:
+    kinds = parse_mix(mix)
+    names = [k for k, _ in kinds]
+    weights = [w for _, w in kinds]
+
+    m = Metrics(enabled=True)
+    bus = EventBus(m)
+    inst = Instalacja(log_cb=bus.emit, liczba_zbiornikow=tanks, hydraulika=hydraulika)
+    # jedna blokada, dwa liczniki oczekiwania: komendy i tick
+    inner = threading.Lock()
+    lock_cmd = TimedLock(inner, m, "command")
+    lock_tick = TimedLock(inner, m, "tick")
+
+    # subskrybenci zastepczy
+    q: "queue.Queue[Optional[LogEvent]]" = queue.Queue()
+
+    def alerts_sub(ev: LogEvent) -> None:
+        _spin(sub_us * 1e-6)
+
+    def log_sub(ev: LogEvent) -> None:
+        q.put(ev)
+
+    bus.subscribe(alerts_sub)
+    bus.subscribe(log_sub)
+
+    def consumer() -> None:
+        while True:
+            ev = q.get()
+            if ev is None:
+                return
+            m.observe("event_lag_seconds", max(0.0, time.time() - ev.timestamp.timestamp()))
+
+    stop = threading.Event()
+    tick_period = 1.0 / tick_hz
+    missed = [0]
+
+    def ticker() -> None:
+        t_next = time.perf_counter() + tick_period
+        prev = time.perf_counter()
+        while not stop.is_set():
+            now = time.perf_counter()
+            if now < t_next:
+                time.sleep(t_next - now)
+            start = time.perf_counter()
+            m.observe("tick_jitter_seconds", max(0.0, start - t_next))
+            with lock_tick:
+                inst.tick(start - prev)
+            prev = start
+            m.observe("tick_seconds", time.perf_counter() - start)
+            t_next += tick_period
+            if start - t_next > tick_period:
+                # spoznienie wieksze niz okres: pominiete ticki (jak QTimer)
+                skipped = int((start - t_next) / tick_period)
+                missed[0] += skipped
+                t_next += skipped * tick_period
+
+    sent = [0] * threads
+    rejected = [0] * threads
+
+    def operator(idx: int) -> None:
+        rng = random.Random(seed * 1000 + idx)
+        period = 1.0 / rate if rate > 0 else 0.0
+        # rozlozenie startow watkow w okresie
+        t_next = time.perf_counter() + rng.random() * period
+        while not stop.is_set():
+            if period:
+                now = time.perf_counter()
+                if now < t_next:
+                    time.sleep(t_next - now)
+                    now = t_next
+                t_next += period
+                if now - t_next > 1.0:
+                    t_next = now  # bez nadrabiania zaleglosci seria komend
+            k = _KINDS[rng.choices(names, weights)[0]](inst, rng)
+            t0 = time.perf_counter()
+            with lock_cmd:
+                err = wykonaj(inst, k)
+            m.observe("command_seconds", time.perf_counter() - t0)
+            sent[idx] += 1
+            if err:
+                rejected[idx] += 1
+
+    th_cons = threading.Thread(target=consumer, daemon=True)
+    th_tick = threading.Thread(target=ticker, daemon=True)
+    ops = [threading.Thread(target=operator, args=(i,), daemon=True) for i in range(threads)]
+    th_cons.start()
+    th_tick.start()
+    t0 = time.perf_counter()
+    for t in ops:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in ops + [th_tick]:
+        t.join(timeout=5.0)
+    elapsed = time.perf_counter() - t0
+    q.put(None)
+    th_cons.join(timeout=5.0)
+
+    n = sum(sent)
+    res: Dict[str, float] = {
+        "threads": threads,
+        "target_cps": threads * rate if rate > 0 else 0.0,
+        "commands": n,
+        "cps": n / elapsed if elapsed > 0 else 0.0,
+        "rejected": sum(rejected),
+        "ticks_missed": missed[0],
+        "tick_period_ms": tick_period * 1e3,
+    }
+    for key, name, label in (
+        ("lock_cmd", "lock_wait_seconds", "command"),
+        ("lock_tick", "lock_wait_seconds", "tick"),
+        ("command", "command_seconds", ""),
+        ("tick", "tick_seconds", ""),
+        ("jitter", "tick_jitter_seconds", ""),
+        ("event_lag", "event_lag_seconds", ""),
+    ):
+        count, p50, p99, mx = _stat(m, name, label)
+        res[key + "_n"] = count
+        res[key + "_p50_ms"] = p50 * 1e3
+        res[key + "_p99_ms"] = p99 * 1e3
+        res[key + "_max_ms"] = mx * 1e3
+    return res
+
+
+def _report(r: Dict[str, float]) -> str:
+    target = f"{r['target_cps']:.0f}" if r["target_cps"] else "bez limitu"
+    lines = [
+        f"watki={r['threads']}  zadane={target} kom/s  osiagniete={r['cps']:.0f} kom/s  "
+        f"(komend {r['commands']}, odrzuconych {r['rejected']}, pominietych tickow {r['ticks_missed']})"
+    ]
+    for key, title in (
+        ("lock_cmd", "blokada: komendy"),
+        ("lock_tick", "blokada: tick"),
+        ("command", "czas komendy"),
+        ("tick", "czas ticku"),
+        ("jitter", "jitter ticku"),
+        ("event_lag", "opoznienie zdarzen"),
+    ):
+        lines.append(
+            f"  {title:<20} p50={r[key + '_p50_ms']:8.3f} ms  p99={r[key + '_p99_ms']:8.3f} ms  "
+            f"max={r[key + '_max_ms']:8.3f} ms  (n={r[key + '_n']})"
+        )
+    return "\n".join(lines)
+
+
+def saturated(r: Dict[str, float], prev: Optional[Dict[str, float]]) -> bool:
+    if r["jitter_p99_ms"] > r["tick_period_ms"]:
+        return True
+    if r["target_cps"]:
+        return r["cps"] < 0.9 * r["target_cps"]
+    # bez limitu: kolejny poziom nie daje wiecej niz 5%
+    return prev is not None and r["cps"] < 1.05 * prev["cps"]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Burza komend: blokada instalacji i bus zdarzen")
+    ap.add_argument("--threads", type=int, default=8, help="watki wysylajace komendy")
+    ap.add_argument("--rate", type=float, default=50.0, help="komend/s na watek (0 - bez limitu)")
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--mix", default=DEFAULT_MIX, help="wagi rodzajow komend: " + ",".join(_KINDS))
+    ap.add_argument("--tick-hz", type=float, default=20.0)
+    ap.add_argument("--tanks", type=int, default=4)
+    ap.add_argument("--sub-us", type=float, default=50.0, help="koszt CPU subskrybenta synchronicznego [us]")
+    ap.add_argument("--hydraulika", action="store_true")
+    ap.add_argument("--sweep", default=None, help="liczby watkow po przecinku, np. 1,2,4,8,16")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    try:
+        parse_mix(args.mix)
+    except ValueError as e:
+        ap.error(str(e))
+    levels = [int(x) for x in args.sweep.split(",")] if args.sweep else [args.threads]
+    prev = None
+    for n in levels:
+        r = run_storm(
+            n, args.rate, args.seconds, args.mix, args.tick_hz, args.tanks, args.sub_us, args.hydraulika, args.seed
+        )
+        print(_report(r), flush=True)
+        if args.sweep and saturated(r, prev):
+            print(f"Nasycenie przy {n} watkach ({r['cps']:.0f} kom/s)")
+            return
+        prev = r
+    if args.sweep:
+        print("Bez nasycenia w badanym zakresie")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Eksport historii (archiwum) i dziennika zdarzen do plikow.
+
+Start:
+    python -m scada_project.tools.export history historia/ poziomy.csv.gz --last 86400 -s "*.poziom"
+    python -m scada_project.tools.export history historia/ t1.npy --entity T1 --from 1700000000 --to 1700003600
+    python -m scada_project.tools.export events historia/ zdarzenia.jsonl --entity P12
+
+Format i kompresja wynikaja z rozszerzenia pliku (csv/jsonl/npy, .gz/.bz2/.xz),
+chyba ze podano --format/--compress. Pamiec nie zalezy od dlugosci przedzialu.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+from ..model.archive import Archive
+from ..model.eventlog import EventLog
+from ..model.export import FORMATS, ExportSpec, export, guess_format
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Eksport historii i zdarzen")
+    ap.add_argument("source", choices=("history", "events"))
+    ap.add_argument("dir", help="katalog archiwum (--archive w main)")
+    ap.add_argument("out", help="plik wynikowy")
+    ap.add_argument("--from", dest="frm", type=float, default=None, help="poczatek [s epoki]")
+    ap.add_argument("--to", type=float, default=None, help="koniec [s epoki] (domyslnie teraz)")
+    ap.add_argument("--last", type=float, default=3600.0, help="ostatnie N sekund (bez --from)")
+    ap.add_argument("-e", "--entity", action="append", default=[], help="obiekt, np. T1, P12, T1-T2")
+    ap.add_argument("-s", "--series", action="append", default=[], help="wzorzec nazwy serii, np. *.poziom")
+    ap.add_argument("--format", choices=FORMATS, default=None)
+    ap.add_argument("--compress", choices=("none", "gz", "bz2", "xz"), default=None)
+    ap.add_argument("--chunk-rows", type=int, default=4096)
+    args = ap.parse_args()
+
+    if not os.path.isdir(args.dir):
+        ap.error(f"brak katalogu {args.dir}")
+    fmt, comp = guess_format(args.out)
+    if args.format is not None:
+        fmt = args.format
+    if args.compress is not None:
+        comp = None if args.compress == "none" else args.compress
+    t1 = args.to if args.to is not None else time.time()
+    t0 = args.frm if args.frm is not None else t1 - args.last
+    spec = ExportSpec(
+        args.source, fmt, t0, t1, tuple(args.entity), tuple(args.series), comp, args.chunk_rows
+    )
+
+    archive = Archive(args.dir) if args.source == "history" else None
+    log = EventLog(args.dir) if args.source == "events" else None
+    wall = time.perf_counter()
+    try:
+        rows = export(spec, args.out, archive, log)
+    except ValueError as e:
+        print(f"Blad: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if archive is not None:
+            archive.close()
+        if log is not None:
+            log.close()
+    print(f"{rows} wierszy -> {args.out} ({os.path.getsize(args.out)} B) w {time.perf_counter() - wall:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
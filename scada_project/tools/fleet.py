@@ -0,0 +1,72 @@
+"""Flota instalacji bez GUI: przepustowosc i skalowanie z liczba procesow.
+
+Tryb --max tyka instalacje tak szybko, jak sie da (staly krok symulacji),
+i raportuje ticki/s; --scale powtarza pomiar dla 1, 2, 4, ... procesow.
+
+Start:
+    python -m scada_project.tools.fleet --plants 64 --workers 4 --seconds 5
+    python -m scada_project.tools.fleet --plants 64 --max --scale
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from typing import Dict
+
+from ..model.fleet import FleetSupervisor
+
+
+def run_fleet(plants: int, workers: int, seconds: float, max_speed: bool, tanks: int = 4) -> Dict[str, float]:
+    with FleetSupervisor(plants, workers=workers, liczba_zbiornikow=tanks, max_speed=max_speed) as fleet:
+        # start procesow (spawn) nie wchodzi do pomiaru
+        deadline = time.perf_counter() + 30.0
+        while any(s is None for s in fleet.summaries()) and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        n0 = fleet.total_ticks()
+        t0 = time.perf_counter()
+        time.sleep(seconds)
+        n1 = fleet.total_ticks()
+        elapsed = time.perf_counter() - t0
+        sums = [s for s in fleet.summaries() if s is not None]
+    return {
+        "plants": plants,
+        "workers": fleet.workers,
+        "ticks_per_s": (n1 - n0) / elapsed,
+        "tick_ms_max": max((s.tick_ms for s in sums), default=0.0),
+        "alarms": sum(s.alarms_active for s in sums),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Flota instalacji (bez GUI)")
+    ap.add_argument("--plants", type=int, default=64)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--tanks", type=int, default=4, help="zbiornikow na instalacje")
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--max", action="store_true", help="maksymalna szybkosc (czas symulowany)")
+    ap.add_argument("--scale", action="store_true", help="pomiar dla 1, 2, 4, ... procesow (do --workers)")
+    args = ap.parse_args()
+
+    counts = [args.workers]
+    if args.scale:
+        counts = []
+        w = 1
+        while w < args.workers:
+            counts.append(w)
+            w *= 2
+        counts.append(args.workers)
+
+    base = None
+    for w in counts:
+        res = run_fleet(args.plants, w, args.seconds, args.max, args.tanks)
+        base = base or res["ticks_per_s"]
+        print(
+            f"plants={res['plants']} workers={res['workers']}: {res['ticks_per_s']:.0f} tickow/s "
+            f"(x{res['ticks_per_s'] / base:.2f})  max tick {res['tick_ms_max']:.3f} ms  alarmy {res['alarms']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Test obciazeniowy fasady Modbus/TCP.
+
+Uruchamia ModbusServer (z tykajaca instalacja) i N lokalnych "masterow",
+z ktorych kazdy trzyma `depth` zapytan w locie (pipelining). Mieszanka
+zapytan: odczyty IR/HR/coili + okazjonalne zapisy predkosci pompy.
+Raportuje zapytania/s oraz opoznienia p50/p99.
+
+Start:
+    python -m scada_project.tools.modbus_loadtest --masters 32 --depth 8 --seconds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import struct
+import time
+from typing import Dict, List
+
+from ..model.simulation import Instalacja
+from ..net.modbus_server import MBAP, ModbusServer
+
+
+def _request(tid: int, fc: int, a: int, b: int) -> bytes:
+    pdu = struct.pack("!BHH", fc, a, b)
+    return MBAP.pack(tid, 0, len(pdu) + 1, 1) + pdu
+
+
+class _Master(asyncio.Protocol):
+    """Prosty klient-zaslepka: utrzymuje `depth` zapytan w locie."""
+
+    def __init__(self, depth: int, n_tanks: int, n_pipes: int, latencies: List[float], rng: random.Random):
+        self.depth = depth
+        self.n_tanks = n_tanks
+        self.n_pipes = n_pipes
+        self.latencies = latencies
+        self.rng = rng
+        self.sent: Dict[int, float] = {}
+        self.errors = 0
+        self._tid = 0
+        self._buf = bytearray()
+        self.running = True
+        self.transport = None
+        self.done = asyncio.get_running_loop().create_future()
+
+    def _next(self) -> bytes:
+        self._tid = (self._tid + 1) & 0xFFFF
+        r = self.rng.random()
+        if r < 0.5:
+            req = _request(self._tid, 4, 0, self.n_tanks * 2)
+        elif r < 0.75:
+            req = _request(self._tid, 3, 0, self.n_pipes)
+        elif r < 0.95:
+            req = _request(self._tid, 1, 0, self.n_pipes * 2)
+        else:
+            # zapis 0 jest zawsze dozwolony (wylaczenie pompy)
+            req = _request(self._tid, 6, self.rng.randrange(self.n_pipes), 0)
+        self.sent[self._tid] = time.perf_counter()
+        return req
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+        transport.write(b"".join(self._next() for _ in range(self.depth)))
+
+    def data_received(self, data: bytes) -> None:
+        buf = self._buf
+        buf += data
+        now = time.perf_counter()
+        off = 0
+        n_done = 0
+        while len(buf) - off >= 6:
+            tid, _, length = struct.unpack_from("!HHH", buf, off)
+            end = off + 6 + length
+            if end > len(buf):
+                break
+            if buf[off + 7] & 0x80:
+                self.errors += 1
+            t0 = self.sent.pop(tid, None)
+            if t0 is not None:
+                self.latencies.append(now - t0)
+            off = end
+            n_done += 1
+        del buf[:off]
+        if self.running and n_done:
+            self.transport.write(b"".join(self._next() for _ in range(n_done)))
+        elif not self.running and not self.sent:
+            self.transport.close()
+
+    def connection_lost(self, exc) -> None:
+        if not self.done.done():
+            self.done.set_result(None)
+
+
+def _percentile(sorted_vals: List[float], p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, int(round(p / 100.0 * (len(sorted_vals) - 1))))
+    return sorted_vals[k]
+
+
+async def run_loadtest(masters: int = 32, depth: int = 8, seconds: float = 5.0, port: int = 0) -> Dict[str, float]:
+    inst = Instalacja()
+    inst.wymus_otworz_zawory_dla_pompy(0)
+    server = ModbusServer(inst, tick_s=0.05)
+    host, port = await server.start("127.0.0.1", port)
+    ticker = asyncio.create_task(server._tick_loop())
+
+    loop = asyncio.get_running_loop()
+    latencies: List[float] = []
+    rng = random.Random(1234)
+    clients = []
+    for _ in range(masters):
+        _, proto = await loop.create_connection(
+            lambda: _Master(depth, len(inst.zbiorniki), len(inst.polaczenia), latencies, random.Random(rng.random())),
+            host, port,
+        )
+        clients.append(proto)
+
+    t0 = time.perf_counter()
+    await asyncio.sleep(seconds)
+    elapsed = time.perf_counter() - t0
+    n = len(latencies)
+    for c in clients:
+        c.running = False
+    await asyncio.wait([c.done for c in clients], timeout=2.0)
+    for c in clients:
+        c.transport.close()
+    ticker.cancel()
+    server.close()
+
+    lat = sorted(latencies[:n])
+    return {
+        "masters": masters,
+        "depth": depth,
+        "requests": n,
+        "errors": sum(c.errors for c in clients),
+        "rps": n / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": _percentile(lat, 50) * 1000.0,
+        "p99_ms": _percentile(lat, 99) * 1000.0,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Test obciazeniowy Modbus/TCP")
+    ap.add_argument("--masters", type=int, default=32)
+    ap.add_argument("--depth", type=int, default=8, help="zapytan w locie na mastera")
+    ap.add_argument("--seconds", type=float, default=5.0)
+    args = ap.parse_args()
+
+    res = asyncio.run(run_loadtest(args.masters, args.depth, args.seconds))
+    print(
+        f"masters={res['masters']} depth={res['depth']} requests={res['requests']} errors={res['errors']}\n"
+        f"  {res['rps']:.0f} req/s   p50={res['p50_ms']:.2f} ms   p99={res['p99_ms']:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Odtwarzanie nagranego scenariusza (bez GUI).
+
+Start:
+    python -m scada_project.tools.replay scenariusz.scn              (1x)
+    python -m scada_project.tools.replay scenariusz.scn --speed 10   (10x)
+    python -m scada_project.tools.replay scenariusz.scn --max --seek 120 --until 300
+    python -m scada_project.tools.replay stary.scn --hydraulika --regulacja
+
+Instalacja (liczba zbiornikow, hydraulika, regulacja) jest budowana z naglowka
+nagrania. --hydraulika/--regulacja dotycza nagran bez opcji w naglowku
+(wersja 2); sprzeczne z naglowkiem koncza sie bledem.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+
+from ..model.scenario import ScenarioReplayer, read_header
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Odtwarzanie scenariusza")
+    ap.add_argument("path")
+    ap.add_argument("--speed", type=float, default=1.0, help="mnoznik czasu (1 = czas rzeczywisty)")
+    ap.add_argument("--max", action="store_true", help="maksymalna szybkosc")
+    ap.add_argument("--seek", type=float, default=None, help="start od chwili [s od poczatku nagrania]")
+    ap.add_argument("--until", type=float, default=None, help="koniec w chwili [s od poczatku nagrania]")
+    ap.add_argument("--verify", action="store_true", help="porownuj stan z checkpointami")
+    ap.add_argument("--quiet", action="store_true", help="bez logu instalacji")
+    ap.add_argument("--hydraulika", action="store_true", help="solwer hydrauliczny (nagrania bez opcji w naglowku)")
+    ap.add_argument("--regulacja", action="store_true", help="bank regulatorow PID (nagrania bez opcji w naglowku)")
+    args = ap.parse_args()
+
+    with open(args.path, "rb") as f:
+        data = f.read()
+    try:
+        info, _ = read_header(data)
+        for nazwa in ("hydraulika", "regulacja"):
+            if getattr(args, nazwa) and getattr(info, nazwa) is False:
+                raise ValueError(f"--{nazwa}: nagranie bez tej opcji")
+        inst = info.instalacja(args.hydraulika, args.regulacja, log_cb=None if args.quiet else print)
+        rp = ScenarioReplayer(data, inst, verify=args.verify)
+    except ValueError as e:
+        print(f"Blad: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Nagranie: {rp.t_end - rp.t0:.1f} s, {len(rp.records)} rekordow")
+
+    if args.seek is not None:
+        rp.seek(rp.t0 + args.seek)
+    until = rp.t0 + args.until if args.until is not None else None
+
+    wall0 = time.perf_counter()
+    sim0 = rp.t
+    rp.play(speed=None if args.max else args.speed, until=until)
+    wall = time.perf_counter() - wall0
+
+    print(f"Odtworzono {rp.t - sim0:.1f} s symulacji w {wall:.3f} s")
+    for z in inst.zbiorniki:
+        print(f"  {z.nazwa}: {z.poziom * 100:.1f}%  {z.temperatura:.1f}C")
+    if args.verify:
+        print(f"Rozbieznosci z checkpointami: {rp.divergences}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""Test dlugiej pracy (soak): wzrost pamieci i wykrywanie wyciekow.
+
+Cala aplikacja (MainWindow: Qt offscreen, pygame z SDL dummy, wykresy;
+proces okna Tk tylko gdy jest DISPLAY) w czasie przyspieszonym: zegar reczny,
+tick wolany w petli bez czekania, petla zdarzen Qt (odmalowanie okna
+i wykresow) co --gui-every s, losowe komendy operatora. Co --sample
+sekund czasu symulacji: probka tracemalloc (pamiec wg podsystemu - po
+sciezce pliku, w ktorym nastapila alokacja) i RSS procesu.
+
+Po rozgrzewce (--warmup) zapamietywany jest stan bazowy. Gdy wzrost
+dowolnego podsystemu przekroczy limit (--max-growth, --limit nazwa=KiB)
+albo RSS przekroczy --max-rss, test konczy sie kodem 1 i wypisuje miejsca
+alokacji z najwiekszym przyrostem. Pamieci C++ (elementy Qt)
+tracemalloc nie widzi - ja obejmuje RSS, a liczniki (alerty, artysci
+matplotlib, animacje pygame) sa wypisywane przy kazdej probce.
+
+Start:
+    python -m scada_project.tools.soak --hours 2
+    python -m scada_project.tools.soak --hours 8 --hz 10 --limit matplotlib=8192 --max-rss 128
+"""
+
+from __future__ import annotations
+
+import os
+
+# bez ekranu - musi byc ustawione przed importem Qt / pygame / matplotlib
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import gc
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+
+from ..model.commands import Komenda
+from ..model.simulation import ZegarReczny
+
+# podsystem -> fragmenty sciezek plikow (pierwsze dopasowanie wygrywa)
+SUBSYSTEMS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("qt", ("/scada_project/ui/", "/PyQt5/")),
+    ("pygame", ("/scada_project/viz/pygame_view", "/scada_project/viz/viewport", "/pygame/")),
+    ("matplotlib", ("/scada_project/viz/mpl_", "/matplotlib/")),
+    ("tk", ("/scada_project/log/", "/tkinter/")),
+    ("model", ("/scada_project/model/",)),
+    ("utils", ("/scada_project/utils/",)),
+)
+OTHER = "inne"
+
+_TRACE_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def subsystem(filename: str) -> str:
+    path = filename.replace(os.sep, "/")
+    for name, parts in SUBSYSTEMS:
+        if any(p in path for p in parts):
+            return name
+    return OTHER
+
+
+def rss_bytes() -> int:
+    """Biezacy RSS (Linux: /proc); gdzie indziej - szczytowy z getrusage."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return r if sys.platform == "darwin" else r * 1024
+
+
+def take_snapshot() -> tracemalloc.Snapshot:
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces(_TRACE_FILTERS)
+
+
+def by_subsystem(snap: tracemalloc.Snapshot) -> Dict[str, int]:
+    out: Dict[str, int] = {name: 0 for name, _ in SUBSYSTEMS}
+    out[OTHER] = 0
+    for st in snap.statistics("filename"):
+        out[subsystem(st.traceback[0].filename)] += st.size
+    return out
+
+
+def top_sites(cur: tracemalloc.Snapshot, base: tracemalloc.Snapshot, n: int) -> List[str]:
+    lines = []
+    for st in cur.compare_to(base, "lineno"):
+        if st.size_diff <= 0:
+            continue
+        fr = st.traceback[0]
+        lines.append(
+            f"  {st.size_diff / 1024:+10.1f} KiB {st.count_diff:+8d} blokow  "
+            f"[{subsystem(fr.filename)}] {fr.filename}:{fr.lineno}"
+        )
+        if len(lines) >= n:
+            break
+    return lines
+
+
+def gauges(w) -> Dict[str, int]:
+    """Liczniki struktur, ktore nie powinny rosnac bez konca."""
+    g = {"alerty": w.alerts.list.count()}
+    if w.pygame_view is not None:
+        g["pygame_anim"] = len(w.pygame_view._phase) + len(w.pygame_view._pump_rot)
+    fig = getattr(w.plots, "fig", None)
+    if fig is not None:
+        g["mpl_artysci"] = sum(len(ax.get_children()) for ax in fig.axes)
+    if w.tk_log is not None:
+        g["tk_kolejka"] = w.tk_log.pending()
+    return g
+
+
+def random_command(inst, rng: random.Random) -> Komenda:
+    p = rng.randrange(len(inst.polaczenia))
+    return rng.choice([
+        Komenda.zawor(p, rng.choice("ab"), rng.random() < 0.5),
+        Komenda.pompa(p, rng.choice([0.0, 0.3, 0.6, 1.0])),
+        Komenda.napelnij(rng.choice(inst.zbiorniki).nazwa, rng.choice([3.0, 15.0])),
+        Komenda.oproznij(rng.choice(inst.zbiorniki).nazwa, rng.choice([3.0, 15.0])),
+        Komenda.temp_zadana(rng.choice(inst.zbiorniki).nazwa, rng.choice([20.0, 45.0, 70.0])),
+    ])
+
+
+def _fmt_t(s: float) -> str:
+    return f"{int(s // 3600)}:{int(s % 3600 // 60):02d}:{int(s % 60):02d}"
+
+
+def parse_limits(items: List[str]) -> Dict[str, float]:
+    out = {}
+    for it in items:
+        name, _, kib = it.partition("=")
+        if name not in {n for n, _ in SUBSYSTEMS} | {OTHER} or not kib:
+            raise SystemExit(f"Zly limit: {it} (podsystemy: {', '.join(n for n, _ in SUBSYSTEMS)}, {OTHER})")
+        out[name] = float(kib)
+    return out
+
+
+def run(args) -> int:
+    from PyQt5.QtWidgets import QApplication
+
+    from ..ui.main_window import MainWindow
+
+    limits = parse_limits(args.limit)
+    tracemalloc.start(args.frames)
+    app = QApplication.instance() or QApplication([])
+    z = ZegarReczny(time.time())
+    w = MainWindow(plots=args.plots, pygame=args.pygame, tk=args.tk, plots_thread=args.plots_thread, clock=z)
+    # tick wolany z petli ponizej, nie z zegara Qt
+    w.timer.stop()
+    w.show()
+
+    rng = random.Random(args.seed)
+    dt = 1.0 / args.hz
+    n = int(args.hours * 3600.0 * args.hz)
+    sample_every = max(1, int(args.sample * args.hz))
+    # petla Qt (odmalowanie, wykresy) co --gui-every s symulacji, nie co tick
+    gui_every = max(1, int(args.gui_every * args.hz))
+    warmup = int(args.warmup * args.hz)
+    base: Optional[tracemalloc.Snapshot] = None
+    base_sub: Dict[str, int] = {}
+    base_rss = 0
+    wall = time.perf_counter()
+    failed: List[str] = []
+    try:
+        for i in range(1, n + 1):
+            # komendy operatora co ~--cmd-every s (alarmy, logi, zmiany przeplywu)
+            if rng.random() < dt / args.cmd_every:
+                w._command(random_command(w.instalacja, rng))
+            z.t += dt
+            w._on_tick()
+            if i % gui_every == 0:
+                app.processEvents()
+
+            if i == warmup or (base is None and i == n):
+                base = take_snapshot()
+                base_sub = by_subsystem(base)
+                base_rss = rss_bytes()
+                print(f"[{_fmt_t(i * dt)}] baza: rss {base_rss / 2**20:.1f} MiB, "
+                      f"tracemalloc {sum(base_sub.values()) / 2**20:.1f} MiB")
+                continue
+            if base is None or (i - warmup) % sample_every and i != n:
+                continue
+
+            cur = take_snapshot()
+            sub = by_subsystem(cur)
+            rss = rss_bytes()
+            growth = {k: (sub[k] - base_sub.get(k, 0)) / 1024.0 for k in sub}
+            parts = "  ".join(f"{k} {v:+.0f}" for k, v in growth.items())
+            g = "  ".join(f"{k} {v}" for k, v in gauges(w).items())
+            speed = i * dt / (time.perf_counter() - wall)
+            print(f"[{_fmt_t(i * dt)}] rss {rss / 2**20:.1f} MiB ({(rss - base_rss) / 2**20:+.1f})  "
+                  f"KiB: {parts}  | {g}  | x{speed:.0f}", flush=True)
+
+            for k, v in growth.items():
+                lim = limits.get(k, args.max_growth)
+                if v > lim:
+                    failed.append(f"{k}: +{v:.0f} KiB > {lim:.0f} KiB")
+            if (rss - base_rss) / 2**20 > args.max_rss:
+                failed.append(f"RSS: +{(rss - base_rss) / 2**20:.1f} MiB > {args.max_rss:.0f} MiB")
+            if failed:
+                print("PRZEKROCZONY LIMIT: " + "; ".join(failed))
+                print(f"Najwiekszy przyrost od bazy (top {args.top}):")
+                print("\n".join(top_sites(cur, base, args.top)))
+                return 1
+    finally:
+        w.close()
+        app.processEvents()
+        if w.pygame_view is not None:
+            # watek pygame konczy sie sam (pygame.quit) - przed wyjsciem interpretera
+            w.pygame_view.stop()
+            w.pygame_view._thread.join(timeout=5.0)
+        tracemalloc.stop()
+    print(f"OK: {_fmt_t(n * dt)} czasu symulacji w {time.perf_counter() - wall:.0f} s, limity nieprzekroczone")
+    return 0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Test dlugiej pracy: wzrost pamieci i wycieki")
+    ap.add_argument("--hours", type=float, default=1.0, help="czas symulacji [h]")
+    ap.add_argument("--hz", type=float, default=20.0, help="ticki na sekunde symulacji")
+    ap.add_argument("--warmup", type=float, default=600.0, help="rozgrzewka przed baza [s symulacji]")
+    ap.add_argument("--sample", type=float, default=300.0, help="okres probek [s symulacji]")
+    ap.add_argument("--gui-every", type=float, default=5.0, help="okres petli zdarzen Qt [s symulacji]")
+    ap.add_argument("--cmd-every", type=float, default=5.0, help="sredni odstep komend [s symulacji]")
+    ap.add_argument("--max-growth", type=float, default=4096.0, help="limit wzrostu podsystemu [KiB]")
+    ap.add_argument("--limit", action="append", default=[], help="limit podsystemu, np. matplotlib=8192")
+    ap.add_argument("--max-rss", type=float, default=64.0, help="limit wzrostu RSS [MiB]")
+    ap.add_argument("--top", type=int, default=15, help="liczba miejsc alokacji w raporcie")
+    ap.add_argument("--frames", type=int, default=1, help="ramki sladu tracemalloc")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--plots", action=argparse.BooleanOptionalAction, default=True)
+    ap.add_argument("--plots-thread", action="store_true", help="wykresy renderowane w watku")
+    ap.add_argument("--pygame", action=argparse.BooleanOptionalAction, default=True)
+    ap.add_argument("--tk", action=argparse.BooleanOptionalAction, default=bool(os.environ.get("DISPLAY")))
+    args = ap.parse_args()
+    sys.exit(run(args))
+
+
+if __name__ == "__main__":
+    main()
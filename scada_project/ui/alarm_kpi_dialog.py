@@ -0,0 +1,114 @@
+"""PyQt5: wskazniki systemu alarmowego na zywo (model.alarm_kpi).
+
+Odswiezane co 1 s, gdy okno jest widoczne: alarmy w oknie 10 min, szczyt,
+powodz alarmowa, alarmy terkoczace i stojace oraz tabela zbiornikow
+(aktywacje i czas w alarmie w biezacej zmianie). Zapis CSV - wiersz na zmiane.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Dict
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (
+    QDialog,
+    QFileDialog,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+
+_COLUMNS = ("zbiornik", "aktywacje", "czas w alarmie", "% zmiany")
+
+
+def _hms(s: float) -> str:
+    s = int(s)
+    return f"{s // 3600}:{s % 3600 // 60:02d}:{s % 60:02d}"
+
+
+class AlarmKpiDialog(QDialog):
+    def __init__(self, stan: Callable[[], Dict], zapisz: Callable[[str], int], parent=None):
+        """stan() - AlarmKPI.stan pod blokada instalacji; zapisz(sciezka) - eksport zmian."""
+        super().__init__(parent)
+        self._stan = stan
+        self._zapisz = zapisz
+        self.setWindowTitle("KPI alarmow")
+        self.resize(560, 420)
+        layout = QVBoxLayout(self)
+
+        self.summary = QLabel("-")
+        self.summary.setWordWrap(True)
+        layout.addWidget(self.summary)
+
+        self.table = QTableWidget(0, len(_COLUMNS))
+        self.table.setHorizontalHeaderLabels(_COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        layout.addWidget(self.table, 1)
+
+        self.standing = QLabel("-")
+        self.standing.setWordWrap(True)
+        layout.addWidget(self.standing)
+
+        row = QHBoxLayout()
+        b_export = QPushButton("Zapisz zmiany (CSV)...")
+        b_export.clicked.connect(self._export)
+        row.addWidget(b_export)
+        row.addStretch(1)
+        self.status = QLabel("")
+        row.addWidget(self.status)
+        layout.addLayout(row)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+
+    def showEvent(self, ev) -> None:
+        super().showEvent(ev)
+        self.refresh()
+
+    def refresh(self) -> None:
+        if not self.isVisible():
+            return
+        s = self._stan()
+        od = time.strftime("%H:%M", time.localtime(s["zmiana_od"]))
+        do = time.strftime("%H:%M", time.localtime(s["zmiana_do"]))
+        powodz = "TAK" if s["powodz"] else "nie"
+        self.summary.setText(
+            f"Zmiana {od}-{do}: {s['aktywacje']} aktywacji, srednio {s['srednio_10min']:.1f} / 10 min\n"
+            f"Teraz w oknie 10 min: {s['alarmy_10min']}  (szczyt zmiany {s['szczyt_10min']}, "
+            f"od startu {s['szczyt_10min_od_startu']})\n"
+            f"Powodz alarmowa: {powodz}  (epizody {s['powodzie']}, czas {_hms(s['czas_powodzi_s'])})\n"
+            f"Terkotanie: {s['terkot']} epizodow; teraz: {', '.join(s['terkoczace']) or '-'}"
+        )
+
+        trwa = max(1e-9, s["teraz"] - s["zmiana_od"])
+        czas = s["czas_w_alarmie_s"]
+        akt = s["aktywacje_zbiornika"]
+        names = sorted(set(czas) | set(akt), key=lambda n: (len(n), n))
+        self.table.setRowCount(len(names))
+        for r, n in enumerate(names):
+            t = czas.get(n, 0.0)
+            for c, text in enumerate((n, str(akt.get(n, 0)), _hms(t), f"{100.0 * t / trwa:.1f}")):
+                self.table.setItem(r, c, QTableWidgetItem(text))
+        self.table.resizeColumnsToContents()
+
+        st = s["stojace"]
+        parts = [f"{n} ({_hms(t)})" for n, t in st]
+        self.standing.setText(
+            f"Stojace: {len(st)} (przestarzale > 24 h: {s['przestarzale']})" + (": " + ", ".join(parts) if parts else "")
+        )
+
+    def _export(self) -> None:
+        path, _ = QFileDialog.getSaveFileName(self, "KPI alarmow - zmiany", "kpi_alarmow.csv", "CSV (*.csv)")
+        if not path:
+            return
+        try:
+            n = self._zapisz(path)
+        except OSError as e:
+            self.status.setText(f"Blad zapisu: {e}")
+            return
+        self.status.setText(f"Zapisano {n} zmian")
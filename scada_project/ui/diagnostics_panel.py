@@ -0,0 +1,120 @@
+"""PyQt5: panel diagnostyki wydajnosci (utils.metrics).
+
+Tabela histogramow (etapy ticku, konsumenci, oczekiwanie na blokade,
+odstepy klatek, opoznienie komenda -> piksel) i wartosci chwilowych (fps,
+glebokosci kolejek), przelacznik pomiaru oraz zapis w formacie tekstowym
+Prometheus i sladow komend w formacie Trace Event JSON.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (
+    QCheckBox,
+    QDialog,
+    QFileDialog,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+
+from ..utils.metrics import Metrics
+from ..utils.tracing import Tracer
+
+_COLUMNS = ("metryka", "etykieta", "liczba", "srednia", "p50", "p99", "max")
+
+
+def _ms(s: float) -> str:
+    return f"{s * 1e3:.3f} ms"
+
+
+class DiagnosticsDialog(QDialog):
+    def __init__(self, metrics: Metrics, parent=None, tracer: Optional[Tracer] = None):
+        super().__init__(parent)
+        self.metrics = metrics
+        self.tracer = tracer
+        self.setWindowTitle("Diagnostyka wydajnosci")
+        self.resize(720, 460)
+        layout = QVBoxLayout(self)
+
+        row = QHBoxLayout()
+        self.chk_enabled = QCheckBox("Profilowanie wlaczone")
+        self.chk_enabled.setChecked(metrics.enabled)
+        self.chk_enabled.toggled.connect(self._set_enabled)
+        row.addWidget(self.chk_enabled)
+        b_reset = QPushButton("Wyczysc")
+        b_reset.clicked.connect(self._reset)
+        row.addWidget(b_reset)
+        b_dump = QPushButton("Zapisz (Prometheus)...")
+        b_dump.clicked.connect(self._dump)
+        row.addWidget(b_dump)
+        if tracer is not None:
+            b_trace = QPushButton("Zapisz slady komend...")
+            b_trace.clicked.connect(self._dump_trace)
+            row.addWidget(b_trace)
+        row.addStretch(1)
+        self.status = QLabel("")
+        row.addWidget(self.status)
+        layout.addLayout(row)
+
+        self.table = QTableWidget(0, len(_COLUMNS))
+        self.table.setHorizontalHeaderLabels(_COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        layout.addWidget(self.table, 1)
+
+        self.gauges_label = QLabel("-")
+        self.gauges_label.setWordWrap(True)
+        layout.addWidget(self.gauges_label)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+
+    def _set_enabled(self, on: bool) -> None:
+        self.metrics.enabled = bool(on)
+
+    def _reset(self) -> None:
+        self.metrics.reset()
+        self.refresh()
+
+    def _dump(self) -> None:
+        path, _ = QFileDialog.getSaveFileName(self, "Zapisz metryki", "metryki.prom", "Prometheus (*.prom *.txt)")
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.metrics.prometheus_text())
+        except OSError as e:
+            self.status.setText(f"Blad zapisu: {e}")
+            return
+        self.status.setText("Zapisano metryki")
+
+    def _dump_trace(self) -> None:
+        path, _ = QFileDialog.getSaveFileName(self, "Zapisz slady komend", "slady.json", "Trace Event JSON (*.json)")
+        if not path:
+            return
+        try:
+            self.tracer.save(path)
+        except OSError as e:
+            self.status.setText(f"Blad zapisu: {e}")
+            return
+        self.status.setText("Zapisano slady komend")
+
+    def refresh(self) -> None:
+        if not self.isVisible():
+            return
+        rows = self.metrics.rows()
+        if self.tracer is not None:
+            rows += self.tracer.rows()
+        self.table.setRowCount(len(rows))
+        for r, (name, lab, count, mean, p50, p99, mx) in enumerate(rows):
+            for c, text in enumerate((name, lab, str(count), _ms(mean), _ms(p50), _ms(p99), _ms(mx))):
+                self.table.setItem(r, c, QTableWidgetItem(text))
+        self.table.resizeColumnsToContents()
+        g = self.metrics.gauges()
+        self.gauges_label.setText("  ".join(f"{n}[{lab}]={v:.1f}" for n, lab, v in g) or "-")
@@ -0,0 +1,173 @@
+"""PyQt5: okno eksportu historii i dziennika zdarzen (model.export).
+
+Eksport dziala w watku tla; watek GUI tylko co 100 ms odczytuje licznik
+wierszy, wiec okno nie zamarza przy eksporcie wielu dni. Otwarta porcja
+archiwum jest przed startem zamykana (seal) pod blokada instalacji, a watek
+eksportu czyta juz tylko porcje zamkniete.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (
+    QComboBox,
+    QDialog,
+    QDoubleSpinBox,
+    QFileDialog,
+    QFormLayout,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QVBoxLayout,
+)
+
+from ..model.archive import Archive
+from ..model.eventlog import EventLog
+from ..model.export import FORMATS, ExportCancelled, ExportSpec, export
+
+_COMPRESSION = ("brak", "gz", "bz2", "xz")
+
+
+class ExportDialog(QDialog):
+    def __init__(
+        self,
+        archive: Archive,
+        event_log: EventLog,
+        seal: Callable[[], None],
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.archive = archive
+        self.event_log = event_log
+        # seal() wolane w watku GUI pod blokada instalacji (append() idzie z ticku)
+        self._seal = seal
+        self.setWindowTitle("Eksport historii")
+        layout = QVBoxLayout(self)
+
+        form = QFormLayout()
+        self.cmb_source = QComboBox()
+        self.cmb_source.addItem("Historia (poziomy, temperatury, pompy, zawory)", "history")
+        self.cmb_source.addItem("Dziennik zdarzen", "events")
+        self.cmb_source.currentIndexChanged.connect(self._on_source)
+        form.addRow("Zrodlo:", self.cmb_source)
+        self.cmb_format = QComboBox()
+        self.cmb_format.addItems(FORMATS)
+        form.addRow("Format:", self.cmb_format)
+        self.cmb_comp = QComboBox()
+        self.cmb_comp.addItems(_COMPRESSION)
+        form.addRow("Kompresja:", self.cmb_comp)
+        self.spin_last = QDoubleSpinBox()
+        self.spin_last.setRange(0.01, 24.0 * 365)
+        self.spin_last.setValue(1.0)
+        self.spin_last.setSuffix(" h")
+        form.addRow("Ostatnie:", self.spin_last)
+        self.ed_entities = QLineEdit()
+        self.ed_entities.setPlaceholderText("np. T1 P12 T1-T2 (puste - wszystkie)")
+        form.addRow("Obiekty:", self.ed_entities)
+        self.ed_series = QLineEdit()
+        self.ed_series.setPlaceholderText("np. *.poziom (puste - wszystkie)")
+        form.addRow("Serie:", self.ed_series)
+        layout.addLayout(form)
+
+        row = QHBoxLayout()
+        self.btn_start = QPushButton("Eksportuj...")
+        self.btn_start.clicked.connect(self._start)
+        row.addWidget(self.btn_start)
+        self.btn_cancel = QPushButton("Przerwij")
+        self.btn_cancel.setEnabled(False)
+        self.btn_cancel.clicked.connect(self._cancel_export)
+        row.addWidget(self.btn_cancel)
+        row.addStretch(1)
+        layout.addLayout(row)
+        self.lbl_status = QLabel("")
+        layout.addWidget(self.lbl_status)
+
+        self._thread: Optional[threading.Thread] = None
+        self._cancel = threading.Event()
+        self._rows = 0
+        self._result: Optional[str] = None
+        self._t_start = 0.0
+        self._timer = QTimer(self)
+        self._timer.setInterval(100)
+        self._timer.timeout.connect(self._poll)
+
+    def _on_source(self) -> None:
+        history = self.cmb_source.currentData() == "history"
+        self.ed_series.setEnabled(history)
+        # .npy tylko dla historii
+        idx = FORMATS.index("npy")
+        self.cmb_format.model().item(idx).setEnabled(history)
+        if not history and self.cmb_format.currentIndex() == idx:
+            self.cmb_format.setCurrentIndex(0)
+
+    def _spec(self) -> ExportSpec:
+        t1 = time.time()
+        comp = self.cmb_comp.currentText()
+        return ExportSpec(
+            source=self.cmb_source.currentData(),
+            fmt=self.cmb_format.currentText(),
+            t0=t1 - self.spin_last.value() * 3600.0,
+            t1=t1,
+            entities=tuple(self.ed_entities.text().split()),
+            series=tuple(self.ed_series.text().split()),
+            compression=None if comp == "brak" else comp,
+        )
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        spec = self._spec()
+        ext = "." + spec.fmt + ("." + spec.compression if spec.compression else "")
+        path, _ = QFileDialog.getSaveFileName(self, "Eksport", spec.source + ext)
+        if not path:
+            return
+        if spec.source == "history":
+            self._seal()
+        self._cancel.clear()
+        self._rows = 0
+        self._result = None
+        self._t_start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, args=(spec, path), daemon=True)
+        self._thread.start()
+        self.btn_start.setEnabled(False)
+        self.btn_cancel.setEnabled(True)
+        self._timer.start()
+
+    def _run(self, spec: ExportSpec, path: str) -> None:
+        def progress(n: int) -> None:
+            self._rows = n
+
+        try:
+            n = export(spec, path, self.archive, self.event_log, progress, self._cancel, include_open=False)
+            self._result = f"Zapisano {n} wierszy do {os.path.basename(path)}"
+        except ExportCancelled:
+            self._result = "Eksport przerwany"
+        except (OSError, ValueError) as e:
+            self._result = f"Blad eksportu: {e}"
+
+    def _poll(self) -> None:
+        t = self._thread
+        if t is not None and not t.is_alive():
+            self._thread = None
+            self._timer.stop()
+            self.btn_start.setEnabled(True)
+            self.btn_cancel.setEnabled(False)
+            self.lbl_status.setText(f"{self._result} ({time.perf_counter() - self._t_start:.1f} s)")
+            return
+        self.lbl_status.setText(f"Eksport... {self._rows} wierszy")
+
+    def _cancel_export(self) -> None:
+        self._cancel.set()
+
+    def shutdown(self) -> None:
+        """Przerywa trwajacy eksport i czeka na watek (przed zamknieciem archiwum)."""
+        t = self._thread
+        if t is not None:
+            self._cancel.set()
+            t.join(timeout=5.0)
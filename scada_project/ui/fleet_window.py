@@ -0,0 +1,222 @@
+"""PyQt5: przeglad floty instalacji (model.fleet) z podgladem szczegolowym.
+
+Tabela odswiezana z pamieci wspolnej (podsumowania), bez blokowania
+procesow roboczych. Dwuklik na wierszu otwiera podglad instalacji: lustrzana
+Instalacja odtwarzana z checkpointow + sterowanie zaworami i pompami
+(komendy ida do procesu danej instalacji).
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import (
+    QApplication,
+    QDialog,
+    QGridLayout,
+    QGroupBox,
+    QLabel,
+    QMainWindow,
+    QPushButton,
+    QSlider,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+)
+
+from ..model.checkpoint import CheckpointCodec, CheckpointError
+from ..model.commands import Komenda
+from ..model.fleet import FleetSupervisor
+from ..model.simulation import Instalacja
+from .tank_scene import TankPanel
+
+CHECKPOINT_TIMEOUT_S = 2.0
+
+_COLUMNS = ("instalacja", "proces", "poziomy [%]", "T max [C]", "alarmy", "pompy", "tick [ms]", "ticki")
+
+
+class PlantDetailDialog(QDialog):
+    def __init__(self, fleet: FleetSupervisor, plant: int, parent=None):
+        super().__init__(parent)
+        self.fleet = fleet
+        self.plant = plant
+        self.setWindowTitle(f"Instalacja {plant}")
+        self.resize(900, 560)
+
+        # lustro stanu (ta sama topologia co w procesie roboczym)
+        self.mirror = Instalacja(
+            liczba_zbiornikow=fleet.n_tanks, hydraulika=fleet.hydraulika, regulacja=fleet.regulacja
+        )
+        self.codec = CheckpointCodec(self.mirror)
+
+        layout = QVBoxLayout(self)
+        tanks_box = QGroupBox("Zbiorniki")
+        self.tank_panel = TankPanel([z.nazwa for z in self.mirror.zbiorniki])
+        QVBoxLayout(tanks_box).addWidget(self.tank_panel)
+        layout.addWidget(tanks_box)
+
+        ctrl = QGroupBox("Zawory i pompy")
+        cg = QGridLayout(ctrl)
+        self.valve_buttons: List[Tuple[QPushButton, int, str]] = []
+        self.pump_sliders: Dict[int, QSlider] = {}
+        for pidx, pol in enumerate(self.mirror.polaczenia):
+            cg.addWidget(QLabel(pol.nazwa), pidx, 0)
+            for col, which in ((1, "a"), (2, "b")):
+                btn = QPushButton(f"Zawor {which.upper()}")
+                btn.setCheckable(True)
+                btn.clicked.connect(lambda checked, pi=pidx, w=which: self._send(Komenda.zawor(pi, w, checked)))
+                cg.addWidget(btn, pidx, col)
+                self.valve_buttons.append((btn, pidx, which))
+            s = QSlider(Qt.Horizontal)
+            s.setRange(0, 100)
+            s.valueChanged.connect(lambda val, pi=pidx: self._send(Komenda.pompa(pi, val / 100.0)))
+            cg.addWidget(s, pidx, 3)
+            self.pump_sliders[pidx] = s
+        layout.addWidget(ctrl)
+
+        self.status = QLabel("-")
+        layout.addWidget(self.status)
+
+        # najwyzej jedno zlecenie checkpointu w drodze (czas zlecenia albo None)
+        self._requested: Optional[float] = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._poll)
+
+    def _request(self) -> None:
+        now = time.monotonic()
+        # zlecenie starsze niz CHECKPOINT_TIMEOUT_S uznane za utracone (np. restart procesu)
+        if self._requested is None or now - self._requested > CHECKPOINT_TIMEOUT_S:
+            self._requested = now
+            self.fleet.request_checkpoint(self.plant)
+
+    def _send(self, k: Komenda) -> None:
+        # zlecenie po komendzie (ta sama kolejka) albo nastepne po odbiorze biezacego ja uwzgledni
+        self.fleet.command(self.plant, k)
+        self._request()
+
+    def _poll(self) -> None:
+        data = self.fleet.poll_checkpoint(self.plant)
+        if data is None:
+            self._request()
+            return
+        self._requested = None
+        self._request()
+        try:
+            self.codec.restore(data)
+        except CheckpointError as e:
+            self.status.setText(str(e))
+            return
+        self._sync()
+
+    def _sync(self) -> None:
+        inst = self.mirror
+        self.tank_panel.update_tanks((z.nazwa, z.poziom, z.temperatura) for z in inst.zbiorniki)
+        for btn, pidx, which in self.valve_buttons:
+            pol = inst.polaczenia[pidx]
+            st = pol.zawor_a.otwarty if which == "a" else pol.zawor_b.otwarty
+            btn.blockSignals(True)
+            btn.setChecked(st)
+            btn.setStyleSheet("background-color: #2b7;" if st else "background-color: #b22;")
+            btn.blockSignals(False)
+        for pidx, s in self.pump_sliders.items():
+            pol = inst.polaczenia[pidx]
+            if s.isSliderDown():
+                continue
+            s.blockSignals(True)
+            s.setValue(int(pol.pompa.predkosc * 100) if pol.pompa.wlaczona else 0)
+            s.blockSignals(False)
+        self.status.setText(f"czas symulacji {inst.harmonogram.t:.1f} s")
+
+    def showEvent(self, event) -> None:
+        super().showEvent(event)
+        # okno z FleetWindow.details jest ponownie pokazywane po zamknieciu
+        self._request()
+        self.timer.start(200)
+
+    def hideEvent(self, event) -> None:
+        # zamkniecie (takze Esc -> reject(), bez closeEvent) ukrywa okno
+        self.timer.stop()
+        super().hideEvent(event)
+
+
+class FleetWindow(QMainWindow):
+    def __init__(self, fleet: FleetSupervisor):
+        super().__init__()
+        self.fleet = fleet
+        self.setWindowTitle(f"Flota: {fleet.n_plants} instalacji, {fleet.workers} procesow")
+        self.resize(980, 620)
+
+        self.table = QTableWidget(fleet.n_plants, len(_COLUMNS))
+        self.table.setHorizontalHeaderLabels(_COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.cellDoubleClicked.connect(lambda row, _col: self.open_plant(row))
+        self.setCentralWidget(self.table)
+
+        self.details: Dict[int, PlantDetailDialog] = {}
+        self._last: Optional[Tuple[float, int]] = None
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(500)
+
+    def open_plant(self, plant: int) -> None:
+        dlg = self.details.get(plant)
+        if dlg is None:
+            dlg = self.details[plant] = PlantDetailDialog(self.fleet, plant, self)
+        dlg.show()
+        dlg.raise_()
+
+    def refresh(self) -> None:
+        sums = self.fleet.summaries()
+        total = 0
+        for row, s in enumerate(sums):
+            if s is None:
+                continue
+            total += s.ticks
+            cells = (
+                str(s.plant),
+                str(self.fleet.przydzial[s.plant]),
+                " / ".join(f"{v:.0f}" for v in s.levels),
+                f"{max(s.temps, default=0.0):.1f}",
+                str(s.alarms_active),
+                str(s.pumps_running),
+                f"{s.tick_ms:.3f}",
+                str(s.ticks),
+            )
+            bg = QColor("#5a1e1e") if s.alarms_active else None
+            for col, text in enumerate(cells):
+                item = self.table.item(row, col)
+                if item is None:
+                    item = QTableWidgetItem()
+                    self.table.setItem(row, col, item)
+                item.setText(text)
+                if bg is not None:
+                    item.setBackground(bg)
+                else:
+                    item.setData(Qt.BackgroundRole, None)
+        now = time.perf_counter()
+        if self._last is not None:
+            rate = (total - self._last[1]) / max(1e-6, now - self._last[0])
+            alive = sum(self.fleet.alive())
+            self.statusBar().showMessage(f"{rate:.0f} tickow/s lacznie, procesy: {alive}/{self.fleet.workers}")
+        self._last = (now, total)
+
+    def closeEvent(self, event) -> None:
+        self.timer.stop()
+        self.fleet.stop()
+        super().closeEvent(event)
+
+
+def run_fleet_app(
+    n_plants: int, workers: Optional[int] = None, hydraulika: bool = False, regulacja: bool = False
+) -> None:
+    app = QApplication.instance() or QApplication([])
+    fleet = FleetSupervisor(n_plants, workers=workers, hydraulika=hydraulika, regulacja=regulacja).start()
+    w = FleetWindow(fleet)
+    w.show()
+    app.exec_()
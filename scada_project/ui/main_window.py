@@ -1,27 +1,36 @@
 """PyQt5: glowne okno sterowania (wymagane).
 
 Zawiera:
-- 4 zbiorniki (widget Zbiornik z projekt_09.pdf),
-- sterowanie zbiornikami (napelnij/oproz 3s i 15s, temp zadana),
+- zbiorniki na scenie QGraphicsView (ksztalt widgetu Zbiornik z projekt_09.pdf),
+- sterowanie wybranym zbiornikiem (napelnij/oproz 3s i 15s, temp zadana),
 - 6 zaworow (toggle),
 - 3 pompy (suwak predkosci), z blokada "otworz zawor".
 - okno alertow (log + alarmy).
 - osadzone wykresy matplotlib LIVE.
+- panel diagnostyki wydajnosci (profilowanie etapow, opcjonalne).
+- KPI systemu alarmowego na zywo (okno 10 min, powodz, terkot, zmiany).
 
 Uwaga: wizualizacja instalacji i animacje sa w pygame (oddzielne okno) -
 spelnia wymagania o widocznym przeplywie przez zakrety 90 stopni.
+
+Start: okno Qt pokazuje sie od razu; Tk, pygame i matplotlib sa
+importowane i uruchamiane dopiero po pierwszym odmalowaniu okna (po jednym
+w kolejnych obrotach petli zdarzen). Kazdy z tych widokow mozna wylaczyc.
 """
 
 from __future__ import annotations
 
+import functools
 import time
 import threading
-from typing import Dict, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
 
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import QEvent, Qt, QTimer
 from PyQt5.QtWidgets import (
     QApplication,
+    QCheckBox,
     QDialog,
+    QFileDialog,
     QGridLayout,
     QGroupBox,
     QHBoxLayout,
@@ -38,56 +47,151 @@ from PyQt5.QtWidgets import (
 )
 
 from ..log.tk_log import TkLogWindow
+from ..model.alarm_kpi import AlarmKPI, zapisz_zmiany_csv
+from ..model.archive import Archive, plant_sample, plant_series
+from ..model.commands import (
+    NAPELNIJ,
+    OPROZNIJ,
+    POMPA,
+    REGULATOR_TRYB,
+    REGULATOR_ZADANA,
+    TEMP_ZADANA,
+    ZAWOR,
+    Komenda,
+    wykonaj,
+)
+from ..model.eventlog import EventLog
+from ..model.forecast import Forecast, Forecaster
+from ..model.scenario import ScenarioRecorder
 from ..model.simulation import Instalacja
 from ..utils.event_bus import EventBus, LogEvent
-from ..viz.mpl_plots import LivePlots
-from ..viz.pygame_view import PygameView, PlantSnapshot, PipeSnapshot, TankSnapshot
-from .tank_widget import Zbiornik as TankWidget
+from ..utils.metrics import Metrics, TimedLock
+from ..utils.startup import StartupReport
+from ..utils.tracing import Tracer
+from ..viz.pygame_view import PygameView, PlantSnapshot, PipeSnapshot, TankSnapshot, Visible
+from .alarm_kpi_dialog import AlarmKpiDialog
+from .diagnostics_panel import DiagnosticsDialog
+from .export_dialog import ExportDialog
+from .tank_scene import TankControls, TankPanel
+
+if TYPE_CHECKING:
+    from ..viz.mpl_plots import LivePlots
 
 
 class AlertsDialog(QDialog):
-    def __init__(self, parent=None):
+    """Ostatnie `max_lines` komunikatow (starsze w dzienniku zdarzen / Tk)."""
+
+    def __init__(self, parent=None, max_lines: int = 1000):
         super().__init__(parent)
         self.setWindowTitle("Okno alertow")
         self.resize(520, 380)
+        self.max_lines = max_lines
         layout = QVBoxLayout(self)
         self.list = QListWidget()
         layout.addWidget(self.list)
 
     def add_line(self, line: str) -> None:
         self.list.addItem(line)
+        # takeItem oddaje element Pythonowi - zwalniany od razu (nieuzywany wynik)
+        while self.list.count() > self.max_lines:
+            self.list.takeItem(0)
         self.list.scrollToBottom()
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(
+        self,
+        hydraulika: bool = False,
+        profile: bool = False,
+        plots: bool = True,
+        pygame: bool = True,
+        tk: bool = True,
+        startup: Optional[StartupReport] = None,
+        plots_thread: bool = False,
+        archive: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+        regulacja: bool = False,
+    ):
         super().__init__()
+        self.startup = startup or StartupReport()
+        self.startup_report_cb: Optional[Callable[[str], None]] = None
+        # odroczony start widokow (po pierwszym odmalowaniu okna)
+        self._first_paint = False
+        self._deferred: List[Tuple[str, Callable[[], None]]] = []
+        self._report_deadline = 0.0
         self.setWindowTitle("Etap II - SCADA: 4 zbiorniki, 3 rury, 3 pompy, 6 zaworow")
         self.resize(1350, 760)
 
+        # Metryki wydajnosci (wlaczane w panelu diagnostyki lub --profile)
+        self.metrics = Metrics(enabled=profile)
+        # slady komenda -> piksel (koszt tylko przy komendach operatora)
+        self.tracer = Tracer()
+
         # Bus zdarzen (logi, alarmy, zmiany)
-        self.bus = EventBus()
+        self.bus = EventBus(self.metrics)
 
-        # Tkinter log (watek)
-        self.tk_log = TkLogWindow("Diagnostyka / Log (Tkinter)")
-        self.tk_log.start()
+        # Tkinter log (osobny proces, start odroczony)
+        self.tk_log: Optional[TkLogWindow] = TkLogWindow("Diagnostyka / Log (Tkinter)") if tk else None
 
         # Stan instalacji (logika)
-        self._lock = threading.Lock()
-        self.instalacja = Instalacja(log_cb=lambda m: self.bus.emit(m))
+        self._lock = TimedLock(threading.Lock(), self.metrics, "main")
+        # zegar ticku i instalacji (tools.soak: czas przyspieszony)
+        self.clock = clock
+        self.instalacja = Instalacja(
+            log_cb=lambda m: self.bus.emit(m), clock=clock, hydraulika=hydraulika, regulacja=regulacja
+        )
+        # KPI alarmow (przejscia alarmow z ticku, pod blokada)
+        self.alarm_kpi = AlarmKPI()
+        self.instalacja.alarm_cb = self.alarm_kpi.zdarzenie
+        # nagrywanie scenariusza (komendy + ticki), aktywne na zadanie
+        self.recorder: Optional[ScenarioRecorder] = None
+        # archiwum historii (katalog; porcje zapisywane w tle)
+        self.archive: Optional[Archive] = None
+        # dziennik zdarzen w tym samym katalogu (eksport razem z historia)
+        self.event_log: Optional[EventLog] = None
+        if archive:
+            self.archive = Archive(archive, *plant_series(self.instalacja))
+            self.event_log = EventLog(archive)
+
+        # adaptacyjny tick: w spoczynku instalacji tylko wolny "puls"
+        self._tick_ms = 50
+        self._idle_tick_ms = 1000
+        self._idle = False
 
         # Okno alertow (PyQt)
         self.alerts = AlertsDialog(self)
+        self.diagnostics = DiagnosticsDialog(self.metrics, self, tracer=self.tracer)
+        self.alarm_kpi_dialog = AlarmKpiDialog(self._alarm_kpi_state, self._alarm_kpi_save, self)
 
         # Subskrypcje logow
         self.bus.subscribe(self._on_log_event)
-
-        # pygame view
-        self.pygame_view = PygameView(self._snapshot_for_pygame)
-        self.pygame_view.start()
-
-        # matplotlib
-        self.plots = LivePlots(history_s=120.0, maxlen=800)
+        if self.event_log is not None:
+            self.bus.subscribe(self._record_event)
+        self.export_dialog: Optional[ExportDialog] = None
+
+        # pygame view (start odroczony; pygame importowany w watku okna)
+        self.pygame_view: Optional[PygameView] = None
+        if pygame:
+            self.pygame_view = PygameView(
+                self._snapshot_for_pygame, idle_cb=lambda: self._idle, metrics=self.metrics, tracer=self.tracer
+            )
+
+        # matplotlib (import i utworzenie wykresow odroczone - _init_plots)
+        self.plots: Optional["LivePlots"] = None
+        self._plots_enabled = plots
+        # render wykresow w watku roboczym (viz.mpl_async)
+        self._plots_thread = plots_thread
+
+        # prognoza w tle (osobny proces) - odswiezana co kilka sekund
+        # fabryka kopii o tej samej topologii (checkpoint sprawdza crc nazw podsystemow i petli)
+        self.forecaster = Forecaster(
+            factory=functools.partial(Instalacja, hydraulika=hydraulika, regulacja=regulacja)
+        )
+        self._forecast_future = None
+        self._forecast_error: Optional[str] = None  # blad ostatniej prognozy (epizod)
+        self._forecast_every_s = 3.0
+        self._forecast_horizon_s = 60.0
+        self._last_forecast = 0.0
 
         # --- UI ---
         central = QWidget()
@@ -102,60 +206,25 @@ class MainWindow(QMainWindow):
         splitter.addWidget(left)
         left_layout = QVBoxLayout(left)
 
-        # Tank widgets (PyQt)
+        # Zbiorniki (PyQt): scena QGraphicsView, lekkie elementy zamiast widgetow
         tanks_box = QGroupBox("Zbiorniki (PyQt5)")
-        tanks_grid = QGridLayout(tanks_box)
-        self.tank_widgets: Dict[str, TankWidget] = {}
-        positions = [(0, 0, "T1"), (0, 1, "T2"), (0, 2, "T3"), (0, 3, "T4")]
-        for r, c, name in positions:
-            w = TankWidget()
-            w.setMinimumSize(250, 340)
-            w.setStyleSheet("background-color: #222;")
-            w.setPolozenie(25, 20)
-            tanks_grid.addWidget(w, r, c)
-            self.tank_widgets[name] = w
+        tanks_layout = QVBoxLayout(tanks_box)
+        self.tank_panel = TankPanel([z.nazwa for z in self.instalacja.zbiorniki])
+        self.tank_panel.setMinimumHeight(340)
+        self.tank_panel.tank_selected.connect(self._on_tank_selected)
+        tanks_layout.addWidget(self.tank_panel)
         left_layout.addWidget(tanks_box)
 
         controls_split = QSplitter(Qt.Vertical)
         left_layout.addWidget(controls_split, 1)
 
-        # Sterowanie zbiornikami
+        # Sterowanie zbiornikami: kontrolki tworzone przy pierwszym wyborze zbiornika
         tank_ctrl = QGroupBox("Sterowanie zbiornikami")
-        tank_ctrl_layout = QGridLayout(tank_ctrl)
-
-        for idx, name in enumerate(["T1", "T2", "T3", "T4"]):
-            gb = QGroupBox(name)
-            v = QVBoxLayout(gb)
-            row1 = QHBoxLayout()
-            b_f3 = QPushButton("Napelnij 3s")
-            b_f15 = QPushButton("Napelnij 15s")
-            row1.addWidget(b_f3)
-            row1.addWidget(b_f15)
-            v.addLayout(row1)
-            row2 = QHBoxLayout()
-            b_e3 = QPushButton("Oproznij 3s")
-            b_e15 = QPushButton("Oproznij 15s")
-            row2.addWidget(b_e3)
-            row2.addWidget(b_e15)
-            v.addLayout(row2)
-
-            temp_row = QHBoxLayout()
-            temp_row.addWidget(QLabel("Temp zadana:"))
-            sp = QSpinBox()
-            sp.setRange(0, 120)
-            sp.setValue(20)
-            btn_set = QPushButton("Ustaw")
-            temp_row.addWidget(sp)
-            temp_row.addWidget(btn_set)
-            v.addLayout(temp_row)
-
-            b_f3.clicked.connect(lambda _=False, n=name: self._tank_fill(n, 3.0))
-            b_f15.clicked.connect(lambda _=False, n=name: self._tank_fill(n, 15.0))
-            b_e3.clicked.connect(lambda _=False, n=name: self._tank_empty(n, 3.0))
-            b_e15.clicked.connect(lambda _=False, n=name: self._tank_empty(n, 15.0))
-            btn_set.clicked.connect(lambda _=False, n=name, s=sp: self._tank_set_temp(n, s.value()))
-
-            tank_ctrl_layout.addWidget(gb, idx // 2, idx % 2)
+        self._tank_ctrl_layout = QVBoxLayout(tank_ctrl)
+        self._tank_ctrl_hint = QLabel("Kliknij zbiornik, aby go sterowac")
+        self._tank_ctrl_hint.setAlignment(Qt.AlignCenter)
+        self._tank_ctrl_layout.addWidget(self._tank_ctrl_hint)
+        self.tank_controls: Optional[TankControls] = None
 
         controls_split.addWidget(tank_ctrl)
 
@@ -195,11 +264,42 @@ class MainWindow(QMainWindow):
             vp.addWidget(lbl, row, 0)
             vp.addWidget(s, row, 1)
 
+        # regulatory poziomu LC-Pxy (z --regulacja): auto + poziom zadany zbiornika docelowego
+        self.level_loops: Dict[int, Tuple[QCheckBox, QSpinBox]] = {}
+        if self.instalacja.regulacja is not None:
+            for pidx, pol in enumerate(self.instalacja.polaczenia[:3]):
+                petla = self.instalacja.regulacja.petla_pompy(pol)
+                if petla is None:
+                    continue
+                cb = QCheckBox(f"{petla.nazwa} auto")
+                cb.clicked.connect(lambda checked, pi=pidx: self._command(Komenda.regulator_tryb(checked, pol_idx=pi)))
+                sp = QSpinBox()
+                sp.setRange(0, 100)
+                sp.setSuffix(f" % {pol.zbiornik_b.nazwa}")
+                sp.editingFinished.connect(lambda pi=pidx: self._set_level_sp(pi))
+                self.level_loops[pidx] = (cb, sp)
+                vp.addWidget(cb, 6 + pidx, 0)
+                vp.addWidget(sp, 6 + pidx, 1)
+
         # przyciski okien
         btn_row = QHBoxLayout()
         b_alerts = QPushButton("Pokaz okno alertow")
         b_alerts.clicked.connect(self.alerts.show)
         btn_row.addWidget(b_alerts)
+        b_diag = QPushButton("Diagnostyka")
+        b_diag.clicked.connect(self.diagnostics.show)
+        btn_row.addWidget(b_diag)
+        b_kpi = QPushButton("KPI alarmow")
+        b_kpi.clicked.connect(self.alarm_kpi_dialog.show)
+        btn_row.addWidget(b_kpi)
+        self.btn_record = QPushButton("Nagrywaj scenariusz")
+        self.btn_record.setCheckable(True)
+        self.btn_record.clicked.connect(self._toggle_recording)
+        btn_row.addWidget(self.btn_record)
+        if self.archive is not None:
+            b_export = QPushButton("Eksport...")
+            b_export.clicked.connect(self._show_export)
+            btn_row.addWidget(b_export)
         btn_row.addStretch(1)
         wrap = QWidget()
         wrap.setLayout(btn_row)
@@ -213,38 +313,136 @@ class MainWindow(QMainWindow):
         rlayout = QVBoxLayout(right)
         plots_box = QGroupBox("Wykresy LIVE (matplotlib)")
         pl = QVBoxLayout(plots_box)
-        pl.addWidget(self.plots.canvas)
+        self._plots_layout = pl
+        self._plots_placeholder = QLabel("Ladowanie wykresow..." if plots else "Wykresy wylaczone")
+        self._plots_placeholder.setAlignment(Qt.AlignCenter)
+        pl.addWidget(self._plots_placeholder, 1)
+        self.forecast_label = QLabel("Prognoza: -")
+        self.forecast_label.setWordWrap(True)
+        pl.addWidget(self.forecast_label)
         rlayout.addWidget(plots_box)
 
         splitter.setStretchFactor(0, 3)
         splitter.setStretchFactor(1, 2)
 
         # Timer symulacji
-        self._last_tick = time.time()
+        self._last_tick = self.clock()
         self.timer = QTimer(self)
         self.timer.timeout.connect(self._on_tick)
-        self.timer.start(50)  # 20 Hz
+        self.timer.start(self._tick_ms)  # 20 Hz (w spoczynku: _idle_tick_ms)
 
         # pierwszy sync
         self._sync_ui_from_model()
 
+        if self.tk_log is not None:
+            self._deferred.append(("tk: start procesu", self.tk_log.start))
+        if self.pygame_view is not None:
+            self._deferred.append(("pygame: start watku", self.pygame_view.start))
+        if plots:
+            self._deferred.append(("matplotlib: import + wykresy", self._init_plots))
+
+    # --- Odroczony start ---
+    def event(self, ev) -> bool:
+        res = super().event(ev)
+        if not self._first_paint and ev.type() == QEvent.UpdateRequest:
+            self._on_first_paint()
+        return res
+
+    def showEvent(self, ev) -> None:
+        super().showEvent(ev)
+        # rezerwa, gdy platforma nie wysle UpdateRequest
+        QTimer.singleShot(500, lambda: self._first_paint or self._on_first_paint())
+
+    def _on_first_paint(self) -> None:
+        self._first_paint = True
+        self.startup.mark("okno Qt: pierwsze odmalowanie")
+        QTimer.singleShot(0, self._run_deferred)
+
+    def _run_deferred(self) -> None:
+        """Jeden krok odroczonego startu na obrot petli zdarzen (GUI reaguje w miedzyczasie)."""
+        if self._deferred:
+            name, fn = self._deferred.pop(0)
+            with self.startup.phase(name):
+                fn()
+            QTimer.singleShot(0, self._run_deferred)
+            return
+        self._report_deadline = time.perf_counter() + 10.0
+        self._finish_startup_report()
+
+    def _finish_startup_report(self) -> None:
+        # czasy inicjalizacji watkow pygame/Tk (czekamy na nie najwyzej 10 s)
+        views = [("tk: import + okno", self.tk_log), ("pygame: import + okno", self.pygame_view)]
+        waiting = [v for _, v in views if v is not None and v.init_s is None and v._thread.is_alive()]
+        if waiting and time.perf_counter() < self._report_deadline:
+            QTimer.singleShot(100, self._finish_startup_report)
+            return
+        for name, v in views:
+            if v is not None and v.init_s is not None:
+                self.startup.add(name, v.init_t0, v.init_s)
+        if self.startup_report_cb:
+            self.startup_report_cb(self.startup.format())
+
+    def _init_plots(self) -> None:
+        if self._plots_thread:
+            from ..viz.mpl_async import AsyncLivePlots as LivePlots
+        else:
+            from ..viz.mpl_plots import LivePlots
+
+        self.plots = LivePlots(history_s=120.0, maxlen=800)
+        self._plots_layout.replaceWidget(self._plots_placeholder, self.plots.canvas)
+        self._plots_placeholder.deleteLater()
+
     # --- Log handling ---
     def _on_log_event(self, ev: LogEvent) -> None:
         line = ev.format()
         # PyQt alerts
         self.alerts.add_line(line)
         # Tkinter
-        self.tk_log.log(line)
+        if self.tk_log is not None:
+            self.tk_log.log(line)
+
+    def _record_event(self, ev: LogEvent) -> None:
+        self.event_log.append(ev.timestamp.timestamp(), ev.message)
+
+    # --- KPI alarmow ---
+    def _alarm_kpi_state(self) -> Dict:
+        with self._lock:
+            return self.alarm_kpi.stan(self.clock())
+
+    def _alarm_kpi_save(self, path: str) -> int:
+        # kopia zmian pod blokada, zapis na dysk poza nia (tick nie czeka na I/O)
+        with self._lock:
+            rows = self.alarm_kpi.zmiany(self.clock())
+            names = [z.nazwa for z in self.instalacja.zbiorniki]
+        return zapisz_zmiany_csv(path, rows, self.alarm_kpi.okno_s, names)
+
+    # --- Eksport ---
+    def _seal_archive(self) -> None:
+        with self._lock:
+            self.archive.seal()
+
+    def _show_export(self) -> None:
+        if self.export_dialog is None:
+            self.export_dialog = ExportDialog(self.archive, self.event_log, self._seal_archive, self)
+        self.export_dialog.show()
+        self.export_dialog.raise_()
 
     # --- Snapshot for pygame ---
-    def _snapshot_for_pygame(self) -> PlantSnapshot:
+    def _snapshot_for_pygame(self, visible: Optional[Visible] = None) -> PlantSnapshot:
+        """visible - numery zbiornikow i rur na ekranie pygame (None: wszystkie)."""
         with self._lock:
+            trace_ids = self.tracer.reach("snapshot")
+            zbiorniki = self.instalacja.zbiorniki
+            polaczenia = self.instalacja.polaczenia
+            if visible is not None:
+                zbiorniki = [zbiorniki[i] for i in visible[0] if i < len(zbiorniki)]
+                polaczenia = [polaczenia[i] for i in visible[1] if i < len(polaczenia)]
             tanks = [
                 TankSnapshot(z.nazwa, z.x, z.y, z.width, z.height, z.poziom, z.temperatura)
-                for z in self.instalacja.zbiorniki
+                for z in zbiorniki
             ]
             pipes = []
-            for pol in self.instalacja.polaczenia:
+            for pol in polaczenia:
                 pipes.append(
                     PipeSnapshot(
                         name=pol.nazwa,
@@ -256,31 +454,135 @@ class MainWindow(QMainWindow):
                         valve_b_open=pol.zawor_b.otwarty,
                     )
                 )
-            return PlantSnapshot(tanks=tanks, pipes=pipes)
+            return PlantSnapshot(tanks=tanks, pipes=pipes, trace_ids=trace_ids, layout=self.instalacja.wersja_ukladu)
+
+    # --- Komendy (wspolna sciezka: wykonanie + ewentualne nagrywanie) ---
+    def _command(self, k: Komenda) -> Optional[str]:
+        tid = self.tracer.begin(_trace_name(k))
+        with self._lock:
+            if self.recorder:
+                err = self.recorder.command(k)
+            else:
+                err = wykonaj(self.instalacja, k)
+        if err:
+            self.tracer.reject(tid)
+        else:
+            self.tracer.mark((tid,), "model")
+        # kazda komenda budzi petle (pelna czestotliwosc od razu)
+        self._set_idle(False)
+        if self.pygame_view is not None:
+            self.pygame_view.wake()
+        return err
+
+    def _set_idle(self, idle: bool) -> None:
+        if idle == self._idle:
+            return
+        self._idle = idle
+        self.timer.setInterval(self._idle_tick_ms if idle else self._tick_ms)
+        if idle and self.plots is not None:
+            self.plots.clear_projection()
+
+    def _toggle_recording(self, checked: bool) -> None:
+        if checked:
+            path, _ = QFileDialog.getSaveFileName(self, "Nagraj scenariusz", "scenariusz.scn", "Scenariusz (*.scn)")
+            if not path:
+                self.btn_record.setChecked(False)
+                return
+            with self._lock:
+                self.recorder = ScenarioRecorder(self.instalacja, path)
+            self.bus.emit(f"Nagrywanie scenariusza: {path}")
+        else:
+            self._stop_recording()
+
+    def _stop_recording(self) -> None:
+        with self._lock:
+            rec, self.recorder = self.recorder, None
+            if rec:
+                rec.close()
+        if rec:
+            self.bus.emit("Nagrywanie scenariusza zakonczone")
+
+    def closeEvent(self, event) -> None:
+        self._stop_recording()
+        self.forecaster.shutdown()
+        if self.tk_log is not None:
+            self.tk_log.stop()
+        if self.plots is not None:
+            self.plots.close()
+        if self.export_dialog is not None:
+            self.export_dialog.shutdown()
+        if self.archive is not None:
+            with self._lock:
+                self.archive.close()
+            self.event_log.close()
+        super().closeEvent(event)
+
+    # --- Prognoza ---
+    def _update_forecast(self, now: float) -> None:
+        """Odbiera gotowa prognoze i zleca kolejna (bez czekania w watku GUI)."""
+        fut = self._forecast_future
+        if fut is not None:
+            if not fut.done():
+                return
+            self._forecast_future = None
+            err = None if fut.cancelled() else fut.exception()
+            if err is not None:
+                self._forecast_failed(err)
+            elif not fut.cancelled():
+                self._forecast_error = None
+                self._show_forecast(fut.result())
+        if self._idle or now - self._last_forecast < self._forecast_every_s:
+            return
+        self._last_forecast = now
+        with self._lock:
+            self._forecast_future = self.forecaster.submit(self.instalacja, horizon_s=self._forecast_horizon_s)
+
+    def _forecast_failed(self, err: BaseException) -> None:
+        # komunikat na bus raz na epizod bledow (do pierwszej udanej prognozy)
+        if self._forecast_error is None:
+            self.bus.emit(f"Prognoza: blad {err!r}")
+        self._forecast_error = repr(err)
+        if self.plots is not None:
+            self.plots.clear_projection()
+        self.forecast_label.setText(f"Prognoza: blad ({type(err).__name__})")
+
+    def _show_forecast(self, fc: Forecast) -> None:
+        if self.plots is not None:
+            self.plots.set_projection(fc.t0, fc.times, fc.levels, fc.temps)
+        opisy = {"hi": "poziom > 80%", "lo": "poziom < 5%", "temp": "temp > 80C", "pusty": "pusty", "pelny": "pelny"}
+        parts = [f"{n} {opisy[k]} za {t:.0f}s" for (n, k), t in sorted(fc.alarms.items(), key=lambda kv: kv[1])]
+        self.forecast_label.setText("Prognoza: " + ("; ".join(parts) if parts else f"brak alarmow w {self._forecast_horizon_s:.0f}s"))
 
     # --- Sterowanie zbiornikami ---
-    def _tank_fill(self, name: str, dur: float) -> None:
+    def _on_tank_selected(self, name: str) -> None:
+        if not name:
+            return
+        if self.tank_controls is None:
+            self.tank_controls = TankControls(self._tank_fill, self._tank_empty, self._tank_set_temp)
+            self._tank_ctrl_layout.replaceWidget(self._tank_ctrl_hint, self.tank_controls)
+            self._tank_ctrl_hint.hide()
+            self._tank_ctrl_hint.deleteLater()
         with self._lock:
-            self.instalacja.napelnij(name, dur)
+            setpoint = self.instalacja._get_tank(name).temp_zadana
+        self.tank_controls.set_tank(name, setpoint)
+
+    def _tank_fill(self, name: str, dur: float) -> None:
+        self._command(Komenda.napelnij(name, dur))
 
     def _tank_empty(self, name: str, dur: float) -> None:
-        with self._lock:
-            self.instalacja.oproznij(name, dur)
+        self._command(Komenda.oproznij(name, dur))
 
     def _tank_set_temp(self, name: str, temp: float) -> None:
-        with self._lock:
-            self.instalacja.ustaw_temp_zadana(name, float(temp))
+        self._command(Komenda.temp_zadana(name, float(temp)))
 
     # --- Sterowanie zaworami/pompami ---
     def _set_valve(self, pol_idx: int, which: str, open_: bool) -> None:
-        with self._lock:
-            self.instalacja.ustaw_zawor(pol_idx, which, bool(open_))
+        self._command(Komenda.zawor(pol_idx, which, bool(open_)))
 
     def _set_pump(self, pol_idx: int, slider_value: int) -> None:
         # slider_value 0-100 => 0..1
         speed = float(slider_value) / 100.0
-        with self._lock:
-            err = self.instalacja.ustaw_pompe_predkosc(pol_idx, speed)
+        err = self._command(Komenda.pompa(pol_idx, speed))
 
         if err:
             # blokada: nie mozna wlaczyc pompy, jesli zawor zamkniety
@@ -292,32 +594,65 @@ class MainWindow(QMainWindow):
             s.blockSignals(False)
             self.bus.emit(err)
 
+    def _set_level_sp(self, pol_idx: int) -> None:
+        sp = self.level_loops[pol_idx][1].value() / 100.0
+        with self._lock:
+            petla = self.instalacja.regulacja.petla_pompy(self.instalacja.polaczenia[pol_idx])
+            same = abs(float(self.instalacja.regulacja.bank.sp[petla.idx]) - sp) < 1e-9
+        if not same:
+            self._command(Komenda.regulator_zadana(sp, pol_idx=pol_idx))
+
     # --- Tick symulacji ---
+    def _pomiar_etapu(self, nazwa: str, s: float) -> None:
+        self.metrics.observe("stage_seconds", s, stage="tick." + nazwa)
+
     def _on_tick(self) -> None:
-        now = time.time()
+        now = self.clock()
         dt = max(0.001, now - self._last_tick)
         self._last_tick = now
+        m = self.metrics
 
         with self._lock:
-            self.instalacja.tick(dt)
+            # pomiar etapow wewnatrz ticku tylko przy wlaczonym profilowaniu
+            self.instalacja.harmonogram.pomiar = self._pomiar_etapu if m.enabled else None
+            with m.stage("tick"):
+                if self.recorder:
+                    self.recorder.tick(dt)
+                else:
+                    self.instalacja.tick(dt)
+
+            if self.archive is not None:
+                self.archive.append(now, *plant_sample(self.instalacja))
 
             # dane do wykresow
             levels = {z.nazwa: z.poziom * 100.0 for z in self.instalacja.zbiorniki}
             temps = {z.nazwa: z.temperatura for z in self.instalacja.zbiorniki}
-
-        self.plots.push(now, levels, temps)
-        self._sync_ui_from_model()
+            idle = self.instalacja.czy_spoczynek()
+
+        self._set_idle(idle)
+        # widgety przed wykresami - krotsza droga komenda -> piksel
+        with m.stage("sync_ui"):
+            self._sync_ui_from_model()
+            if self.tracer.reach("qt_sync"):
+                # swieza komenda operatora: odmaluj od razu, nie po renderze wykresow
+                self.repaint()
+                self.tracer.reach("qt_frame", after="qt_sync")
+        with m.stage("forecast"):
+            self._update_forecast(now)
+        if self.plots is not None:
+            with m.stage("plots_push"):
+                self.plots.push(now, levels, temps)
+        if m.enabled:
+            m.frame("qt")
+            if self.tk_log is not None:
+                m.gauge("queue_depth", self.tk_log.pending(), queue="tk_log")
+            m.gauge("queue_depth", self.alerts.list.count(), queue="alerts_list")
 
     def _sync_ui_from_model(self) -> None:
         """Synchronizacja GUI (PyQt) ze stanem modelu."""
         with self._lock:
-            # zbiorniki
-            for z in self.instalacja.zbiorniki:
-                tw = self.tank_widgets.get(z.nazwa)
-                if tw:
-                    tw.setName(z.nazwa)
-                    tw.setTemp(z.temperatura)
-                    tw.setPoziom(z.poziom)
+            # zbiorniki (odmalowane zostana tylko zmienione i widoczne)
+            self.tank_panel.update_tanks((z.nazwa, z.poziom, z.temperatura) for z in self.instalacja.zbiorniki)
 
             # zawory
             for btn, pidx, which in self.valve_buttons:
@@ -337,9 +672,54 @@ class MainWindow(QMainWindow):
                 s.setValue(val)
                 s.blockSignals(False)
 
-
-def run_app() -> None:
-    app = QApplication.instance() or QApplication([])
-    w = MainWindow()
+            # regulatory poziomu (tryb zmienia tez komenda pompy)
+            r = self.instalacja.regulacja
+            for pidx, (cb, sp) in self.level_loops.items():
+                petla = r.petla_pompy(self.instalacja.polaczenia[pidx])
+                cb.setChecked(bool(r.bank.auto[petla.idx]))
+                if not sp.hasFocus():
+                    sp.blockSignals(True)
+                    sp.setValue(int(round(float(r.bank.sp[petla.idx]) * 100.0)))
+                    sp.blockSignals(False)
+
+
+_TRACE_NAMES = {
+    NAPELNIJ: "napelnij",
+    OPROZNIJ: "oproznij",
+    TEMP_ZADANA: "temp_zadana",
+    ZAWOR: "zawor",
+    POMPA: "pompa",
+    REGULATOR_TRYB: "regulator_tryb",
+    REGULATOR_ZADANA: "regulator_zadana",
+}
+
+
+def _trace_name(k: Komenda) -> str:
+    cel = k.zbiornik if k.pol_idx < 0 else f"P{k.pol_idx}{k.which}"
+    return f"{_TRACE_NAMES.get(k.rodzaj, k.rodzaj)} {cel}"
+
+
+def run_app(
+    hydraulika: bool = False,
+    profile: bool = False,
+    plots: bool = True,
+    pygame: bool = True,
+    tk: bool = True,
+    startup: Optional[StartupReport] = None,
+    startup_report: bool = False,
+    plots_thread: bool = False,
+    archive: Optional[str] = None,
+    regulacja: bool = False,
+) -> None:
+    startup = startup or StartupReport()
+    with startup.phase("QApplication"):
+        app = QApplication.instance() or QApplication([])
+    with startup.phase("MainWindow (bez widokow)"):
+        w = MainWindow(
+            hydraulika=hydraulika, profile=profile, plots=plots, pygame=pygame, tk=tk, startup=startup,
+            plots_thread=plots_thread, archive=archive, regulacja=regulacja,
+        )
+    if startup_report:
+        w.startup_report_cb = print
     w.show()
     app.exec_()
@@ -0,0 +1,237 @@
+"""PyQt5: panel zbiornikow na QGraphicsView (skaluje sie do setek zbiornikow).
+
+Kazdy zbiornik to lekki QGraphicsItem (nie QWidget): bez layoutu, arkusza
+stylow i wlasnego paintEvent. Obrys (ten sam ksztalt co ui.tank_widget)
+jest jedna wspolna sciezka QPainterPath. Stan z modelu aktualizuje
+elementy w miejscu, a update() jest wolane tylko przy zmianie widocznej
+na ekranie (piksel cieczy, 0.1 C). Indeks sceny (BSP) sprawia, ze
+odmalowywane sa tylko elementy w obszarze widoku.
+
+Sterowanie zbiornikiem (TankControls) nie jest budowane z gory - panel
+zglasza wybor (tank_selected), a okno pokazuje jeden wspolny zestaw
+kontrolek przypisany do wybranego zbiornika.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from PyQt5.QtCore import QPointF, QRectF, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QFont, QPainter, QPainterPath, QPen
+from PyQt5.QtWidgets import (
+    QGraphicsItem,
+    QGraphicsScene,
+    QGraphicsView,
+    QGroupBox,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QSpinBox,
+    QStyleOptionGraphicsItem,
+    QVBoxLayout,
+)
+
+# wymiary jak w ui.tank_widget.Zbiornik
+_TOP_H, _RECT_H, _BOT_H = 40, 140, 40
+_W_TOP, _W_MID, _W_BOT = 140, 100, 30
+_TOTAL_H = _TOP_H + _RECT_H + _BOT_H
+
+# rozstaw elementow na scenie
+CELL_W, CELL_H = 180, 290
+
+_outline: Optional[QPainterPath] = None
+
+
+def tank_outline() -> QPainterPath:
+    """Wspolny obrys zbiornika (wspolrzedne elementu, lewy gorny rog = 0, 0)."""
+    global _outline
+    if _outline is None:
+        cx = _W_TOP / 2.0
+        path = QPainterPath()
+        path.moveTo(QPointF(cx - _W_TOP / 2, 0))
+        path.lineTo(QPointF(cx + _W_TOP / 2, 0))
+        path.lineTo(QPointF(cx + _W_MID / 2, _TOP_H))
+        path.lineTo(QPointF(cx + _W_MID / 2, _TOP_H + _RECT_H))
+        path.lineTo(QPointF(cx + _W_BOT / 2, _TOTAL_H))
+        path.lineTo(QPointF(cx - _W_BOT / 2, _TOTAL_H))
+        path.lineTo(QPointF(cx - _W_MID / 2, _TOP_H + _RECT_H))
+        path.lineTo(QPointF(cx - _W_MID / 2, _TOP_H))
+        path.closeSubpath()
+        _outline = path
+    return _outline
+
+
+class TankItem(QGraphicsItem):
+    _BOUNDS = QRectF(-4, -22, _W_TOP + 8, _TOTAL_H + 48)
+    _LIQUID = QColor(0, 120, 255, 180)
+    _PEN = QPen(Qt.gray, 3)
+    _PEN_SEL = QPen(QColor(255, 200, 0), 4)
+    _FONT = QFont("Arial", 10)
+
+    def __init__(self, name: str):
+        super().__init__()
+        self.name = name
+        self.level = 0.0
+        self.temp = 20.0
+        self._key: Tuple[int, int] = (-1, 0)
+        self.setFlag(QGraphicsItem.ItemIsSelectable, True)
+
+    def set_state(self, level: float, temp: float) -> bool:
+        """Zwraca True, gdy zmiana jest widoczna (i element czeka na odmalowanie)."""
+        self.level = max(0.0, min(1.0, float(level)))
+        self.temp = float(temp)
+        key = (round(self.level * _TOTAL_H), round(self.temp * 10))
+        if key == self._key:
+            return False
+        self._key = key
+        self.update()
+        return True
+
+    def boundingRect(self) -> QRectF:
+        return self._BOUNDS
+
+    def shape(self) -> QPainterPath:
+        return tank_outline()
+
+    def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem, widget=None) -> None:
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        path = tank_outline()
+        if lod > 0.5:
+            painter.setRenderHint(QPainter.Antialiasing)
+
+        h = _TOTAL_H * self.level
+        if h > 0:
+            painter.save()
+            painter.setClipPath(path)
+            painter.fillRect(QRectF(0, _TOTAL_H - h, _W_TOP, h), self._LIQUID)
+            painter.restore()
+
+        painter.setPen(self._PEN_SEL if self.isSelected() else self._PEN)
+        painter.setBrush(Qt.NoBrush)
+        painter.drawPath(path)
+
+        # etykiety tylko gdy czytelne
+        if lod > 0.4:
+            painter.setPen(Qt.white)
+            painter.setFont(self._FONT)
+            painter.drawText(QPointF(0, -6), self.name)
+            painter.drawText(QPointF(0, _TOTAL_H + 18), f"{self.level*100:.0f}%  {self.temp:.1f}C")
+
+
+class TankPanel(QGraphicsView):
+    """Zbiorniki w siatce `columns` kolumn; kolko myszy skaluje widok."""
+
+    tank_selected = pyqtSignal(str)  # "" - brak wyboru
+
+    def __init__(self, names: Iterable[str], columns: int = 4, parent=None):
+        super().__init__(parent)
+        self._scene = QGraphicsScene(self)
+        self._scene.setItemIndexMethod(QGraphicsScene.BspTreeIndex)
+        self._scene.setBackgroundBrush(QColor("#222"))
+        self.setScene(self._scene)
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.setOptimizationFlag(QGraphicsView.DontAdjustForAntialiasing, True)
+
+        self.items_by_name: Dict[str, TankItem] = {}
+        for i, n in enumerate(names):
+            it = TankItem(n)
+            it.setPos(20 + CELL_W * (i % columns), 30 + CELL_H * (i // columns))
+            self._scene.addItem(it)
+            self.items_by_name[n] = it
+        self._scene.setSceneRect(self._scene.itemsBoundingRect().adjusted(-10, -10, 10, 10))
+        self._scene.selectionChanged.connect(self._on_selection)
+        # do pierwszego skalowania przez uzytkownika: widok dopasowany do okna
+        self._auto_fit = True
+
+    def update_tanks(self, states: Iterable[Tuple[str, float, float]]) -> int:
+        """(nazwa, poziom 0..1, temperatura) -> liczba elementow do odmalowania."""
+        n = 0
+        items = self.items_by_name
+        for name, level, temp in states:
+            it = items.get(name)
+            if it is not None and it.set_state(level, temp):
+                n += 1
+        return n
+
+    def selected_tank(self) -> str:
+        sel = self._scene.selectedItems()
+        return sel[0].name if sel else ""
+
+    def select(self, name: str) -> None:
+        self._scene.clearSelection()
+        it = self.items_by_name.get(name)
+        if it is not None:
+            it.setSelected(True)
+            self.ensureVisible(it)
+
+    def _on_selection(self) -> None:
+        self.tank_selected.emit(self.selected_tank())
+
+    def _fit(self) -> None:
+        r = self._scene.sceneRect()
+        # male instalacje w calosci; duze - najwyzej do skali, przy ktorej etykiety sa czytelne
+        s = min(self.viewport().width() / r.width(), self.viewport().height() / r.height(), 1.0)
+        s = max(s, 0.5)
+        self.resetTransform()
+        self.scale(s, s)
+
+    def resizeEvent(self, event) -> None:
+        super().resizeEvent(event)
+        if self._auto_fit:
+            self._fit()
+
+    def wheelEvent(self, event) -> None:
+        self._auto_fit = False
+        f = 1.15 ** (event.angleDelta().y() / 120.0)
+        s = self.transform().m11() * f
+        if 0.05 <= s <= 4.0:
+            self.scale(f, f)
+
+
+class TankControls(QGroupBox):
+    """Jeden zestaw kontrolek (napelnij/oproznij, temp zadana) dla wybranego zbiornika."""
+
+    def __init__(
+        self,
+        on_fill: Callable[[str, float], None],
+        on_empty: Callable[[str, float], None],
+        on_set_temp: Callable[[str, float], None],
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.tank = ""
+        v = QVBoxLayout(self)
+        row1 = QHBoxLayout()
+        b_f3 = QPushButton("Napelnij 3s")
+        b_f15 = QPushButton("Napelnij 15s")
+        row1.addWidget(b_f3)
+        row1.addWidget(b_f15)
+        v.addLayout(row1)
+        row2 = QHBoxLayout()
+        b_e3 = QPushButton("Oproznij 3s")
+        b_e15 = QPushButton("Oproznij 15s")
+        row2.addWidget(b_e3)
+        row2.addWidget(b_e15)
+        v.addLayout(row2)
+
+        temp_row = QHBoxLayout()
+        temp_row.addWidget(QLabel("Temp zadana:"))
+        self.spin = QSpinBox()
+        self.spin.setRange(0, 120)
+        self.spin.setValue(20)
+        btn_set = QPushButton("Ustaw")
+        temp_row.addWidget(self.spin)
+        temp_row.addWidget(btn_set)
+        v.addLayout(temp_row)
+
+        b_f3.clicked.connect(lambda: on_fill(self.tank, 3.0))
+        b_f15.clicked.connect(lambda: on_fill(self.tank, 15.0))
+        b_e3.clicked.connect(lambda: on_empty(self.tank, 3.0))
+        b_e15.clicked.connect(lambda: on_empty(self.tank, 15.0))
+        btn_set.clicked.connect(lambda: on_set_temp(self.tank, self.spin.value()))
+
+    def set_tank(self, name: str, setpoint: float) -> None:
+        self.tank = name
+        self.setTitle(name)
+        self.spin.setValue(int(round(setpoint)))
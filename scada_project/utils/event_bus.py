@@ -12,9 +12,12 @@ do wielu odbiorcow (PyQt, Tkinter).
 from __future__ import annotations
 
 import threading
+import time
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Callable, List
+from typing import Callable, List, Optional
+
+from .metrics import Metrics
 
 
 @dataclass(frozen=True)
@@ -27,9 +30,11 @@ class LogEvent:
 
 
 class EventBus:
-    def __init__(self):
+    def __init__(self, metrics: Optional[Metrics] = None):
         self._subs: List[Callable[[LogEvent], None]] = []
         self._lock = threading.Lock()
+        # opcjonalnie: czas kazdego subskrybenta (subscriber_seconds{subscriber=...})
+        self.metrics = metrics
 
     def subscribe(self, cb: Callable[[LogEvent], None]) -> None:
         with self._lock:
@@ -39,9 +44,23 @@ class EventBus:
         ev = LogEvent(datetime.now(), str(message))
         with self._lock:
             subs = list(self._subs)
+        m = self.metrics
+        if m is not None and m.enabled:
+            self._emit_timed(ev, subs, m)
+            return
         for cb in subs:
             try:
                 cb(ev)
             except Exception:
                 # Nie wysypuj calej aplikacji przez pojedynczy blad subskrybenta
                 pass
+
+    def _emit_timed(self, ev: LogEvent, subs: List[Callable[[LogEvent], None]], m: Metrics) -> None:
+        for cb in subs:
+            t0 = time.perf_counter()
+            try:
+                cb(ev)
+            except Exception:
+                pass
+            name = getattr(cb, "__qualname__", None) or type(cb).__name__
+            m.observe("subscriber_seconds", time.perf_counter() - t0, subscriber=name)
@@ -0,0 +1,209 @@
+"""Lekkie metryki wydajnosci: histogramy czasow etapow, czasy oczekiwania
+na blokade, glebokosci kolejek i liczba klatek na sekunde.
+
+Pomiar jest przelaczany w locie (Metrics.enabled). Gdy jest wylaczony,
+stage() zwraca wspolny pusty kontekst, a TimedLock bierze blokade wprost -
+koszt to jedno sprawdzenie flagi.
+
+Eksport: prometheus_text() (format tekstowy Prometheus) oraz rows() dla
+panelu diagnostycznego.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Tuple
+
+# granice kubelkow [s]: 1 us .. ~1 s, co 2x
+BUCKETS: Tuple[float, ...] = tuple(1e-6 * 2 ** i for i in range(21))
+
+_NULL = nullcontext()
+
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, str]) -> Key:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(labels: Tuple[Tuple[str, str], ...], extra: str = "") -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    """Histogram o stalych kubelkach (jak w Prometheus, bez kumulacji w pamieci)."""
+
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # ostatni: +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, v: float) -> None:
+        self.counts[bisect_left(BUCKETS, v)] += 1
+        self.count += 1
+        self.sum += v
+        if v > self.max:
+            self.max = v
+
+    def quantile(self, q: float) -> float:
+        """Gorna granica kubelka zawierajacego kwantyl q (0..1)."""
+        if not self.count:
+            return 0.0
+        need = q * self.count
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= need:
+                return BUCKETS[i] if i < len(BUCKETS) else self.max
+        return self.max
+
+
+class _Stage:
+    __slots__ = ("m", "key", "t0")
+
+    def __init__(self, m: "Metrics", key: Key):
+        self.m = m
+        self.key = key
+
+    def __enter__(self) -> None:
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.m._observe(self.key, time.perf_counter() - self.t0)
+
+
+class Metrics:
+    def __init__(self, enabled: bool = False, prefix: str = "scada"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._hist: Dict[Key, Histogram] = {}
+        self._gauges: Dict[Key, float] = {}
+        self._last_frame: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    # ---- Zapis ----
+    def _observe(self, key: Key, v: float) -> None:
+        with self._lock:
+            h = self._hist.get(key)
+            if h is None:
+                h = self._hist[key] = Histogram()
+            h.observe(v)
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        if self.enabled:
+            self._observe(_key(name, labels), seconds)
+
+    def stage(self, stage: str):
+        """Kontekst mierzacy czas etapu (histogram stage_seconds{stage=...})."""
+        if not self.enabled:
+            return _NULL
+        return _Stage(self, ("stage_seconds", (("stage", stage),)))
+
+    def gauge(self, name: str, value: float, **labels: str) -> None:
+        if self.enabled:
+            self._gauges[_key(name, labels)] = float(value)
+
+    def frame(self, view: str) -> None:
+        """Znacznik klatki widoku: odstep miedzy klatkami + fps (srednia kroczaca)."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        prev = self._last_frame.get(view)
+        self._last_frame[view] = now
+        if prev is None:
+            return
+        dt = now - prev
+        self._observe(("frame_interval_seconds", (("view", view),)), dt)
+        key = ("fps", (("view", view),))
+        fps = 1.0 / dt if dt > 0 else 0.0
+        old = self._gauges.get(key)
+        self._gauges[key] = fps if old is None else 0.9 * old + 0.1 * fps
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hist.clear()
+            self._gauges.clear()
+            self._last_frame.clear()
+
+    # ---- Odczyt ----
+    def rows(self) -> List[Tuple[str, str, int, float, float, float, float]]:
+        """(metryka, etykiety, liczba, srednia, p50, p99, max) dla histogramow."""
+        with self._lock:
+            items = sorted(self._hist.items())
+            out = []
+            for (name, labels), h in items:
+                mean = h.sum / h.count if h.count else 0.0
+                lab = ",".join(v for _, v in labels)
+                out.append((name, lab, h.count, mean, h.quantile(0.5), h.quantile(0.99), h.max))
+        return out
+
+    def gauges(self) -> List[Tuple[str, str, float]]:
+        return [(name, ",".join(v for _, v in labels), v) for (name, labels), v in sorted(self._gauges.items())]
+
+    def prometheus_text(self) -> str:
+        p = self.prefix
+        lines: List[str] = []
+        with self._lock:
+            hist = sorted(self._hist.items())
+            gauges = sorted(self._gauges.items())
+        typed = set()
+        for (name, labels), h in hist:
+            full = f"{p}_{name}"
+            if full not in typed:
+                lines.append(f"# TYPE {full} histogram")
+                typed.add(full)
+            acc = 0
+            for le, c in zip(BUCKETS, h.counts):
+                acc += c
+                le_s = 'le="%g"' % le
+                lines.append(f"{full}_bucket{_fmt_labels(labels, le_s)} {acc}")
+            inf_s = 'le="+Inf"'
+            lines.append(f"{full}_bucket{_fmt_labels(labels, inf_s)} {h.count}")
+            lines.append(f"{full}_sum{_fmt_labels(labels)} {h.sum:.9g}")
+            lines.append(f"{full}_count{_fmt_labels(labels)} {h.count}")
+        for (name, labels), v in gauges:
+            full = f"{p}_{name}"
+            if full not in typed:
+                lines.append(f"# TYPE {full} gauge")
+                typed.add(full)
+            lines.append(f"{full}{_fmt_labels(labels)} {v:.9g}")
+        return "\n".join(lines) + "\n"
+
+
+class TimedLock:
+    """Opakowanie blokady mierzace czas oczekiwania (lock_wait_seconds{lock=...})."""
+
+    def __init__(self, lock: Optional[threading.Lock] = None, metrics: Optional[Metrics] = None, name: str = "lock"):
+        self._inner = lock or threading.Lock()
+        self.metrics = metrics
+        self._key: Key = ("lock_wait_seconds", (("lock", name),))
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        m = self.metrics
+        if m is None or not m.enabled:
+            return self._inner.acquire(blocking, timeout)
+        t0 = time.perf_counter()
+        ok = self._inner.acquire(blocking, timeout)
+        m._observe(self._key, time.perf_counter() - t0)
+        return ok
+
+    def release(self) -> None:
+        self._inner.release()
+
+    def locked(self) -> bool:
+        return self._inner.locked()
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *exc) -> None:
+        self._inner.release()
@@ -0,0 +1,45 @@
+"""Raport czasu startu: koszt importu i inicjalizacji poszczegolnych podsystemow.
+
+Czasy liczone od t0 (domyslnie chwila utworzenia raportu - w main.py jak
+najwczesniej). Wpisy moga dochodzic z watkow widokow (pygame, Tk).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+
+class StartupReport:
+    def __init__(self, t0: Optional[float] = None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        # (nazwa, poczatek od t0 [s], czas trwania [s])
+        self.items: List[Tuple[str, float, float]] = []
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start: float, duration_s: float) -> None:
+        """start - wartosc perf_counter() na poczatku etapu."""
+        with self._lock:
+            self.items.append((name, start - self.t0, duration_s))
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, t, time.perf_counter() - t)
+
+    def mark(self, name: str) -> None:
+        """Zdarzenie bez czasu trwania (np. pierwsze odmalowanie okna)."""
+        self.add(name, time.perf_counter(), 0.0)
+
+    def format(self) -> str:
+        with self._lock:
+            items = sorted(self.items, key=lambda it: it[1])
+        lines = ["Start aplikacji (od uruchomienia):", f"  {'etap':<34} {'od [ms]':>9} {'czas [ms]':>10}"]
+        for name, start, dur in items:
+            lines.append(f"  {name:<34} {start * 1e3:9.1f} {dur * 1e3:10.1f}")
+        return "\n".join(lines)
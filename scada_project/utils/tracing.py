@@ -0,0 +1,145 @@
+"""Sledzenie opoznienia komenda -> piksel.
+
+Kazda akcja operatora dostaje identyfikator sladu (begin). Slad zbiera
+znaczniki czasu kolejnych etapow:
+
+    qt_signal     sygnal Qt (_set_valve / _set_pump / ...)       - begin()
+    model         komenda wykonana na Instalacja                 - mark()
+    snapshot      pierwszy snapshot dla pygame z nowym stanem    - reach()
+    pygame_frame  klatka pygame narysowana z tego snapshotu      - mark()
+    qt_sync       synchronizacja widgetow Qt z modelem           - reach()
+    qt_frame      odmalowanie okna Qt (repaint) po synchronizacji - reach()
+
+Slad konczy sie, gdy ma obie klatki (pygame i Qt) albo po timeout_s
+(np. bez okna pygame). Opoznienia etapow wzgledem qt_signal trafiaja do
+histogramow; zakonczone slady mozna zapisac w formacie Trace Event JSON
+(chrome://tracing, Perfetto).
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, List, Tuple
+
+from .metrics import Histogram
+
+ETAPY = ("qt_signal", "model", "snapshot", "pygame_frame", "qt_sync", "qt_frame")
+_KONCOWE = ("pygame_frame", "qt_frame")
+
+
+@dataclass
+class Slad:
+    id: int
+    nazwa: str
+    etapy: Dict[str, float] = field(default_factory=dict)  # etap -> perf_counter
+    odrzucona: bool = False
+
+
+class Tracer:
+    def __init__(self, timeout_s: float = 5.0, maxlen: int = 10000):
+        self.timeout_s = float(timeout_s)
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Slad] = {}
+        self.done: Deque[Slad] = deque(maxlen=maxlen)
+        self.latency: Dict[str, Histogram] = {e: Histogram() for e in ETAPY[1:]}
+        self._lock = threading.Lock()
+
+    # ---- Zapis ----
+    def begin(self, nazwa: str) -> int:
+        tid = next(self._ids)
+        with self._lock:
+            self._pending[tid] = Slad(tid, nazwa, {"qt_signal": time.perf_counter()})
+        return tid
+
+    def mark(self, ids: Iterable[int], etap: str) -> None:
+        """Znacznik etapu dla podanych sladow (tylko pierwszy raz)."""
+        now = time.perf_counter()
+        with self._lock:
+            for tid in ids:
+                s = self._pending.get(tid)
+                if s is not None and etap not in s.etapy:
+                    s.etapy[etap] = now
+                    self._maybe_finish(s, now)
+
+    def reject(self, tid: int) -> None:
+        """Komenda odrzucona przez model (np. blokada pompy) - slad bez dalszych etapow."""
+        with self._lock:
+            s = self._pending.pop(tid, None)
+            if s is not None:
+                s.odrzucona = True
+                s.etapy["model"] = time.perf_counter()
+                self.done.append(s)
+
+    def reach(self, etap: str, after: str = "model") -> Tuple[int, ...]:
+        """Oznacza etap we wszystkich oczekujacych sladach, ktore przeszly juz `after`.
+
+        Zwraca identyfikatory oznaczonych sladow (np. do powiazania z klatka).
+        """
+        if not self._pending:
+            return ()
+        now = time.perf_counter()
+        out: List[int] = []
+        with self._lock:
+            for s in list(self._pending.values()):
+                if after in s.etapy and etap not in s.etapy:
+                    s.etapy[etap] = now
+                    out.append(s.id)
+                    self._maybe_finish(s, now)
+                elif now - s.etapy["qt_signal"] > self.timeout_s:
+                    self._finish(s)
+        return tuple(out)
+
+    def pending(self) -> bool:
+        return bool(self._pending)
+
+    def _maybe_finish(self, s: Slad, now: float) -> None:
+        if all(e in s.etapy for e in _KONCOWE) or now - s.etapy["qt_signal"] > self.timeout_s:
+            self._finish(s)
+
+    def _finish(self, s: Slad) -> None:
+        self._pending.pop(s.id, None)
+        t0 = s.etapy["qt_signal"]
+        for e, t in s.etapy.items():
+            if e != "qt_signal":
+                self.latency[e].observe(t - t0)
+        self.done.append(s)
+
+    # ---- Odczyt / eksport ----
+    def rows(self) -> List[Tuple[str, str, int, float, float, float, float]]:
+        """Jak Metrics.rows(): opoznienie etapow wzgledem sygnalu Qt [s]."""
+        with self._lock:
+            return [
+                ("command_latency_seconds", e, h.count, h.sum / h.count if h.count else 0.0,
+                 h.quantile(0.5), h.quantile(0.99), h.max)
+                for e, h in self.latency.items()
+            ]
+
+    def trace_events(self) -> List[dict]:
+        """Zakonczone slady jako zdarzenia asynchroniczne Trace Event (ts w us)."""
+        with self._lock:
+            slady = list(self.done)
+        ev: List[dict] = []
+        for s in slady:
+            kolejne = sorted(s.etapy.items(), key=lambda kv: kv[1])
+            t0 = kolejne[0][1]
+            t_end = kolejne[-1][1]
+            common = {"cat": "komenda", "id": s.id, "pid": 1, "tid": 1}
+            args = {"odrzucona": s.odrzucona, **{e: round((t - t0) * 1e6, 1) for e, t in kolejne}}
+            ev.append({"name": s.nazwa, "ph": "b", "ts": t0 * 1e6, "args": args, **common})
+            for (_, ta), (e, tb) in zip(kolejne, kolejne[1:]):
+                ev.append({"name": e, "ph": "b", "ts": ta * 1e6, **common})
+                ev.append({"name": e, "ph": "e", "ts": tb * 1e6, **common})
+            ev.append({"name": s.nazwa, "ph": "e", "ts": t_end * 1e6, **common})
+        return ev
+
+    def save(self, path: str) -> int:
+        """Zapis do pliku JSON (Trace Event Format). Zwraca liczbe sladow."""
+        ev = self.trace_events()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": ev, "displayTimeUnit": "ms"}, f)
+        return len(self.done)
@@ -0,0 +1,272 @@
+"""matplotlib LIVE poza watkiem GUI: render Agg w watku roboczym.
+
+AsyncLivePlots ma to samo API co LivePlots (push, set_projection,
+clear_projection, canvas), ale watek GUI tylko dopisuje probki do buforow
+i - gdy renderer jest wolny - wysyla mu kopie buforow (tablice numpy).
+Renderer rysuje na jednej z dwoch figur Agg (ping-pong), a gotowy bufor
+RGBA trafia do Qt jako QImage nad pamiecia renderera, bez kopiowania.
+Figura wyswietlana nigdy nie jest rysowana ponownie, dopoki Qt nie
+przejdzie na druga.
+
+W locie jest najwyzej jedna klatka: push() w trakcie renderowania tylko
+oznacza, ze dane sie zmienily (klatka pominieta, licznik dropped); po
+zakonczeniu renderu wysylany jest najnowszy stan.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtWidgets import QWidget
+
+
+class _Snapshot:
+    __slots__ = ("names", "t", "levels", "temps", "projection", "history_s", "size")
+
+    def __init__(self, names, t, levels, temps, projection, history_s, size):
+        self.names: List[str] = names
+        self.t: np.ndarray = t
+        self.levels: Dict[str, np.ndarray] = levels
+        self.temps: Dict[str, np.ndarray] = temps
+        self.projection: Optional[tuple] = projection
+        self.history_s: float = history_s
+        self.size: Tuple[int, int] = size
+
+
+class _AggFrame:
+    """Figura + canvas Agg uzywane wylacznie przez watek renderera."""
+
+    def __init__(self, dpi: float = 100.0):
+        self.fig = Figure(figsize=(6.0, 4.0), dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.ax_level = self.fig.add_subplot(2, 1, 1)
+        self.ax_temp = self.fig.add_subplot(2, 1, 2)
+        self.ax_level.set_title("Poziom wody (LIVE)")
+        self.ax_level.set_xlabel("t [s]")
+        self.ax_level.set_ylabel("poziom [%]")
+        self.ax_level.set_ylim(0, 100)
+        self.ax_temp.set_title("Temperatura (LIVE)")
+        self.ax_temp.set_xlabel("t [s]")
+        self.ax_temp.set_ylabel("T [C]")
+        self._names: List[str] = []
+        self._lines: Dict[str, tuple] = {}  # nazwa -> (poziom, temp, prog. poziom, prog. temp)
+        self._size: Tuple[int, int] = (0, 0)
+
+    def _rebuild(self, names: List[str]) -> None:
+        for ls in self._lines.values():
+            for ln in ls:
+                ln.remove()
+        self._lines = {}
+        for i, n in enumerate(names):
+            c = f"C{i % 10}"
+            self._lines[n] = (
+                self.ax_level.plot([], [], label=n, color=c)[0],
+                self.ax_temp.plot([], [], label=n, color=c)[0],
+                self.ax_level.plot([], [], linestyle="--", linewidth=1.0, color=c)[0],
+                self.ax_temp.plot([], [], linestyle="--", linewidth=1.0, color=c)[0],
+            )
+        self.ax_level.legend(loc="upper right", fontsize=8)
+        self.ax_temp.legend(loc="upper right", fontsize=8)
+        self._names = list(names)
+
+    def render(self, snap: _Snapshot) -> memoryview:
+        w, h = snap.size
+        if (w, h) != self._size:
+            self.fig.set_size_inches(w / self.fig.dpi, h / self.fig.dpi)
+            self.fig.tight_layout(pad=2.0)
+            self._size = (w, h)
+        if snap.names != self._names:
+            self._rebuild(snap.names)
+
+        t = snap.t
+        proj = snap.projection
+        for n in snap.names:
+            l_lvl, l_tmp, p_lvl, p_tmp = self._lines[n]
+            l_lvl.set_data(t, snap.levels[n])
+            l_tmp.set_data(t, snap.temps[n])
+            if proj is not None and n in proj[1]:
+                p_lvl.set_data(proj[0], proj[1][n])
+            else:
+                p_lvl.set_data([], [])
+            if proj is not None and n in proj[2]:
+                p_tmp.set_data(proj[0], proj[2][n])
+            else:
+                p_tmp.set_data([], [])
+
+        # okno czasu jak w LivePlots
+        tmax = float(t[-1]) if len(t) else 0.0
+        t_proj_end = float(proj[0][-1]) if proj is not None and len(proj[0]) else 0.0
+        left = max(0.0, tmax - snap.history_s)
+        right = max(10.0, tmax, t_proj_end)
+        self.ax_level.set_xlim(left, right)
+        self.ax_temp.set_xlim(left, right)
+        self.ax_temp.relim()
+        self.ax_temp.autoscale_view(scalex=False)
+
+        self.canvas.draw()
+        return memoryview(self.canvas.buffer_rgba())
+
+
+class _Bridge(QObject):
+    ready = pyqtSignal(int)  # indeks gotowej figury; -1 - blad renderu (bez zmiany obrazu)
+
+
+class _ImageWidget(QWidget):
+    def __init__(self, owner: "AsyncLivePlots"):
+        super().__init__()
+        self._owner = owner
+        self.image: Optional[QImage] = None
+        self._buf: Optional[memoryview] = None  # utrzymuje pamiec pod QImage
+        self.setMinimumSize(300, 200)
+
+    def show_buffer(self, buf: memoryview) -> None:
+        h, w = buf.shape[0], buf.shape[1]
+        self._buf = buf
+        self.image = QImage(buf, w, h, w * 4, QImage.Format_RGBA8888)
+        self.update()
+
+    def paintEvent(self, event) -> None:
+        if self.image is None:
+            return
+        p = QPainter(self)
+        p.drawImage(0, 0, self.image)
+        p.end()
+
+    def resizeEvent(self, event) -> None:
+        super().resizeEvent(event)
+        self._owner._dirty = True
+
+
+class AsyncLivePlots:
+    """Dwa wykresy (poziom, temperatura) renderowane w watku roboczym."""
+
+    def __init__(self, history_s: float = 120.0, maxlen: int = 600):
+        self.history_s = float(history_s)
+        self.maxlen = int(maxlen)
+
+        self._t0: Optional[float] = None
+        self._t: Deque[float] = deque(maxlen=self.maxlen)
+        self._levels: Dict[str, Deque[float]] = {}
+        self._temps: Dict[str, Deque[float]] = {}
+        self._names: List[str] = []
+        self._projection: Optional[tuple] = None
+
+        self.canvas = _ImageWidget(self)
+        self._bridge = _Bridge()
+        self._bridge.ready.connect(self._on_ready)  # kolejkowane: sygnal z innego watku
+
+        self._frames = [_AggFrame(), _AggFrame()]
+        self._front = -1  # figura wyswietlana przez Qt
+        self._busy = False
+        self._dirty = False
+        self.rendered = 0
+        self.dropped = 0
+        self.errors = 0  # klatki z bledem renderu
+        self.error: Optional[BaseException] = None  # ostatni blad (None po udanej klatce)
+
+        self._cond = threading.Condition()
+        self._job: Optional[Tuple[int, _Snapshot]] = None
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="mpl-render", daemon=True)
+        self._thread.start()
+
+    # ---- API jak LivePlots ----
+    def set_projection(self, t0_s: float, times: List[float], levels: Dict[str, List[float]], temps: Dict[str, List[float]]) -> None:
+        self._projection = ([t0_s + t for t in times], levels, temps)
+        self._dirty = True
+
+    def clear_projection(self) -> None:
+        self._projection = None
+        self._dirty = True
+
+    def push(self, now_s: float, levels_pct: Dict[str, float], temps_c: Dict[str, float]) -> None:
+        if self._t0 is None:
+            self._t0 = float(now_s)
+        names = sorted(levels_pct.keys())
+        if names != self._names:
+            for n in names:
+                if n not in self._levels:
+                    # nowa seria: dopelnij do dlugosci osi czasu
+                    self._levels[n] = deque([np.nan] * len(self._t), maxlen=self.maxlen)
+                    self._temps[n] = deque([np.nan] * len(self._t), maxlen=self.maxlen)
+            self._names = names
+        self._t.append(float(now_s) - self._t0)
+        for n, d in self._levels.items():
+            d.append(float(levels_pct.get(n, np.nan)))
+            self._temps[n].append(float(temps_c.get(n, np.nan)))
+        self._dirty = True
+        self._kick()
+
+    def close(self) -> None:
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+
+    # ---- Watek GUI ----
+    def _snapshot(self) -> _Snapshot:
+        proj = None
+        if self._projection is not None:
+            abs_times, p_levels, p_temps = self._projection
+            proj = (np.asarray(abs_times, dtype=float) - self._t0, p_levels, p_temps)
+        size = (max(1, self.canvas.width()), max(1, self.canvas.height()))
+        return _Snapshot(
+            list(self._names),
+            np.fromiter(self._t, float, len(self._t)),
+            {n: np.fromiter(self._levels[n], float, len(self._t)) for n in self._names},
+            {n: np.fromiter(self._temps[n], float, len(self._t)) for n in self._names},
+            proj,
+            self.history_s,
+            size,
+        )
+
+    def _kick(self) -> None:
+        if self._busy:
+            self.dropped += 1
+            return
+        if not self._dirty or self._t0 is None:
+            return
+        self._dirty = False
+        self._busy = True
+        back = 1 if self._front == 0 else 0
+        with self._cond:
+            self._job = (back, self._snapshot())
+            self._cond.notify()
+
+    def _on_ready(self, idx: int) -> None:
+        if idx >= 0:
+            self._front = idx
+            self.canvas.show_buffer(self._frames[idx].canvas.buffer_rgba())
+            self.rendered += 1
+        self._busy = False
+        self._kick()  # zmiany z czasu renderowania
+
+    # ---- Watek renderera ----
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._job is None and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                idx, snap = self._job
+                self._job = None
+            try:
+                self._frames[idx].render(snap)
+            except Exception as e:
+                # blad jednej klatki nie zatrzymuje renderera; log raz na epizod bledow
+                self.errors += 1
+                if self.error is None:
+                    print(f"Wykresy: blad renderu klatki: {e!r}", file=sys.stderr)
+                self.error = e
+                idx = -1
+            else:
+                self.error = None
+            self._bridge.ready.emit(idx)
@@ -1,17 +1,20 @@
 """matplotlib LIVE: wykresy poziomu i temperatury (4 serie: T1-T4).
 
 Wymagania: aktualizacja na zywo.
-Realizacja: FigureCanvasQTAgg osadzony w PyQt5 + QTimer.
+Realizacja: FigureCanvasQTAgg osadzony w PyQt5 + QTimer. Linie sa tworzone
+raz (i przy zmianie zestawu serii), push() tylko podmienia ich dane.
+Opcjonalnie: prognoza (model.forecast) rysowana linia przerywana.
 """
 
 from __future__ import annotations
 
 from collections import deque
 from dataclasses import dataclass
-from typing import Deque, Dict, List
+from typing import Deque, Dict, List, Optional
 
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
 
 
 @dataclass
@@ -37,8 +40,22 @@ class LivePlots:
         self._t0 = None
         self._series_level: Dict[str, _Series] = {}
         self._series_temp: Dict[str, _Series] = {}
-        self._lines_level = {}
-        self._lines_temp = {}
+        # artysci (Line2D) tworzeni w _setup_axes, potem tylko set_data
+        self._names: List[str] = []
+        self._lines_level: Dict[str, Line2D] = {}
+        self._lines_temp: Dict[str, Line2D] = {}
+        self._proj_level: Dict[str, Line2D] = {}
+        self._proj_temp: Dict[str, Line2D] = {}
+
+        # prognoza: (czasy bezwzgledne, poziomy, temperatury)
+        self._projection: Optional[tuple] = None
+
+    def set_projection(self, t0_s: float, times: List[float], levels: Dict[str, List[float]], temps: Dict[str, List[float]]) -> None:
+        """Ustawia prognoze (czasy wzgledem t0_s, jak w model.forecast.Forecast)."""
+        self._projection = ([t0_s + t for t in times], levels, temps)
+
+    def clear_projection(self) -> None:
+        self._projection = None
 
     def _ensure(self, names: List[str]) -> None:
         for n in names:
@@ -46,21 +63,8 @@ class LivePlots:
                 self._series_level[n] = _Series(deque(maxlen=self.maxlen), deque(maxlen=self.maxlen))
                 self._series_temp[n] = _Series(deque(maxlen=self.maxlen), deque(maxlen=self.maxlen))
 
-    def push(self, now_s: float, levels_pct: Dict[str, float], temps_c: Dict[str, float]) -> None:
-        if self._t0 is None:
-            self._t0 = float(now_s)
-        t = float(now_s) - self._t0
-
-        names = sorted(levels_pct.keys())
-        self._ensure(names)
-
-        for n in names:
-            self._series_level[n].x.append(t)
-            self._series_level[n].y.append(float(levels_pct[n]))
-            self._series_temp[n].x.append(t)
-            self._series_temp[n].y.append(float(temps_c[n]))
-
-        # kasuj stare osie
+    def _setup_axes(self, names: List[str]) -> None:
+        """Linie tworzone raz na zestaw serii; push() tylko podmienia dane."""
         self.ax_level.cla()
         self.ax_temp.cla()
 
@@ -73,25 +77,68 @@ class LivePlots:
         self.ax_temp.set_xlabel("t [s]")
         self.ax_temp.set_ylabel("T [C]")
 
-        # rysuj serie
-        for n in names:
-            xs = list(self._series_level[n].x)
-            ys = list(self._series_level[n].y)
-            self.ax_level.plot(xs, ys, label=n)
-
+        self._lines_level = {}
+        self._lines_temp = {}
+        self._proj_level = {}
+        self._proj_temp = {}
         for n in names:
-            xs = list(self._series_temp[n].x)
-            ys = list(self._series_temp[n].y)
-            self.ax_temp.plot(xs, ys, label=n)
+            (line,) = self.ax_level.plot([], [], label=n)
+            c = line.get_color()
+            self._lines_level[n] = line
+            (self._lines_temp[n],) = self.ax_temp.plot([], [], label=n, color=c)
+            # prognoza (przerywana, ten sam kolor co seria)
+            (self._proj_level[n],) = self.ax_level.plot([], [], linestyle="--", linewidth=1.0, color=c)
+            (self._proj_temp[n],) = self.ax_temp.plot([], [], linestyle="--", linewidth=1.0, color=c)
 
         self.ax_level.legend(loc="upper right", fontsize=8)
         self.ax_temp.legend(loc="upper right", fontsize=8)
+        self.fig.tight_layout(pad=2.0)
+        self._names = names
+
+    def push(self, now_s: float, levels_pct: Dict[str, float], temps_c: Dict[str, float]) -> None:
+        if self._t0 is None:
+            self._t0 = float(now_s)
+        t = float(now_s) - self._t0
+
+        names = sorted(levels_pct.keys())
+        self._ensure(names)
+        if names != self._names:
+            self._setup_axes(names)
+
+        for n in names:
+            self._series_level[n].x.append(t)
+            self._series_level[n].y.append(float(levels_pct[n]))
+            self._series_temp[n].x.append(t)
+            self._series_temp[n].y.append(float(temps_c[n]))
 
-        # utrzymaj okno czasu
+        for n in names:
+            lv, tp = self._series_level[n], self._series_temp[n]
+            self._lines_level[n].set_data(lv.x, lv.y)
+            self._lines_temp[n].set_data(tp.x, tp.y)
+
+        t_proj_end = None
+        if self._projection is not None:
+            abs_times, p_levels, p_temps = self._projection
+            pxs = [tt - self._t0 for tt in abs_times]
+            for n in names:
+                self._proj_level[n].set_data(*((pxs, p_levels[n]) if n in p_levels else ([], [])))
+                self._proj_temp[n].set_data(*((pxs, p_temps[n]) if n in p_temps else ([], [])))
+            t_proj_end = pxs[-1] if pxs else None
+        else:
+            for n in names:
+                self._proj_level[n].set_data([], [])
+                self._proj_temp[n].set_data([], [])
+
+        # utrzymaj okno czasu; os temperatury wg widocznych danych
         if names:
-            tmax = max(self._series_level[names[0]].x) if self._series_level[names[0]].x else 0
-            self.ax_level.set_xlim(max(0.0, tmax - self.history_s), max(10.0, tmax))
-            self.ax_temp.set_xlim(max(0.0, tmax - self.history_s), max(10.0, tmax))
+            tmax = t
+            right = max(10.0, tmax, t_proj_end or 0.0)
+            self.ax_level.set_xlim(max(0.0, tmax - self.history_s), right)
+            self.ax_temp.set_xlim(max(0.0, tmax - self.history_s), right)
+            self.ax_temp.relim()
+            self.ax_temp.autoscale_view(scalex=False)
 
-        self.fig.tight_layout(pad=2.0)
         self.canvas.draw_idle()
+
+    def close(self) -> None:
+        """Zgodnosc z viz.mpl_async.AsyncLivePlots (tu brak watku do zatrzymania)."""
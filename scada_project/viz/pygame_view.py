@@ -8,15 +8,29 @@ Wymagania:
 - pompy (3) z animacja obrotu zalezna od predkosci.
 
 Realizacja: okno pygame w osobnym watku (Spyder-friendly). Stan jest czytany
-z obiektu Instalacja przez funkcje snapshot_cb.
+z obiektu Instalacja przez funkcje snapshot_cb. Gdy idle_cb() zwraca True
+(instalacja w spoczynku), okno odswiezane jest rzadko.
+
+Duze instalacje: widok przesuwany (przeciaganie, strzalki) i skalowany
+(kolko myszy, +/-; Home - cala instalacja). Indeks przestrzenny (viz.viewport)
+wybiera zbiorniki i rury na ekranie; snapshot_cb(visible) dostaje ich numery,
+wiec kopiowane, rysowane i animowane jest tylko to, co widac. Przy malej
+skali (lod_scale) pomijane sa kropki przeplywu, wirniki pomp i etykiety.
 """
 
 from __future__ import annotations
 
 import math
 import threading
+import time
 from dataclasses import dataclass
-from typing import Callable, Dict, List, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .viewport import GridIndex, Rect, Viewport, bbox
+
+if TYPE_CHECKING:
+    from ..utils.metrics import Metrics
+    from ..utils.tracing import Tracer
 
 
 @dataclass(frozen=True)
@@ -45,6 +59,18 @@ class TankSnapshot:
 class PlantSnapshot:
     tanks: List[TankSnapshot]
     pipes: List[PipeSnapshot]
+    # slady komend (utils.tracing), ktorych stan pierwszy raz jest w tym snapshocie
+    trace_ids: Tuple[int, ...] = ()
+    # wersja ukladu (Instalacja.wersja_ukladu); zmiana -> przebudowa indeksu
+    layout: int = 0
+
+
+# (numery zbiornikow, numery polaczen) widoczne na ekranie
+Visible = Tuple[Sequence[int], Sequence[int]]
+
+# margines obwiedni w jednostkach swiata: etykieta nad zbiornikiem, pompa nad rura
+_TANK_MARGIN = 20.0
+_PIPE_MARGIN = 45.0
 
 
 def _polyline_segments(points: List[Tuple[float, float]]):
@@ -56,13 +82,60 @@ def _polyline_segments(points: List[Tuple[float, float]]):
         yield (x1, y1, x2, y2, length)
 
 
+@dataclass(frozen=True)
+class _PipeGeom:
+    segs: List[Tuple[float, float, float, float, float]]
+    total: float
+    pump: Tuple[float, float]
+    box: Rect
+
+
+def _pipe_geom(points: List[Tuple[float, float]]) -> _PipeGeom:
+    segs = list(_polyline_segments(points))
+    # pompa: na srodku najdluzszego poziomego odcinka rury
+    (x1, y1), (x2, y2) = points[0], points[-1]
+    mx, my = (x1 + x2) / 2.0, (y1 + y2) / 2.0
+    best_L = -1.0
+    for (sx, sy, ex, ey, L) in segs:
+        if abs(ey - sy) < 1e-6 and L > best_L:  # poziomy
+            best_L = L
+            mx = (sx + ex) / 2.0
+            my = sy - 25
+    return _PipeGeom(segs, sum(sg[-1] for sg in segs), (mx, my), bbox(points, _PIPE_MARGIN))
+
+
 class PygameView:
-    def __init__(self, snapshot_cb: Callable[[], PlantSnapshot], title: str = "Instalacja (pygame)"):
+    def __init__(
+        self,
+        snapshot_cb: Callable[[Optional[Visible]], PlantSnapshot],
+        title: str = "Instalacja (pygame)",
+        idle_cb: Optional[Callable[[], bool]] = None,
+        metrics: Optional["Metrics"] = None,
+        tracer: Optional["Tracer"] = None,
+        size: Tuple[int, int] = (980, 520),
+    ):
         self.snapshot_cb = snapshot_cb
         self.title = title
+        self.idle_cb = idle_cb
+        self.metrics = metrics
+        self.tracer = tracer
+        self.fps = 60
+        self.idle_fps = 4
+        # ponizej tej skali: bez kropek, wirnikow i etykiet
+        self.lod_scale = 0.45
 
         self._thread = threading.Thread(target=self._run, daemon=True)
         self._stop = threading.Event()
+        self._wake = threading.Event()
+        # czas importu pygame + otwarcia okna [s] (raport startu)
+        self.init_s: Optional[float] = None
+        self.init_t0 = 0.0
+
+        # widok i indeks przestrzenny (budowany z pelnego snapshotu)
+        self.viewport = Viewport(*size)
+        self._index: Optional[GridIndex] = None
+        self._layout: Optional[int] = None
+        self._geom: Dict[str, _PipeGeom] = {}
 
         # animacja kropek w rurach
         self._phase: Dict[str, float] = {}
@@ -74,118 +147,256 @@ class PygameView:
 
     def stop(self) -> None:
         self._stop.set()
+        self._wake.set()
+
+    def wake(self) -> None:
+        """Przerywa wolne odswiezanie w spoczynku (np. po komendzie operatora)."""
+        self._wake.set()
+
+    # ---- Widok i indeks ----
+    def rebuild_index(self, snap: PlantSnapshot) -> None:
+        """Indeks z pelnego snapshotu (wszystkie zbiorniki i rury)."""
+        index = GridIndex(cell=400.0)
+        for i, t in enumerate(snap.tanks):
+            index.insert(("t", i), (t.x, t.y - _TANK_MARGIN, t.x + t.w, t.y + t.h))
+        self._geom = {}
+        for i, p in enumerate(snap.pipes):
+            g = self._geom[p.name] = _pipe_geom(p.points)
+            index.insert(("p", i), g.box)
+        # animacje tylko dla rur z biezacego ukladu (po zmianie ukladu - bez starych kluczy)
+        self._phase = {k: v for k, v in self._phase.items() if k in self._geom}
+        self._pump_rot = {k: v for k, v in self._pump_rot.items() if k in self._geom}
+        self._index = index
+        self._layout = snap.layout
+
+    def visible(self) -> Optional[Visible]:
+        """Numery zbiornikow i rur na ekranie; None - potrzebny pelny snapshot."""
+        if self._index is None:
+            return None
+        keys = self._index.query(self.viewport.visible())
+        return (
+            sorted(i for kind, i in keys if kind == "t"),
+            sorted(i for kind, i in keys if kind == "p"),
+        )
+
+    def fit_all(self) -> None:
+        if self._index is not None and len(self._index):
+            self.viewport.fit(self._index.bounds())
+
+    def _take_snapshot(self) -> PlantSnapshot:
+        vis = self.visible()
+        snap = self.snapshot_cb(vis)
+        if vis is None:
+            first = self._layout is None
+            self.rebuild_index(snap)
+            if first:
+                # instalacja wieksza niz okno: pokaz calosc
+                b = self._index.bounds()
+                x1, y1 = self.viewport.to_world(self.viewport.width, self.viewport.height)
+                if b[0] < 0 or b[1] < 0 or b[2] > x1 or b[3] > y1:
+                    self.fit_all()
+        elif snap.layout != self._layout:
+            self._index = None  # zmiana ukladu: nastepna klatka z pelnym snapshotem
+        return snap
+
+    def _handle_view_event(self, pygame, event, screen):
+        """Przesuwanie/skalowanie widoku. Zwraca nowa powierzchnie po zmianie rozmiaru."""
+        vp = self.viewport
+        if event.type == pygame.VIDEORESIZE:
+            screen = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
+            vp.resize(event.w, event.h)
+        elif event.type == pygame.MOUSEWHEEL:
+            mx, my = pygame.mouse.get_pos()
+            vp.zoom_at(mx, my, 1.15 ** event.y)
+        elif event.type == pygame.MOUSEMOTION and any(event.buttons):
+            vp.pan(*event.rel)
+        elif event.type == pygame.KEYDOWN:
+            step = 60
+            if event.key == pygame.K_LEFT:
+                vp.pan(step, 0)
+            elif event.key == pygame.K_RIGHT:
+                vp.pan(-step, 0)
+            elif event.key == pygame.K_UP:
+                vp.pan(0, step)
+            elif event.key == pygame.K_DOWN:
+                vp.pan(0, -step)
+            elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                vp.zoom_at(vp.width / 2, vp.height / 2, 1.25)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                vp.zoom_at(vp.width / 2, vp.height / 2, 1 / 1.25)
+            elif event.key in (pygame.K_HOME, pygame.K_f):
+                self.fit_all()
+            else:
+                return screen
+        else:
+            return screen
+        # interakcja w spoczynku: nastepna klatka bez czekania
+        self._wake.set()
+        return screen
 
     def _run(self) -> None:
+        t0 = time.perf_counter()
         import pygame
 
         pygame.init()
-        screen = pygame.display.set_mode((980, 520))
+        screen = pygame.display.set_mode((self.viewport.width, self.viewport.height), pygame.RESIZABLE)
         pygame.display.set_caption(self.title)
 
         clock = pygame.time.Clock()
         font = pygame.font.SysFont(None, 18)
-
-        def draw_valve(surf, pos, open_):
-            # dwa trojkaty dziubkami do siebie
-            x, y = pos
-            size = 10
-            color = (0, 200, 0) if open_ else (200, 0, 0)
-            # lewy trojkat
-            tri1 = [(x - size, y - size), (x - size, y + size), (x, y)]
-            # prawy trojkat
-            tri2 = [(x + size, y - size), (x + size, y + size), (x, y)]
-            pygame.draw.polygon(surf, color, tri1)
-            pygame.draw.polygon(surf, color, tri2)
-
-        def draw_pump(surf, center, speed, dt, key):
-            # kolo + wirnik (linia obracajaca sie)
-            x, y = center
-            r = 16
-            pygame.draw.circle(surf, (120, 120, 120), (int(x), int(y)), r, 3)
-            rot = self._pump_rot.get(key, 0.0)
-            if speed > 0:
-                rot += dt * (2.0 + 10.0 * speed)
-            self._pump_rot[key] = rot
-            angle = rot
-            x2 = x + math.cos(angle) * (r - 3)
-            y2 = y + math.sin(angle) * (r - 3)
-            pygame.draw.line(surf, (180, 180, 180), (int(x), int(y)), (int(x2), int(y2)), 3)
-
-        def draw_flow(surf, points, flowing, direction, speed, key, dt):
-            # rysuj obudowe rury
-            pygame.draw.lines(surf, (160, 160, 160), False, [(int(x), int(y)) for x, y in points], 10)
-
-            if not flowing:
-                return
-
-            # animacja kropek wzdloz polilinii
-            phase = self._phase.get(key, 0.0)
-            phase += dt * (40.0 + 160.0 * speed) * (1 if direction >= 0 else -1)
-            self._phase[key] = phase
-
-            # oblicz dlugosc calkowita
-            segs = list(_polyline_segments(points))
-            total = sum(s[-1] for s in segs)
-            if total <= 0:
-                return
-
-            # kilka kropek
-            step = 28.0
-            for k in range(10):
-                dist = (phase + k * step) % total
-                # znajdz segment
-                acc = 0.0
-                for x1, y1, x2, y2, L in segs:
-                    if acc + L >= dist:
-                        t = 0.0 if L == 0 else (dist - acc) / L
-                        x = x1 + (x2 - x1) * t
-                        y = y1 + (y2 - y1) * t
-                        pygame.draw.circle(surf, (0, 180, 255), (int(x), int(y)), 4)
-                        break
-                    acc += L
+        self.init_t0 = t0
+        self.init_s = time.perf_counter() - t0
 
         while not self._stop.is_set():
-            dt = clock.tick(60) / 1000.0
-            for event in pygame.event.get():
+            idle = self.idle_cb() if self.idle_cb else False
+            if idle:
+                # czekanie przerywane przez wake() zamiast clock.tick(idle_fps)
+                self._wake.wait(1.0 / self.idle_fps)
+            self._wake.clear()
+            dt = clock.tick(self.fps) / 1000.0
+            events = pygame.event.get()
+            for event in events:
                 if event.type == pygame.QUIT:
                     self._stop.set()
+                else:
+                    screen = self._handle_view_event(pygame, event, screen)
+
+            m = self.metrics
+            if m is not None and m.enabled:
+                m.gauge("queue_depth", len(events), queue="pygame_events")
+                with m.stage("pygame_snapshot"):
+                    snap = self._take_snapshot()
+                with m.stage("pygame_frame"):
+                    self.draw_frame(screen, font, snap, dt)
+                    self._draw_hud(screen, font, snap)
+                    pygame.display.flip()
+                m.gauge("pygame_visible", len(snap.tanks) + len(snap.pipes))
+                m.frame("pygame")
+            else:
+                snap = self._take_snapshot()
+                self.draw_frame(screen, font, snap, dt)
+                self._draw_hud(screen, font, snap)
+                pygame.display.flip()
+            if snap.trace_ids and self.tracer is not None:
+                self.tracer.mark(snap.trace_ids, "pygame_frame")
 
-            snap = self.snapshot_cb()
+        pygame.quit()
 
-            screen.fill((25, 25, 25))
+    def _draw_hud(self, screen, font, snap: PlantSnapshot) -> None:
+        total = len(self._index) if self._index is not None else len(snap.tanks) + len(snap.pipes)
+        text = f"skala {self.viewport.scale:.2f}  widoczne {len(snap.tanks) + len(snap.pipes)}/{total}"
+        screen.blit(font.render(text, True, (150, 150, 150)), (8, self.viewport.height - 18))
 
-            # zbiorniki
-            for t in snap.tanks:
-                rect = pygame.Rect(int(t.x), int(t.y), int(t.w), int(t.h))
-                pygame.draw.rect(screen, (230, 230, 230), rect, 3)
-                # ciecz
-                if t.level > 0:
-                    hliq = int(t.h * t.level)
-                    liq = pygame.Rect(int(t.x) + 3, int(t.y + t.h - hliq) + 2, int(t.w) - 6, hliq - 4)
+    # ---- Rysowanie (jedna klatka; uzywane tez przez benchmark) ----
+    def _draw_valve(self, surf, pos, open_, size: int = 10) -> None:
+        import pygame
+
+        # dwa trojkaty dziubkami do siebie
+        x, y = pos
+        color = (0, 200, 0) if open_ else (200, 0, 0)
+        # lewy trojkat
+        tri1 = [(x - size, y - size), (x - size, y + size), (x, y)]
+        # prawy trojkat
+        tri2 = [(x + size, y - size), (x + size, y + size), (x, y)]
+        pygame.draw.polygon(surf, color, tri1)
+        pygame.draw.polygon(surf, color, tri2)
+
+    def _draw_pump(self, surf, center, speed, dt, key, r: int = 16, rotor: bool = True) -> None:
+        import pygame
+
+        # kolo + wirnik (linia obracajaca sie)
+        x, y = center
+        pygame.draw.circle(surf, (120, 120, 120), (x, y), r, max(1, r // 5))
+        if not rotor:
+            return
+        rot = self._pump_rot.get(key, 0.0)
+        if speed > 0:
+            rot = (rot + dt * (2.0 + 10.0 * speed)) % math.tau
+        self._pump_rot[key] = rot
+        angle = rot
+        x2 = x + math.cos(angle) * (r - 3)
+        y2 = y + math.sin(angle) * (r - 3)
+        pygame.draw.line(surf, (180, 180, 180), (x, y), (int(x2), int(y2)), max(1, r // 5))
+
+    def _draw_flow(self, surf, g: _PipeGeom, flowing, direction, speed, key, dt) -> None:
+        import pygame
+
+        vp = self.viewport
+        s = vp.scale
+        # rysuj obudowe rury
+        pts = [vp.to_screen(g.segs[0][0], g.segs[0][1])] + [vp.to_screen(sg[2], sg[3]) for sg in g.segs]
+        pygame.draw.lines(surf, (160, 160, 160), False, pts, max(1, int(10 * s)))
+
+        if not flowing or s < self.lod_scale or g.total <= 0:
+            return
+
+        # animacja kropek wzdloz polilinii (tylko rury na ekranie)
+        phase = self._phase.get(key, 0.0)
+        # modulo dlugosci rury - faza nie rosnie (i nie traci precyzji) w dlugiej pracy
+        phase = (phase + dt * (40.0 + 160.0 * speed) * (1 if direction >= 0 else -1)) % g.total
+        self._phase[key] = phase
+
+        # kilka kropek
+        step = 28.0
+        r = max(1, int(4 * s))
+        for k in range(10):
+            dist = (phase + k * step) % g.total
+            # znajdz segment
+            acc = 0.0
+            for x1, y1, x2, y2, L in g.segs:
+                if acc + L >= dist:
+                    t = 0.0 if L == 0 else (dist - acc) / L
+                    x = x1 + (x2 - x1) * t
+                    y = y1 + (y2 - y1) * t
+                    pygame.draw.circle(surf, (0, 180, 255), vp.to_screen(x, y), r)
+                    break
+                acc += L
+
+    def draw_frame(self, screen, font, snap: PlantSnapshot, dt: float) -> None:
+        import pygame
+
+        vp = self.viewport
+        s = vp.scale
+        detail = s >= self.lod_scale
+        W, H = vp.width, vp.height
+        screen.fill((25, 25, 25))
+
+        # zbiorniki (snapshot moze zawierac wiecej niz ekran - np. pierwszy, pelny)
+        border = max(1, int(3 * s))
+        for t in snap.tanks:
+            x, y = vp.to_screen(t.x, t.y)
+            w, h = max(2, int(t.w * s)), max(2, int(t.h * s))
+            if x > W or y > H or x + w < 0 or y + h < 0:
+                continue
+            pygame.draw.rect(screen, (230, 230, 230), pygame.Rect(x, y, w, h), border)
+            # ciecz
+            if t.level > 0:
+                hliq = int(h * t.level)
+                liq = pygame.Rect(x + border, y + h - hliq + border - 1, w - 2 * border, hliq - border - 1)
+                if liq.w > 0 and liq.h > 0:
                     pygame.draw.rect(screen, (0, 120, 255), liq)
+            if detail:
                 label = font.render(f"{t.name}  {int(t.level*100)}%  {t.temp:.1f}C", True, (240, 240, 240))
-                screen.blit(label, (int(t.x), int(t.y) - 18))
-
-            # rury + przeplyw + zawory + pompy
-            for p in snap.pipes:
-                draw_flow(screen, p.points, p.flowing, p.direction, p.pump_speed, p.name, dt)
-
-                # zawory: przy pierwszym i ostatnim punkcie
-                (x1, y1) = p.points[0]
-                (x2, y2) = p.points[-1]
-                draw_valve(screen, (x1, y1), p.valve_a_open)
-                draw_valve(screen, (x2, y2), p.valve_b_open)
-
-                # pompa: na srodku najdluzszego poziomego odcinka rury
-                mx, my = (x1 + x2) / 2.0, (y1 + y2) / 2.0
-                best_L = -1.0
-                for (sx, sy, ex, ey, L) in _polyline_segments(p.points):
-                    if abs(ey - sy) < 1e-6 and L > best_L:  # poziomy
-                        best_L = L
-                        mx = (sx + ex) / 2.0
-                        my = sy - 25
-                draw_pump(screen, (mx, my), p.pump_speed if p.flowing else 0.0, dt, p.name)
-
-            pygame.display.flip()
-
-        pygame.quit()
+                screen.blit(label, (x, y - 18))
+
+        # rury + przeplyw + zawory + pompy
+        view = vp.visible()
+        valve = max(2, int(10 * s))
+        pump_r = max(2, int(16 * s))
+        for p in snap.pipes:
+            g = self._geom.get(p.name)
+            if g is None:
+                g = self._geom[p.name] = _pipe_geom(p.points)
+            b = g.box
+            if b[0] > view[2] or b[2] < view[0] or b[1] > view[3] or b[3] < view[1]:
+                continue
+            self._draw_flow(screen, g, p.flowing, p.direction, p.pump_speed, p.name, dt)
+            if valve < 3:
+                continue  # mniejsze niz piksele obudowy rury
+
+            # zawory: przy pierwszym i ostatnim punkcie
+            self._draw_valve(screen, vp.to_screen(*p.points[0]), p.valve_a_open, valve)
+            self._draw_valve(screen, vp.to_screen(*p.points[-1]), p.valve_b_open, valve)
+            self._draw_pump(
+                screen, vp.to_screen(*g.pump), p.pump_speed if p.flowing else 0.0, dt, p.name, pump_r, detail
+            )
@@ -0,0 +1,125 @@
+"""Widok przesuwany/skalowany + indeks przestrzenny (siatka) dla duzych instalacji.
+
+Viewport przelicza wspolrzedne swiata (pozycje z modelu) na ekran:
+    ekran = (swiat - origin) * scale
+GridIndex dzieli swiat na kwadratowe komorki; kazdy obiekt (prostokat
+zbiornika, obwiednia rury) jest wpisany do komorek, ktore pokrywa.
+Zapytanie o prostokat widoku odwiedza tylko komorki na ekranie, wiec
+koszt zalezy od tego, co widac, a nie od wielkosci instalacji.
+
+Bez zaleznosci od pygame (uzywane tez w benchmarku).
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable, List, Set, Tuple
+
+Rect = Tuple[float, float, float, float]  # x0, y0, x1, y1 (swiat)
+
+
+def bbox(points: Iterable[Tuple[float, float]], margin: float = 0.0) -> Rect:
+    xs, ys = zip(*points)
+    return (min(xs) - margin, min(ys) - margin, max(xs) + margin, max(ys) + margin)
+
+
+class Viewport:
+    """Przesuniecie (origin, swiat) i skala (piksele na jednostke swiata)."""
+
+    def __init__(self, width: int, height: int, min_scale: float = 0.02, max_scale: float = 8.0):
+        self.width = int(width)
+        self.height = int(height)
+        self.ox = 0.0
+        self.oy = 0.0
+        self.scale = 1.0
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+
+    def resize(self, width: int, height: int) -> None:
+        self.width = int(width)
+        self.height = int(height)
+
+    def to_screen(self, x: float, y: float) -> Tuple[int, int]:
+        s = self.scale
+        return int((x - self.ox) * s), int((y - self.oy) * s)
+
+    def to_world(self, sx: float, sy: float) -> Tuple[float, float]:
+        return self.ox + sx / self.scale, self.oy + sy / self.scale
+
+    def visible(self, margin_px: float = 0.0) -> Rect:
+        """Prostokat swiata widoczny na ekranie (z marginesem w pikselach)."""
+        m = margin_px / self.scale
+        x1, y1 = self.to_world(self.width, self.height)
+        return (self.ox - m, self.oy - m, x1 + m, y1 + m)
+
+    def pan(self, dx_px: float, dy_px: float) -> None:
+        """Przesuniecie obrazu o (dx, dy) pikseli (jak przeciaganie mysza)."""
+        self.ox -= dx_px / self.scale
+        self.oy -= dy_px / self.scale
+
+    def zoom_at(self, sx: float, sy: float, factor: float) -> None:
+        """Skalowanie wokol punktu ekranu (sx, sy) - punkt pod kursorem zostaje."""
+        wx, wy = self.to_world(sx, sy)
+        self.scale = min(self.max_scale, max(self.min_scale, self.scale * factor))
+        self.ox = wx - sx / self.scale
+        self.oy = wy - sy / self.scale
+
+    def fit(self, r: Rect, margin_px: float = 30.0) -> None:
+        """Pokazuje caly prostokat swiata r."""
+        w = max(1e-6, r[2] - r[0])
+        h = max(1e-6, r[3] - r[1])
+        sw = max(1.0, self.width - 2 * margin_px)
+        sh = max(1.0, self.height - 2 * margin_px)
+        self.scale = min(self.max_scale, max(self.min_scale, min(sw / w, sh / h)))
+        self.ox = (r[0] + r[2]) / 2.0 - self.width / 2.0 / self.scale
+        self.oy = (r[1] + r[3]) / 2.0 - self.height / 2.0 / self.scale
+
+
+class GridIndex:
+    """Siatka komorek cell x cell; obiekty identyfikowane kluczem (np. (rodzaj, nr))."""
+
+    def __init__(self, cell: float = 400.0):
+        self.cell = float(cell)
+        self._cells: Dict[Tuple[int, int], List] = {}
+        self._bounds: Dict[object, Rect] = {}
+
+    def __len__(self) -> int:
+        return len(self._bounds)
+
+    def _range(self, r: Rect) -> Tuple[int, int, int, int]:
+        c = self.cell
+        return (math.floor(r[0] / c), math.floor(r[1] / c), math.floor(r[2] / c), math.floor(r[3] / c))
+
+    def insert(self, key, r: Rect) -> None:
+        self._bounds[key] = r
+        i0, j0, i1, j1 = self._range(r)
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                self._cells.setdefault((i, j), []).append(key)
+
+    def bounds(self) -> Rect:
+        """Obwiednia wszystkich obiektow."""
+        rs = list(self._bounds.values())
+        if not rs:
+            return (0.0, 0.0, 0.0, 0.0)
+        return (min(r[0] for r in rs), min(r[1] for r in rs), max(r[2] for r in rs), max(r[3] for r in rs))
+
+    def query(self, r: Rect) -> Set:
+        """Klucze obiektow przecinajacych prostokat r."""
+        i0, j0, i1, j1 = self._range(r)
+        out: Set = set()
+        cells = self._cells
+        bounds = self._bounds
+        # widok wiekszy niz zajete komorki: przejrzyj komorki zamiast siatki
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(cells):
+            it = (v for (i, j), v in cells.items() if i0 <= i <= i1 and j0 <= j <= j1)
+        else:
+            it = (cells[(i, j)] for i in range(i0, i1 + 1) for j in range(j0, j1 + 1) if (i, j) in cells)
+        for keys in it:
+            for k in keys:
+                if k in out:
+                    continue
+                b = bounds[k]
+                if b[0] <= r[2] and b[2] >= r[0] and b[1] <= r[3] and b[3] >= r[1]:
+                    out.add(k)
+        return out